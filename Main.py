@@ -1,5 +1,6 @@
 from simulation import *
 from State import State, VanillaState
+from heapqueue import open_lists
 import utils
 import argparse
 
@@ -33,7 +34,15 @@ defaults = {
     'h_name': 'sum',
     'state_type': 'State',
     'bound': 1,
-    'k_limit': 20
+    'k_limit': 20,
+    'max_nodes': 10000,
+    'open_list': 'heap',
+    'symmetry': False,
+    'cache_dir': None,
+    'jobs': 1,
+    'stream': False,
+    'spans': False,
+    'memory': False
 }
 
 
@@ -78,7 +87,9 @@ def get_file_names(num_sims=defaults['num_sims'],
                    h_name=defaults['h_name'],
                    state_type=defaults['state_type'],
                    bound=defaults['bound'],
-                   k_limit=defaults['k_limit']):
+                   k_limit=defaults['k_limit'],
+                   symmetry=defaults['symmetry'],
+                   max_nodes=defaults['max_nodes']):
     """
     Returns a dict where the keys are search algorithm names and the values are
     the bases (i.e. the part before the extension) of the output file names,
@@ -89,14 +100,51 @@ def get_file_names(num_sims=defaults['num_sims'],
     name_base = "sims" + str(num_sims) + ".n" + str(n) + ".k" + \
                 str(k) + ".m" + str(m) + "." + str(h_name) + "." + \
                 str(state_type) + "."
+    if symmetry:
+        name_base += "symmetry."
 
     return {
         'a_star': name_base + "a_star",
         'bounded_a_star': name_base + "bound" + str(bound) + ".bounded_a_star",
-        'local_beam': name_base + "k_limit" + str(k_limit) + ".local_beam"
+        'local_beam': name_base + "k_limit" + str(k_limit) + ".local_beam",
+        'ida_star': name_base + "ida_star",
+        'sma_star': name_base + "max_nodes" + str(max_nodes) + ".sma_star"
     }
 
 
+def write_simulations(name, stream, h_name, simulations, *args, **kwargs):
+    """
+    Runs simulations(*args, **kwargs), where 'simulations' is one of the
+    functions from simulation.py, and writes the results to a file with the
+    given name. Normally, all results are collected, and written at the end
+    to "<name>.json". In streaming mode, each simulation's results are
+    instead appended to "<name>.jsonl", as one line of JSON, as soon as they
+    are available, followed by a final line summarizing the simulations (see
+    utils.read_streamed_json_data).
+
+    :param name: the name of the file, without an extension
+    :type name: string
+    :param stream: whether to use streaming mode
+    :type stream: bool
+    :param h_name: the name of the heuristic function used
+    :type h_name: string
+    :param simulations: the simulation function to run
+    :type simulations: (*args, **kwargs) => dict
+    """
+    if not stream:
+        data = simulations(*args, **kwargs)
+        data['h_name'] = h_name
+        utils.dump_json_data(name, data)
+        return
+    with open(name + ".jsonl", 'w') as out:
+        def write_result(i, result):
+            utils.write_json_line(out, {'sim': i, 'result': result})
+
+        data = simulations(*args, on_result=write_result, **kwargs)
+        data['h_name'] = h_name
+        utils.write_json_line(out, {'summary': data})
+
+
 if __name__ == "__main__":
     # Define command line arguments.
     _parser = argparse.ArgumentParser(description="Run simulations of search "
@@ -110,6 +158,12 @@ if __name__ == "__main__":
                          help="run simulations using Bounded A* Search")
     _parser.add_argument("-l", "--local-beam", action='store_true',
                          help="run simulations using Local Beam Search")
+    _parser.add_argument("-i", "--ida-star", action='store_true',
+                         help="run simulations using Iterative Deepening "
+                              "A* Search")
+    _parser.add_argument("-s", "--sma-star", action='store_true',
+                         help="run simulations using Simplified "
+                              "Memory-Bounded A* Search")
     _parser.add_argument("--num-sims", type=parse_positive_int,
                          default=defaults['num_sims'],
                          help="total number of simulations to run")
@@ -140,6 +194,42 @@ if __name__ == "__main__":
                          help="causes Local Beam Search to consider only the "
                               "best (K_LIMIT - 1) successors of any given "
                               "state at each level of recursion")
+    _parser.add_argument("--max-nodes", type=parse_positive_int,
+                         default=defaults['max_nodes'],
+                         help="causes SMA* to keep at most MAX_NODES states "
+                              "in memory, forgetting the worst ones when it "
+                              "is full")
+    _parser.add_argument("--open-list", default=defaults['open_list'],
+                         choices=sorted(open_lists),
+                         help="priority queue implementation used as the open "
+                              "list by the search algorithms")
+    _parser.add_argument("--symmetry", action='store_true',
+                         help="treat cars as interchangeable, pruning states "
+                              "that differ only by a permutation of the cars")
+    _parser.add_argument("--cache-dir", default=defaults['cache_dir'],
+                         help="directory in which processed maps are cached "
+                              "and reused across runs; if not given, every "
+                              "map is processed")
+    _parser.add_argument("-j", "--jobs", type=parse_positive_int,
+                         default=defaults['jobs'],
+                         help="number of worker processes to spread the "
+                              "simulations across")
+    _parser.add_argument("--stream", action='store_true',
+                         help="append each simulation's results to a JSON "
+                              "Lines (.jsonl) file as soon as they are "
+                              "available, instead of writing a JSON file at "
+                              "the end")
+    _parser.add_argument("--spans", action='store_true',
+                         help="record the wall time spent in each part of "
+                              "every simulation (building the world, "
+                              "pre-processing, generating successors, "
+                              "evaluating heuristics, queue operations), and "
+                              "add it to the results as 'spans'")
+    _parser.add_argument("--memory", action='store_true',
+                         help="record the peak memory used by each "
+                              "simulation's search (this slows the search "
+                              "down), and add it to the results as "
+                              "'peak_memory' and 'max_rss', in bytes")
 
     # Parse command line arguments.
     _args = _parser.parse_args()
@@ -147,6 +237,8 @@ if __name__ == "__main__":
     _a_star = _args.a_star
     _bounded_a_star = _args.bounded_a_star
     _local_beam = _args.local_beam
+    _ida_star = _args.ida_star
+    _sma_star = _args.sma_star
     _num_sims = _args.num_sims
     _n = _args.vehicles
     _k = _args.packages
@@ -156,37 +248,65 @@ if __name__ == "__main__":
     _h = heuristics[_h_name][_state_type]
     _bound = _args.bound
     _k_limit = _args.k_limit
+    _max_nodes = _args.max_nodes
+    _open_list = _args.open_list
+    _symmetry = _args.symmetry
+    _cache_dir = _args.cache_dir
+    _jobs = _args.jobs
+    _stream = _args.stream
+    _spans = _args.spans
+    _memory = _args.memory
 
-    if not _a_star and not _bounded_a_star and not _local_beam:
-        raise _parser.error("at least one of -a, -b, or -l must be given")
+    if not _a_star and not _bounded_a_star and not _local_beam and \
+            not _ida_star and not _sma_star:
+        raise _parser.error("at least one of -a, -b, -l, -i, or -s must be "
+                            "given")
 
     # Run the simulations and record simulation results.
     _names = get_file_names(_num_sims, _n, _k, _m, _h_name, _state_type,
-                            _bound, _k_limit)
+                            _bound, _k_limit, _symmetry, _max_nodes)
 
     if _verbose and _a_star:
         print("Regular A* simulations.")
     if _a_star:
-        data_a_star = a_star_simulations(_n, _k, _m, _h, _num_sims,
-                                         _state_type, _verbose)
-        data_a_star['h_name'] = _h_name
-        utils.dump_json_data(_names['a_star'], data_a_star)
+        write_simulations(_names['a_star'], _stream, _h_name,
+                          a_star_simulations, _n, _k, _m, _h, _num_sims,
+                          _state_type, _verbose, _open_list, _symmetry,
+                          _cache_dir, _jobs, spans=_spans,
+                          memory=_memory)
 
     if _verbose and _bounded_a_star:
         print("Bounded A* simulations.")
     if _bounded_a_star:
-        data_bounded_a_star = bounded_a_star_simulations(_n, _k, _m, _h,
-                                                         _num_sims,
-                                                         _state_type, _bound,
-                                                         _verbose)
-        data_bounded_a_star['h_name'] = _h_name
-        utils.dump_json_data(_names['bounded_a_star'], data_bounded_a_star)
+        write_simulations(_names['bounded_a_star'], _stream, _h_name,
+                          bounded_a_star_simulations, _n, _k, _m, _h,
+                          _num_sims, _state_type, _bound, _verbose,
+                          _open_list, _symmetry, _cache_dir, _jobs,
+                          spans=_spans, memory=_memory)
 
     if _verbose and _local_beam:
         print("Local Beam Search simulations.")
     if _local_beam:
-        data_local_beam = local_beam_simulations(_n, _k, _m, _h, _num_sims,
-                                                 _state_type, _k_limit,
-                                                 _verbose)
-        data_local_beam['h_name'] = _h_name
-        utils.dump_json_data(_names['local_beam'], data_local_beam)
+        write_simulations(_names['local_beam'], _stream, _h_name,
+                          local_beam_simulations, _n, _k, _m, _h, _num_sims,
+                          _state_type, _k_limit, _verbose, _open_list,
+                          _symmetry, _cache_dir, _jobs, spans=_spans,
+                          memory=_memory)
+
+    if _verbose and _ida_star:
+        print("IDA* simulations.")
+    if _ida_star:
+        write_simulations(_names['ida_star'], _stream, _h_name,
+                          ida_star_simulations, _n, _k, _m, _h, _num_sims,
+                          _state_type, _verbose, _open_list, _symmetry,
+                          _cache_dir, _jobs, spans=_spans,
+                          memory=_memory)
+
+    if _verbose and _sma_star:
+        print("SMA* simulations.")
+    if _sma_star:
+        write_simulations(_names['sma_star'], _stream, _h_name,
+                          sma_star_simulations, _n, _k, _m, _h, _num_sims,
+                          _state_type, _max_nodes, _verbose, _open_list,
+                          _symmetry, _cache_dir, _jobs, spans=_spans,
+                          memory=_memory)
@@ -1,32 +1,56 @@
 from World import World
-from utils import combinations, permutations_exclude
-import copy
+from utils import combinations, permutations, permutations_exclude
 
 
 class State:
     """
     A State simply represents a state in the state space.
+
+    States are created in very large numbers during search, so they are kept
+    compact: the current location of each car is a tuple, the set of
+    delivered packages is a bitmask, and the path taken to reach the state is
+    not stored in the state itself, but recovered by following parent
+    references back to the initial state.
     """
 
-    def __init__(self, world, car_locs, packages, cost_so_far):
+    __slots__ = ('_world', '_car_locs', '_delivered', '_g', '_parent',
+                 '_assignment', '_undelivered_cost')
+
+    def __init__(self, world, car_locs, delivered, cost_so_far, parent=None,
+                 assignment=None, undelivered_cost=None):
         """
         :param world: the world state that is unchanging but still part of
             every state
         :type world: World
-        :param car_locs: a list of stacks keeping track of each car's
-            current location and path so far
-        :type car_locs: list(list(int))
-        :param packages: a list of booleans showing whether each package
-            has been delivered or not
-        :type packages: list(bool)
+        :param car_locs: the current location of each car
+        :type car_locs: tuple(int)
+        :param delivered: a bitmask of the packages that have been delivered,
+            where bit i is set if, and only if, package i has been delivered
+        :type delivered: int
         :param cost_so_far: the total cost so far from the start state this
             state. This is later referred to as 'g'.
         :type cost_so_far: float
+        :param parent: the state from which this state was generated, or None
+            for the initial state. Default: None.
+        :type parent: State
+        :param assignment: the index of the package each car picked up and
+            delivered on the way from the parent state to this state, or -1
+            for any car that did not deliver a package; None if no car
+            delivered a package. Default: None.
+        :type assignment: tuple(int)
+        :param undelivered_cost: the sum of the package costs of all the
+            undelivered packages, if already known (e.g. updated from the
+            parent state's value), or None to compute it from scratch the
+            first time it is needed. Default: None.
+        :type undelivered_cost: float
         """
         self._world = world
         self._car_locs = car_locs
-        self._packages = packages
+        self._delivered = delivered
         self._g = cost_so_far
+        self._parent = parent
+        self._assignment = assignment
+        self._undelivered_cost = undelivered_cost
 
     def __eq__(self, other):
         """
@@ -41,15 +65,37 @@ class State:
         :type other: State
         :rtype: bool
         """
-        other_cars = other.get_car_locs()
-        for i, car in enumerate(self._car_locs):
-            if car[len(car) - 1] != other_cars[i][len(other_cars[i]) - 1]:
-                return False
-        other_packs = other.get_packages()
-        for i, pack in enumerate(self._packages):
-            if pack != other_packs[i]:
-                return False
-        return True
+        return self.get_key() == other.get_key()
+
+    def __hash__(self):
+        """
+        Hashes the state by its canonical key, so that equal states have equal
+        hashes.
+
+        :rtype: int
+        """
+        return hash(self.get_key())
+
+    def get_key(self):
+        """
+        Returns a canonical, hashable key for this state, made up of the
+        *current* location of each car and the bitmask of delivered packages.
+        Two states have the same key if, and only if, they are equal.
+
+        :rtype: (tuple(int), int)
+        """
+        return self._car_locs, self._delivered
+
+    def get_symmetric_key(self):
+        """
+        Returns a canonical, hashable key for this state that ignores which
+        car is where. Since all cars start at the garage and are otherwise
+        interchangeable, two states that differ only by a permutation of the
+        cars have the same remaining cost, and so share this key.
+
+        :rtype: (tuple(int), int)
+        """
+        return tuple(sorted(self._car_locs)), self._delivered
 
     def get_world(self):
         """
@@ -72,14 +118,32 @@ class State:
         """
         return self._g
 
+    def get_parent(self):
+        """
+        Returns the state from which this state was generated, or None for the
+        initial state.
+
+        :rtype: State
+        """
+        return self._parent
+
     def get_car_locs(self):
         """
-        For each car, returns a stack recording the car's path over time.
+        Returns the current location of each car.
 
-        :rtype: list(list(int))
+        :rtype: tuple(int)
         """
         return self._car_locs
 
+    def get_delivered(self):
+        """
+        Returns a bitmask of the packages that have been delivered, where bit
+        i is set if, and only if, package i has been delivered.
+
+        :rtype: int
+        """
+        return self._delivered
+
     def get_packages(self):
         """
         Returns a list of booleans showing whether each package has been
@@ -87,16 +151,33 @@ class State:
 
         :rtype: list(bool)
         """
-        return self._packages
+        return [bool(self._delivered >> i & 1)
+                for i in range(self._world.get_number_of_packages())]
 
     def get_car_path(self, n):
         """
-        Returns a stack recording the n'th car's path over time.
+        Returns a list recording the n'th car's path over time, from its
+        starting location to its current location. The path is recovered by
+        following parent references back to the initial state.
 
         :param n: the index of the car
         :rtype: list(int)
         """
-        return self._car_locs[n]
+        world = self._world
+        path = []
+        state = self
+        while state._parent is not None:
+            loc = state._car_locs[n]
+            assignment = state._assignment
+            if assignment is not None and assignment[n] != -1:
+                path.append(loc)
+                path.append(world.get_package_source(assignment[n]))
+            elif loc != state._parent._car_locs[n]:
+                path.append(loc)
+            state = state._parent
+        path.append(state._car_locs[n])
+        path.reverse()
+        return path
 
     def get_car_loc(self, n):
         """
@@ -105,7 +186,7 @@ class State:
         :param n: the index of the car
         :rtype: int
         """
-        return self._car_locs[n][len(self._car_locs[n]) - 1]
+        return self._car_locs[n]
 
     def get_num_delivered(self):
         """
@@ -113,7 +194,7 @@ class State:
 
         :rtype: int
         """
-        return self._packages.count(True)
+        return bin(self._delivered).count('1')
 
     def get_num_undelivered(self):
         """
@@ -121,7 +202,7 @@ class State:
 
         :rtype: int
         """
-        return self._packages.count(False)
+        return self._world.get_number_of_packages() - self.get_num_delivered()
 
     def all_packages_delivered(self):
         """
@@ -129,7 +210,7 @@ class State:
 
         :rtype: bool
         """
-        return self.get_num_undelivered() == 0
+        return self._delivered == self._world.get_all_packages_mask()
 
     # ===== Heuristics ===== #
 
@@ -153,13 +234,25 @@ class State:
         """
         A heuristic that computes the sum of the cost between each package and
         its destination. This is >0 for all undelivered package, and 0 for all
-        delivered packages.
+        delivered packages. The sum is maintained incrementally by the
+        transition operator, so this is constant time for generated states.
+
+        :rtype: float
+        """
+        if self._undelivered_cost is None:
+            self._undelivered_cost = self._sum_of_package_cost()
+        return self._undelivered_cost
+
+    def _sum_of_package_cost(self):
+        """
+        Computes the sum of the package costs of all the undelivered packages
+        from scratch.
 
         :rtype: float
         """
         sum_of_package_costs = 0
-        for i, pack in enumerate(self._packages):
-            if not pack:  # if package is not yet delivered
+        for i in range(self._world.get_number_of_packages()):
+            if not self._delivered >> i & 1:  # if package is not delivered
                 sum_of_package_costs += self._world.get_package_cost(i)
         return sum_of_package_costs
 
@@ -178,10 +271,40 @@ class State:
         """
         sum_of_package_costs = self.sum_of_package_cost_h()
         num_delivered = self.get_num_delivered()
-        reduction_val = 1.0 / float(len(self._packages))
+        reduction_val = 1.0 / float(self._world.get_number_of_packages())
         scalar = 1 - (num_delivered * reduction_val)
         return scalar * sum_of_package_costs
 
+    def check_heuristics(self):
+        """
+        Returns whether the incrementally maintained heuristic values of this
+        state ('sum', 'scaled' and 'undelivered') agree with the same values
+        computed from scratch.
+
+        :rtype: bool
+        """
+        world = self._world
+        num_delivered = 0
+        for i in range(world.get_number_of_packages()):
+            if self._delivered >> i & 1:
+                num_delivered += 1
+        num_undelivered = world.get_number_of_packages() - num_delivered
+        sum_of_package_costs = self._sum_of_package_cost()
+        scalar = 1 - (num_delivered / float(world.get_number_of_packages()))
+        return self.undelivered_h() == num_undelivered and \
+            _close(self.sum_of_package_cost_h(), sum_of_package_costs) and \
+            _close(self.sum_of_package_cost_scaled_h(),
+                   scalar * sum_of_package_costs)
+
+
+def _close(a, b):
+    """
+    Returns whether the two given costs are equal, up to floating point error.
+
+    :rtype: bool
+    """
+    return abs(a - b) <= 1e-9 * max(1.0, abs(b))
+
 
 def state_transition(state):
     """
@@ -203,51 +326,135 @@ def state_transition(state):
     successors = []
     world = state.get_world()
     number_of_cars = world.get_number_of_cars()
+    car_locs = state.get_car_locs()
+    delivered = state.get_delivered()
     if state.all_packages_delivered():
-        new_car_locs = [[world.get_garage()]] * number_of_cars
-        for n in range(number_of_cars):
-            new_car_locs[n] = copy.deepcopy(state.get_car_path(n))
-        new_packages = copy.deepcopy(state.get_packages())
         new_g = state.get_g()
         for car in range(number_of_cars):
-            car_stack = new_car_locs[car]
-            if car_stack[len(car_stack) - 1] != world.get_garage():
-                new_g += world.get_edge_cost(car_stack[len(car_stack) - 1],
+            if car_locs[car] != world.get_garage():
+                new_g += world.get_edge_cost(car_locs[car],
                                              world.get_garage())
-                car_stack.append(world.get_garage())
-        new_state = State(world, new_car_locs, new_packages, new_g)
+        new_car_locs = (world.get_garage(),) * number_of_cars
+        new_state = State(world, new_car_locs, delivered, new_g, state,
+                          undelivered_cost=state.sum_of_package_cost_h())
         successors.append(new_state)
         return successors
+    undelivered = [pack for pack in range(world.get_number_of_packages())
+                   if not delivered >> pack & 1]
+    undelivered_cost = state.sum_of_package_cost_h()
+    # The cost for each car to reach each undelivered package, and the cost
+    # of each undelivered package, indexed by position in 'undelivered'.
+    pickup_costs = world.get_pickup_costs(car_locs, undelivered)
+    package_costs = [world.get_package_cost(pack) for pack in undelivered]
     for i in range(1, number_of_cars + 1):
         for cars in combinations(number_of_cars, i):
-            for packs_perm in permutations_exclude(
-                    len(state.get_packages()), i, state.get_packages()):
+            for packs_perm in permutations(len(undelivered), i):
                 car_with_pack = [-1] * number_of_cars
-                new_car_locs = [[world.get_garage()]] * number_of_cars
-                for n in range(number_of_cars):
-                    new_car_locs[n] = copy.deepcopy(state.get_car_path(n))
-                new_packages = copy.deepcopy(state.get_packages())
+                new_car_locs = list(car_locs)
+                new_delivered = delivered
                 new_g = state.get_g()
+                new_undelivered_cost = undelivered_cost
+
+                for car, j in zip(cars, packs_perm):
+                    pack = undelivered[j]
+                    car_with_pack[car] = pack
+                    new_car_locs[car] = world.get_package_dest(pack)
+                    new_delivered |= 1 << pack
+                    new_g += pickup_costs[car][j] + package_costs[j]
+                    new_undelivered_cost -= package_costs[j]
+                new_state = State(world, tuple(new_car_locs), new_delivered,
+                                  new_g, state, tuple(car_with_pack),
+                                  new_undelivered_cost)
+                successors.append(new_state)
+    return successors
+
+
+def state_transition_symmetric(state):
+    """
+    Like state_transition, but cars that are at the same location are treated
+    as interchangeable, so only one representative successor is generated for
+    each group of equivalent successors. Within each group of co-located
+    cars, only the lowest-indexed cars are ever chosen to move, and they are
+    assigned packages in increasing order of package index. Every successor of
+    state_transition is equal, up to a permutation of the cars, to one of the
+    successors returned here.
 
-                for j in range(0, i):
-                    car_with_pack[cars[j]] = packs_perm[j]
-                    new_car_locs[cars[j]].append(
-                        world.get_package_source(car_with_pack[cars[j]]))
-                    new_car_locs[cars[j]].append(
-                        world.get_package_dest(car_with_pack[cars[j]]))
-                    # Update the values of the list state.get_packages()
-                    # for the new state.
-                    if car_with_pack[cars[j]] != -1:
-                        new_packages[car_with_pack[cars[j]]] = True
-                        new_g += world.get_edge_cost(
-                            state.get_car_loc(cars[j]),
-                            world.get_package_source(packs_perm[j]))
-                        new_g += world.get_package_cost(packs_perm[j])
-                new_state = State(world, new_car_locs, new_packages, new_g)
+    :param state: the state for which the successors should be found
+    :rtype: list(State)
+    """
+    world = state.get_world()
+    if state.all_packages_delivered():
+        return state_transition(state)
+    successors = []
+    number_of_cars = world.get_number_of_cars()
+    car_locs = state.get_car_locs()
+    delivered = state.get_delivered()
+    # For each car, the previous car at the same location, or -1 if none.
+    prev_same = [-1] * number_of_cars
+    last_at = {}
+    for car, loc in enumerate(car_locs):
+        prev_same[car] = last_at.get(loc, -1)
+        last_at[loc] = car
+    undelivered = [pack for pack in range(world.get_number_of_packages())
+                   if not delivered >> pack & 1]
+    undelivered_cost = state.sum_of_package_cost_h()
+    # See state_transition.
+    pickup_costs = world.get_pickup_costs(car_locs, undelivered)
+    package_costs = [world.get_package_cost(pack) for pack in undelivered]
+    positions = list(range(len(undelivered)))
+    for i in range(1, number_of_cars + 1):
+        for cars in combinations(number_of_cars, i):
+            if any(prev_same[car] != -1 and prev_same[car] not in cars
+                   for car in cars):
+                continue  # A lower-indexed co-located car is left behind.
+            for packs in _symmetric_assignments(cars, prev_same, positions):
+                car_with_pack = [-1] * number_of_cars
+                new_car_locs = list(car_locs)
+                new_delivered = delivered
+                new_g = state.get_g()
+                new_undelivered_cost = undelivered_cost
+                for car, j in zip(cars, packs):
+                    pack = undelivered[j]
+                    car_with_pack[car] = pack
+                    new_car_locs[car] = world.get_package_dest(pack)
+                    new_delivered |= 1 << pack
+                    new_g += pickup_costs[car][j] + package_costs[j]
+                    new_undelivered_cost -= package_costs[j]
+                new_state = State(world, tuple(new_car_locs), new_delivered,
+                                  new_g, state, tuple(car_with_pack),
+                                  new_undelivered_cost)
                 successors.append(new_state)
     return successors
 
 
+def _symmetric_assignments(cars, prev_same, packages):
+    """
+    Returns a generator of all assignments of distinct packages to the given
+    cars (one package per car, in the order of 'cars'), such that each car is
+    assigned a higher package index than the previous co-located car.
+
+    :param cars: the (increasing) indices of the cars to assign packages to
+    :type cars: list(int)
+    :param prev_same: for each car, the previous car at the same location, or
+        -1 if there is none
+    :type prev_same: list(int)
+    :param packages: the (increasing) indices of the packages to assign
+    :type packages: list(int)
+    :rtype: generator(list(int))
+    """
+    if not cars:
+        yield []
+        return
+    for packs in _symmetric_assignments(cars[:-1], prev_same, packages):
+        car = cars[-1]
+        lowest = -1
+        if prev_same[car] != -1:
+            lowest = packs[cars.index(prev_same[car])]
+        for pack in packages:
+            if pack > lowest and pack not in packs:
+                yield packs + [pack]
+
+
 def is_goal(state):
     """
     Returns whether or not the given state is a goal state. A goal state has
@@ -263,6 +470,31 @@ def is_goal(state):
     return state.all_packages_delivered()
 
 
+def state_key(state):
+    """
+    Returns the canonical key of the given state, for use by search algorithms
+    that detect duplicate states.
+
+    :param state: the state for which to get the key
+    :type state: X, where X is a state type
+    :rtype: hashable
+    """
+    return state.get_key()
+
+
+def symmetric_state_key(state):
+    """
+    Returns the canonical key of the given state that ignores which car is
+    where, for use by search algorithms that detect duplicate states when the
+    cars are treated as interchangeable.
+
+    :param state: the state for which to get the key
+    :type state: X, where X is a state type
+    :rtype: hashable
+    """
+    return state.get_symmetric_key()
+
+
 def decorating_f(h):
     """
     Returns a function that takes a state, x, of type X, and returns
@@ -291,20 +523,24 @@ def recreate_paths(state):
     """
     all_paths = []
     world = state.get_world()
-    for car_stack in state.get_car_locs():
-        if len(car_stack) == 1:  # Car is still at garage.
-            this_path = [car_stack.pop()]
-        else:
-            loc = car_stack.pop()
-            this_path = []
-            while car_stack:  # Means "while car_stack is not empty".
-                prev = car_stack.pop()
-                if prev != loc:
-                    if this_path:  # Means "if this_path is not empty".
-                        this_path.pop()  # Remove last item; it's duplicated.
+    # In the vanilla state space, cars only ever move along a single edge of
+    # the original map, so their recorded locations already form a path.
+    moves_are_edges = isinstance(state, VanillaState)
+    for car in range(world.get_number_of_cars()):
+        # Walk the car's path backwards, from its current location.
+        car_path = state.get_car_path(car)
+        loc = car_path.pop()
+        this_path = [loc]
+        while car_path:  # Means "while car_path is not empty".
+            prev = car_path.pop()
+            if prev != loc:
+                if moves_are_edges:
+                    this_path.append(prev)
+                else:
+                    this_path.pop()  # Remove last item; it's duplicated.
                     this_path.extend(world.get_shortest_path(loc, prev))
-                loc = prev
-            this_path.reverse()
+            loc = prev
+        this_path.reverse()
         all_paths.append(this_path)
     return all_paths
 
@@ -314,18 +550,22 @@ class VanillaState(State):
         A VanillaState simply represents a state in the vanilla state space.
         """
 
-    def __init__(self, world, car_locs, packages, cost_so_far, held):
+    __slots__ = ('_held',)
+
+    def __init__(self, world, car_locs, delivered, cost_so_far, held,
+                 parent=None):
         """
         :param world: see State constructor
         :param car_locs: see State constructor
-        :param packages: see State constructor
+        :param delivered: see State constructor
         :param cost_so_far: see State constructor
-        :param held: a list of indices of the package each car is holding, or
-            -1 for any car that is not holding a package
-        :type held: list(int)
+        :param held: the index of the package each car is holding, or -1 for
+            any car that is not holding a package
+        :type held: tuple(int)
+        :param parent: see State constructor
         """
-        super(VanillaState, self).__init__(world, car_locs, packages,
-                                           cost_so_far)
+        super(VanillaState, self).__init__(world, car_locs, delivered,
+                                           cost_so_far, parent)
         self._held = held
 
     def __eq__(self, other):
@@ -342,19 +582,37 @@ class VanillaState(State):
         :type other: VanillaState
         :rtype: bool
         """
-        other_cars = other.get_car_locs()
-        for i, car in enumerate(self._car_locs):
-            if car[len(car) - 1] != other_cars[i][len(other_cars[i]) - 1]:
-                return False
-        other_packs = other.get_packages()
-        for i, pack in enumerate(self._packages):
-            if pack != other_packs[i]:
-                return False
-        other_held = other.get_held()
-        for i, held in enumerate(self._held):
-            if held != other_held[i]:
-                return False
-        return True
+        return self.get_key() == other.get_key()
+
+    def __hash__(self):
+        """
+        Hashes the state by its canonical key, so that equal states have equal
+        hashes.
+
+        :rtype: int
+        """
+        return hash(self.get_key())
+
+    def get_key(self):
+        """
+        Returns a canonical, hashable key for this state, made up of the
+        *current* location of each car, the bitmask of delivered packages, and
+        the package held by each car. Two states have the same key if, and
+        only if, they are equal.
+
+        :rtype: (tuple(int), int, tuple(int))
+        """
+        return self._car_locs, self._delivered, self._held
+
+    def get_symmetric_key(self):
+        """
+        Returns a canonical, hashable key for this state that ignores which
+        car is where; see State.get_symmetric_key. Each car's location is kept
+        together with the package it holds.
+
+        :rtype: (tuple((int, int)), int)
+        """
+        return tuple(sorted(zip(self._car_locs, self._held))), self._delivered
 
     def get_cars_in_garage(self):
         """
@@ -362,15 +620,15 @@ class VanillaState(State):
 
         :rtype: list(int)
         """
-        return [i for i, car in enumerate(self._car_locs) if car[len(car) - 1]
-                == self._world.get_garage()]
+        return [i for i, loc in enumerate(self._car_locs)
+                if loc == self._world.get_garage()]
 
     def get_held(self):
         """
-        Returns a list of indices of the package each car is holding, or -1
-        for any car that is not holding a package.
+        Returns the index of the package each car is holding, or -1 for any
+        car that is not holding a package.
 
-        :rtype: list(int)
+        :rtype: tuple(int)
         """
         return self._held
 
@@ -382,7 +640,7 @@ class VanillaState(State):
         :rtype: int
         """
         world = self._world
-        if self._packages[k]:  # If package k is delivered.
+        if self._delivered >> k & 1:  # If package k is delivered.
             return world.get_package_dest(k)
         else:
             for i, held in enumerate(self._held):
@@ -404,8 +662,8 @@ class VanillaState(State):
         """
         cost = 0
         world = self._world
-        for i, pack in enumerate(self._packages):
-            if not pack:  # If package i is not delivered.
+        for i in range(world.get_number_of_packages()):
+            if not self._delivered >> i & 1:  # If package i is not delivered.
                 loc = self.get_package_loc(i)
                 cost += world.get_cheapest_edge(loc)
                 # Is this package more than one edge away from its destination?
@@ -429,7 +687,7 @@ class VanillaState(State):
         """
         base_cost = self.sum_of_estimated_cost_h()
         num_delivered = self.get_num_delivered()
-        reduction_val = 1.0 / float(len(self._packages))
+        reduction_val = 1.0 / float(self._world.get_number_of_packages())
         scalar = 1 - (num_delivered * reduction_val)
         return base_cost * scalar
 
@@ -446,12 +704,11 @@ def recursive_neighbour_generator(number_of_cars, i, car_locs, world,
         while True:
             result = next(next_car)
             if not result:  # If result is empty.
-                yield [car_locs[i][len(car_locs[i]) - 1]]
+                yield [car_locs[i]]
                 break
-            yield [car_locs[i][len(car_locs[i]) - 1]] + result
+            yield [car_locs[i]] + result
     else:
-        adjacency = dict(
-            world.get_full_map()[car_locs[i][len(car_locs[i]) - 1]])
+        adjacency = dict(world.get_full_map()[car_locs[i]])
         while len(adjacency) != 0:
             next_neighbour = adjacency.popitem()
             next_car = recursive_neighbour_generator(number_of_cars, i + 1,
@@ -475,10 +732,8 @@ def state_transition_vanilla(state):
                 number_of_cars, 0, state.get_car_locs(), world,
                 ignore=state.get_cars_in_garage()):
             if combo and len(combo) == number_of_cars:
-                new_car_locs = [[world.get_garage()]] * number_of_cars
+                new_car_locs = list(state.get_car_locs())
                 new_g = state.get_g()
-                for n in range(number_of_cars):
-                    new_car_locs[n] = copy.deepcopy(state.get_car_path(n))
                 for i in range(number_of_cars):
                     if state.get_car_loc(i) != world.get_garage():
                         start = state.get_car_loc(i)
@@ -490,11 +745,11 @@ def state_transition_vanilla(state):
                             if edge[0] == start and edge[1] == end:
                                 new_g += edge[2]
                                 break
-                        new_car_locs[i].append(combo[i])
+                        new_car_locs[i] = combo[i]
 
-                new_state = VanillaState(world, new_car_locs,
-                                         state.get_packages(),
-                                         new_g, state.get_held())
+                new_state = VanillaState(world, tuple(new_car_locs),
+                                         state.get_delivered(), new_g,
+                                         state.get_held(), state)
                 if new_state != state:
                     successors.append(new_state)
 
@@ -506,12 +761,11 @@ def state_transition_vanilla(state):
                                                        state.get_car_locs(),
                                                        world, ignore=cars):
                 if combo and len(combo) == number_of_cars:
-                    new_car_locs = [[world.get_garage()]] * number_of_cars
+                    new_car_locs = list(state.get_car_locs())
                     new_g = state.get_g()
-                    for n in range(number_of_cars):
-                        new_car_locs[n] = copy.deepcopy(state.get_car_path(n))
-                    new_packages = copy.deepcopy(current_packages)
-                    new_held = copy.deepcopy(state.get_held())
+                    new_packages = list(current_packages)
+                    new_delivered = state.get_delivered()
+                    new_held = list(state.get_held())
                     for j in range(number_of_cars):
                         start = state.get_car_loc(j)
                         end = combo[j]
@@ -522,12 +776,13 @@ def state_transition_vanilla(state):
                             if edge[0] == start and edge[1] == end:
                                 new_g += edge[2]
                                 break
-                        new_car_locs[j].append(combo[j])
+                        new_car_locs[j] = combo[j]
                         # Detect if we dropped off a package after moving.
                         if new_held[j] != -1:
                             held_package = new_held[j]
                             if world.get_package_dest(held_package) == end:
                                 new_packages[held_package] = True
+                                new_delivered |= 1 << held_package
                                 new_held[j] = -1
                     # Make permutations of picking up packages.
                     impossible_pickups = [False] * len(new_packages)
@@ -542,37 +797,37 @@ def state_transition_vanilla(state):
                             possible_count -= 1
                     # Impossible_pickups now contains all the packages to
                     # exclude from the permutation.
+                    new_car_locs = tuple(new_car_locs)
                     new_state = VanillaState(world, new_car_locs,
-                                             new_packages, new_g, new_held)
+                                             new_delivered, new_g,
+                                             tuple(new_held), state)
                     if new_state != state:
                         successors.append(new_state)
                     for j in range(1, possible_count):
-                        possible_held = copy.deepcopy(new_held)
+                        possible_held = list(new_held)
                         for packs_perm in permutations_exclude(
                                 possible_count, j, exclude=impossible_pickups):
                             for pack in packs_perm:
                                 for n in range(len(new_car_locs)):
                                     if possible_held[n] == -1 and \
-                                                    new_car_locs[n][len(
-                                                        new_car_locs[n]) - 1] \
-                                                    == world.get_package_source(
-                                                pack):
+                                            new_car_locs[n] == \
+                                            world.get_package_source(pack):
                                         possible_held[n] = pack
                                         break
                                 new_state = VanillaState(world, new_car_locs,
-                                                         new_packages, new_g,
-                                                         possible_held)
+                                                         new_delivered, new_g,
+                                                         tuple(possible_held),
+                                                         state)
                                 if new_state != state:
                                     successors.append(new_state)
     for combo in recursive_neighbour_generator(number_of_cars, 0,
                                                state.get_car_locs(), world):
         if combo and len(combo) == number_of_cars:
-            new_car_locs = [[world.get_garage()]] * number_of_cars
+            new_car_locs = list(state.get_car_locs())
             new_g = state.get_g()
-            for n in range(number_of_cars):
-                new_car_locs[n] = copy.deepcopy(state.get_car_path(n))
-            new_packages = copy.deepcopy(current_packages)
-            new_held = copy.deepcopy(state.get_held())
+            new_packages = list(current_packages)
+            new_delivered = state.get_delivered()
+            new_held = list(state.get_held())
             for i in range(number_of_cars):
                 start = state.get_car_loc(i)
                 end = combo[i]
@@ -582,12 +837,13 @@ def state_transition_vanilla(state):
                     if edge[0] == start and edge[1] == end:
                         new_g += edge[2]
                         break
-                new_car_locs[i].append(combo[i])
+                new_car_locs[i] = combo[i]
                 # Detect if we dropped off a package after moving.
                 if new_held[i] != -1:
                     held_package = new_held[i]
                     if world.get_package_dest(held_package) == end:
                         new_packages[held_package] = True
+                        new_delivered |= 1 << held_package
                         new_held[i] = -1
             # Make permutations of picking up packages.
             impossible_pickups = [False] * len(new_packages)
@@ -602,26 +858,25 @@ def state_transition_vanilla(state):
                     possible_count -= 1
             # Impossible_pickups now contains all the packages to exclude from
             # the permutation.
-            new_state = VanillaState(world, new_car_locs,
-                                     new_packages, new_g, new_held)
+            new_car_locs = tuple(new_car_locs)
+            new_state = VanillaState(world, new_car_locs, new_delivered,
+                                     new_g, tuple(new_held), state)
             if new_state != state:
                 successors.append(new_state)
             for j in range(1, possible_count):
-                possible_held = copy.deepcopy(new_held)
+                possible_held = list(new_held)
                 for packs_perm in permutations_exclude(
                         possible_count, j, exclude=impossible_pickups):
                     for pack in packs_perm:
                         for n in range(len(new_car_locs)):
                             if possible_held[n] == -1 and \
-                                            new_car_locs[n][len(
-                                                new_car_locs[n]) - 1] \
-                                            == world.get_package_source(
-                                        pack):
+                                    new_car_locs[n] == \
+                                    world.get_package_source(pack):
                                 possible_held[n] = pack
                                 break
                         new_state = VanillaState(world, new_car_locs,
-                                                 new_packages, new_g,
-                                                 possible_held)
+                                                 new_delivered, new_g,
+                                                 tuple(possible_held), state)
                         if new_state != state:
                             successors.append(new_state)
     return successors
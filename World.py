@@ -1,5 +1,9 @@
-import networkx as nx
+from math import inf
 from graphs import generate_random_package_routes
+import timing
+
+# All available engines for computing shortest paths when processing the map.
+pre_processing_engines = ['dijkstra', 'floyd_warshall']
 
 
 class World:
@@ -32,9 +36,18 @@ class World:
         self._K = k  # ... but internally, the true parameters can all be...
         self._M = m  # ... uppercase, just like in the problem description.
         self._full_map = full_map
-        self._all_pairs_shortest_paths = nx.all_pairs_shortest_path(full_map)
         self._reduced_map = None
-        self._reduced_map_as_dict = None
+        self._vertex_ids = None
+        self._distances = None
+        self._distances_list = None
+        self._package_sources = None
+        self._package_dests = None
+        self._package_costs = None
+        self._package_costs_list = None
+        self._predecessors = None
+        self._shortest_paths_time = None
+        self._pre_processing_time = None
+        self._loaded_from_cache = False
         if source_dest_pairs is None:
             self._source_dest_pairs = generate_random_package_routes(k, m)
         else:
@@ -98,6 +111,23 @@ class World:
         """
         return self._N
 
+    def get_number_of_packages(self):
+        """
+        Returns the total number of packages.
+
+        :rtype: int
+        """
+        return len(self._source_dest_pairs)
+
+    def get_all_packages_mask(self):
+        """
+        Returns the bitmask with one bit set for each package, which is the
+        bitmask of delivered packages once all packages have been delivered.
+
+        :rtype: int
+        """
+        return (1 << len(self._source_dest_pairs)) - 1
+
     def get_important_vertices(self):
         """
         Returns a list of the important vertices of the original map. These
@@ -141,27 +171,157 @@ class World:
         _, dest = self._source_dest_pairs[pkg_id]
         return dest
 
-    def process_map(self):
+    def process_map(self, engine='dijkstra', cache_dir=None):
         """
         Processes the full map into a reduced map containing only the important
         vertices of the original map. Makes the reduced map a complete graph,
         where each vertex is connected to each other vertex by an edge weighted
         according to the cost of the shortest (i.e. lowest cost) path between
-        them.
+        them. The shortest-path tree rooted at each important vertex is kept
+        (as the predecessor of each vertex in the tree), so that the shortest
+        paths themselves can be reconstructed on demand.
+
+        Internally, the important vertices are given dense ids, from 0 to
+        I - 1 for I important vertices, in the order of
+        get_important_vertices. The reduced map is stored as an I x I NumPy
+        array of costs, the shortest-path trees as an I x M NumPy array of
+        predecessors (-1 for the root of each tree, and for unreachable
+        vertices), and the source, destination and cost of each package as
+        NumPy arrays indexed by package.
+
+        If a cache directory is given, the distance and predecessor arrays
+        are looked up there by a hash of the full map and the packages (see
+        worldcache.get_instance_hash). On a hit, no shortest paths are
+        computed: the arrays are memory-mapped from disk. On a miss, they are
+        computed and then written to the cache.
+
+        :param engine: how to compute the shortest paths; one of
+            pre_processing_engines. 'dijkstra' runs single-source Dijkstra
+            from each important vertex only, which takes O(I * E log M) time
+            and O(M) additional memory for I important vertices;
+            'floyd_warshall' computes all pairs of shortest paths in the full
+            map, which takes O(M^3) time and O(M^2) memory. Default:
+            'dijkstra'.
+        :type engine: string
+        :param cache_dir: the directory of the on-disk cache of processed
+            maps, or None to always process the map. Default: None.
+        :type cache_dir: string
+        """
+        import numpy as np
+
+        timing.start_timer('pre_processing')
+        important = self.get_important_vertices()
+        self._vertex_ids = dict((v, i) for i, v in enumerate(important))
+
+        cached = None
+        if cache_dir is not None:
+            import worldcache
+
+            instance_hash = worldcache.get_instance_hash(
+                self._full_map, self._source_dest_pairs, self._G)
+            cached = worldcache.load_arrays(cache_dir, instance_hash)
+        if cached is not None and \
+                cached['important_vertices'].tolist() == important:
+            distances = cached['distances']
+            predecessors = cached['predecessors']
+            self._shortest_paths_time = 0.0
+            self._loaded_from_cache = True
+        else:
+            distances, predecessors = timing.timed(
+                'shortest_paths', self._compute_shortest_paths)(engine)
+            self._loaded_from_cache = False
+            if cache_dir is not None:
+                worldcache.save_arrays(cache_dir, instance_hash, {
+                    'important_vertices': np.array(important, dtype=np.int64),
+                    'distances': distances,
+                    'predecessors': predecessors
+                })
+
+        self._distances = distances
+        self._distances_list = distances.tolist()
+        self._predecessors = predecessors
+        self._reduced_map = None  # Built from the distances if requested.
+
+        # Tabulate the packages.
+        ids = self._vertex_ids
+        self._package_sources = np.array(
+            [ids[src] for src, _ in self._source_dest_pairs], dtype=np.int64)
+        self._package_dests = np.array(
+            [ids[dest] for _, dest in self._source_dest_pairs],
+            dtype=np.int64)
+        self._package_costs = distances[self._package_sources,
+                                        self._package_dests]
+        self._package_costs_list = self._package_costs.tolist()
+        self._pre_processing_time = timing.end_timer('pre_processing')
+
+    def _compute_shortest_paths(self, engine):
         """
-        # Compute all pairs of paths and their cost.
-        paths = nx.floyd_warshall(self._full_map)
+        Computes the shortest paths from each important vertex using the
+        given engine (see process_map), and returns the I x I array of their
+        costs, and the I x M array of predecessors in each shortest-path tree.
+        The process execution time taken is recorded.
 
-        # Create the complete reduced map.
-        self.get_important_vertices()
-        self._reduced_map = nx.Graph()
-        self._reduced_map.add_nodes_from(self._important_vertices)
-        for i in self._important_vertices:
-            for k, v in paths[i].items():
-                if k in self._important_vertices:
-                    self._reduced_map.add_edge(i, k, weight=v)
+        :param engine: one of pre_processing_engines
+        :type engine: string
+        :rtype: numpy.ndarray, numpy.ndarray
+        """
+        import networkx as nx
+        import numpy as np
+
+        important = self._important_vertices
+        num_vertices = self._full_map.number_of_nodes()
+        timing.start_timer('shortest_paths')
+        distances = np.full((len(important), len(important)), inf)
+        predecessors = np.full((len(important), num_vertices), -1,
+                               dtype=np.int64)
+        if engine == 'floyd_warshall':
+            preds, paths = nx.floyd_warshall_predecessor_and_distance(
+                self._full_map)
+            all_preds = [(preds[v], paths[v]) for v in important]
+        elif engine == 'dijkstra':
+            all_preds = []
+            for v in important:
+                preds, costs_from_v = nx.dijkstra_predecessor_and_distance(
+                    self._full_map, v)
+                preds = dict((u, p[0]) for u, p in preds.items() if p)
+                all_preds.append((preds, costs_from_v))
+        else:
+            raise ValueError("unknown pre-processing engine: " + str(engine))
+        for i, (preds, costs_from_i) in enumerate(all_preds):
+            for j, u in enumerate(important):
+                distances[i, j] = costs_from_i.get(u, inf)
+            for u, p in preds.items():
+                predecessors[i, u] = p
+        self._shortest_paths_time = timing.end_timer('shortest_paths')
+        return distances, predecessors
 
-        self._reduced_map_as_dict = nx.to_dict_of_dicts(self._reduced_map)
+    def get_shortest_paths_time(self):
+        """
+        Returns the process execution time taken to compute the shortest paths
+        during the last call to process_map, or None if the map has not been
+        processed.
+
+        :rtype: float
+        """
+        return self._shortest_paths_time
+
+    def get_pre_processing_time(self):
+        """
+        Returns the process execution time taken by the last call to
+        process_map, or None if the map has not been processed.
+
+        :rtype: float
+        """
+        return self._pre_processing_time
+
+    def was_loaded_from_cache(self):
+        """
+        Returns whether the processed map was loaded from the on-disk cache
+        during the last call to process_map, instead of being computed.
+
+        :rtype: bool
+        """
+        return self._loaded_from_cache
 
     def get_edge_cost(self, location, goal):
         """
@@ -172,9 +332,10 @@ class World:
         :param goal: the destination vertex
         :rtype: float
         """
-        if self._reduced_map is None:
+        if self._distances is None:
             self.process_map()
-        return self._reduced_map_as_dict[location][goal]['weight']
+        ids = self._vertex_ids
+        return self._distances_list[ids[location]][ids[goal]]
 
     def get_reduced_map(self):
         """
@@ -182,19 +343,123 @@ class World:
 
         :rtype: NetworkX Graph
         """
-        if self._reduced_map is None:
+        if self._distances is None:
             self.process_map()
+        if self._reduced_map is None:
+            import networkx as nx
+
+            important = self._important_vertices
+            self._reduced_map = nx.Graph()
+            self._reduced_map.add_nodes_from(important)
+            for i, v in enumerate(important):
+                for j, u in enumerate(important):
+                    self._reduced_map.add_edge(
+                        v, u, weight=self._distances_list[i][j])
         return self._reduced_map
 
+    def get_vertex_id(self, vertex):
+        """
+        Returns the dense id (from 0 to I - 1, for I important vertices) of
+        the given important vertex. The map is processed if needed.
+
+        :param vertex: an important vertex of the original map
+        :type vertex: int
+        :rtype: int
+        """
+        if self._vertex_ids is None:
+            self.process_map()
+        return self._vertex_ids[vertex]
+
+    def get_distance_matrix(self):
+        """
+        Returns the I x I array of the costs of the shortest paths between the
+        important vertices, indexed by dense vertex id. The map is processed
+        if needed.
+
+        :rtype: numpy.ndarray
+        """
+        if self._distances is None:
+            self.process_map()
+        return self._distances
+
+    def get_package_arrays(self):
+        """
+        Returns three arrays, indexed by package: the dense id of each
+        package's source, the dense id of each package's destination, and the
+        cost of each package (see get_package_cost). The map is processed if
+        needed.
+
+        :rtype: numpy.ndarray, numpy.ndarray, numpy.ndarray
+        """
+        if self._distances is None:
+            self.process_map()
+        return self._package_sources, self._package_dests, self._package_costs
+
+    def get_pickup_costs(self, locations, packages):
+        """
+        Returns a matrix of the cost of travelling from each of the given
+        locations to the source of each of the given packages, gathered from
+        the distance matrix in a single batch. The map is processed if needed.
+
+        :param locations: important vertices of the original map (e.g. the
+            current location of each car)
+        :type locations: list(int)
+        :param packages: package indices
+        :type packages: list(int)
+        :rtype: list(list(float)) (one row per location)
+        """
+        import numpy as np
+
+        if self._distances is None:
+            self.process_map()
+        ids = self._vertex_ids
+        rows = np.array([ids[loc] for loc in locations], dtype=np.int64)
+        columns = self._package_sources[np.array(packages, dtype=np.int64)]
+        return self._distances[np.ix_(rows, columns)].tolist()
+
     def get_shortest_path(self, source, dest):
         """
-        Returns the shortest path between any two vertices in the original map.
+        Returns the shortest (i.e. lowest cost) path between any two vertices
+        in the original map. If either vertex is an important vertex, the path
+        is reconstructed from the shortest-path tree rooted at that vertex,
+        which is computed by process_map (the map is processed if needed).
+        Otherwise, the path is computed with Dijkstra's algorithm.
 
         :param source: the source vertex
         :param dest: the destination vertex
         :rtype: list(int)
+        :raises networkx.NetworkXNoPath: if there is no path between the two
+            vertices
         """
-        return self._all_pairs_shortest_paths[source][dest]
+        import networkx as nx
+
+        if self._predecessors is None:
+            self.process_map()
+        ids = self._vertex_ids
+        if source in ids:
+            # Walk the tree rooted at 'source' from 'dest' back to 'source'.
+            tree = self._predecessors[ids[source]]
+            path = [dest]
+            while path[len(path) - 1] != source:
+                predecessor = int(tree[path[len(path) - 1]])
+                if predecessor < 0:  # Not in the tree: unreachable.
+                    raise nx.NetworkXNoPath("Node {} not reachable from {}"
+                                            .format(dest, source))
+                path.append(predecessor)
+            path.reverse()
+            return path
+        if dest in ids:
+            # Walk the tree rooted at 'dest' from 'source' up to 'dest'.
+            tree = self._predecessors[ids[dest]]
+            path = [source]
+            while path[len(path) - 1] != dest:
+                predecessor = int(tree[path[len(path) - 1]])
+                if predecessor < 0:  # Not in the tree: unreachable.
+                    raise nx.NetworkXNoPath("Node {} not reachable from {}"
+                                            .format(dest, source))
+                path.append(predecessor)
+            return path
+        return nx.dijkstra_path(self._full_map, source, dest)
 
     def get_package_cost(self, package):
         """
@@ -205,4 +470,6 @@ class World:
         :type package: int
         :rtype: float
         """
-        return self.get_edge_cost(*self._source_dest_pairs[package])
+        if self._package_costs_list is None:
+            self.process_map()
+        return self._package_costs_list[package]
@@ -1,8 +1,9 @@
-from queue import PriorityQueue
+from heapqueue import HeapQueue
 from math import *
 
 
-def a_star(initial_state, is_goal, trans_op, f):
+def a_star(initial_state, is_goal, trans_op, f, queue_type=HeapQueue,
+           key=None, stats=None):
     """
     A generic A* implementation for solving informed search problems. It
     is implemented as a generator, meaning that it yields the first
@@ -34,23 +35,52 @@ def a_star(initial_state, is_goal, trans_op, f):
         state to x, and h(x) is the estimated remaining cost from x to a
         goal state
     :type f: X => float, where X is any state type
+    :param queue_type: the class of the open list; e.g. HeapQueue or
+        queue.PriorityQueue. Default: HeapQueue.
+    :type queue_type: class
+    :param key: a function that takes a state, x, of type X, and returns a
+        hashable canonical key, such that two states share a key if, and only
+        if, they are the same state of the search space (regardless of how
+        they were reached). If given, duplicate states are detected: a state
+        is only placed in the open list if no state with the same key has
+        been reached with an equal or lower f-value, and it is reopened if a
+        cheaper path to it is found later. Since h(x) depends only on the
+        state itself, comparing the f-values of states sharing a key is
+        equivalent to comparing their g-values. Goal states are never
+        pruned, so that other solutions can still be generated. If None,
+        every generated state is kept. Default: None.
+    :type key: X => hashable, where X is any state type
+    :param stats: if given, a dictionary that is updated with search
+        statistics each time a solution is yielded, and when the search ends:
+        'expanded', the number of states pulled out of the open list and
+        expanded (or yielded); 'generated', the number of successor states
+        produced by the transition operator; 'duplicates_pruned', the number
+        of states discarded because a state with the same key was reached at
+        least as cheaply; 'peak_frontier', the largest size of the open list;
+        and 'branching_mean' and 'branching_max', the mean and the largest
+        number of successors of an expanded non-goal state. Default: None.
+    :type stats: dict
     :rtype: X (returns a goal state)
     """
-    for goal, _ in a_star_count_nodes(initial_state, is_goal, trans_op, f):
+    for goal, _ in a_star_count_nodes(initial_state, is_goal, trans_op, f,
+                                      queue_type, key, stats):
         yield goal
 
 
-def a_star_count_nodes(initial_state, is_goal, trans_op, f):
+def a_star_count_nodes(initial_state, is_goal, trans_op, f,
+                       queue_type=HeapQueue, key=None, stats=None):
     """
     Like a_star but also counts the number of expanded nodes (number of nodes
     pulled out of the priority queue).
 
     :rtype: X (a goal state), integral
     """
-    return bounded_a_star(initial_state, is_goal, trans_op, f, bound=0)
+    return bounded_a_star(initial_state, is_goal, trans_op, f, bound=0,
+                          queue_type=queue_type, key=key, stats=stats)
 
 
-def bounded_a_star(initial_state, is_goal, trans_op, f, bound):
+def bounded_a_star(initial_state, is_goal, trans_op, f, bound,
+                   queue_type=HeapQueue, key=None, stats=None):
     """
     Like a_star_count_nodes, but each time a state is expanded using the
     transition operator, the successor states are sorted according to their
@@ -67,32 +97,335 @@ def bounded_a_star(initial_state, is_goal, trans_op, f, bound):
         then interpreted as the maximum number of successors to keep; if 0
         (inclusive) or less, then keep all successors, like regular a_star.
     :type bound: int or float
+    :param queue_type: see a_star
+    :param key: see a_star; duplicates are pruned before the bound is
+        applied, and only the successors that are kept are recorded
+    :param stats: see a_star
     :rtype: X (a goal state), integral
     """
-    queue = PriorityQueue()
+    if stats is None:
+        stats = {}
+    queue = queue_type()
     counter = 0  # Needed to avoid priority queue trying to compare states.
-    queue.put((f(initial_state), counter, initial_state))
+    best_f = {}  # The lowest f-value reached so far for each state key.
+    duplicates = 0
+    f_value = f(initial_state)
+    if key is not None:
+        best_f[key(initial_state)] = f_value
+    queue.put((f_value, counter, initial_state))
     counter += 1
     expanded = 0
+    goals = 0  # Expanded goal states, which have no successors.
+    generated = 0
+    max_branching = 0
+    peak_frontier = 1
     while not queue.empty():
-        _, _, next_state = queue.get()
+        f_value, _, next_state = queue.get()
+        if key is not None and \
+                f_value > best_f.get(key(next_state), f_value):
+            duplicates += 1  # A cheaper path to this state was found since.
+            continue
         expanded += 1
         if is_goal(next_state):
+            goals += 1
+            record_stats(stats, expanded, generated, duplicates,
+                         peak_frontier, expanded - goals, max_branching)
             yield next_state, expanded
         else:
             successors = trans_op(next_state)
+            previously_generated = generated
             if bound > 0:
-                tmp_queue = PriorityQueue()
+                tmp_queue = queue_type()
                 for successor in successors:
-                    tmp_queue.put((f(successor), counter, successor))
+                    generated += 1
+                    f_value = f(successor)
+                    if key is not None and not is_goal(successor) and \
+                            f_value >= best_f.get(key(successor), inf):
+                        duplicates += 1
+                        continue
+                    tmp_queue.put((f_value, counter, successor))
                     counter += 1
                 if 0 < bound < 1:
                     num_to_keep = int(max(1, ceil(tmp_queue.qsize() * bound)))
                 else:
-                    num_to_keep = min(int(bound), tmp_queue.qsize())
-                for _ in range(num_to_keep):
-                    queue.put(tmp_queue.get())
+                    num_to_keep = int(bound)
+                for _ in range(min(num_to_keep, tmp_queue.qsize())):
+                    item = tmp_queue.get()
+                    if key is not None and not is_goal(item[2]):
+                        successor_key = key(item[2])
+                        if item[0] >= best_f.get(successor_key, inf):
+                            duplicates += 1  # Same state as a sibling.
+                            continue
+                        best_f[successor_key] = item[0]
+                    queue.put(item)
             else:
                 for successor in successors:
-                    queue.put((f(successor), counter, successor))
+                    generated += 1
+                    f_value = f(successor)
+                    if key is not None and not is_goal(successor):
+                        successor_key = key(successor)
+                        if f_value >= best_f.get(successor_key, inf):
+                            duplicates += 1
+                            continue
+                        best_f[successor_key] = f_value
+                    queue.put((f_value, counter, successor))
                     counter += 1
+            if generated - previously_generated > max_branching:
+                max_branching = generated - previously_generated
+            if queue.qsize() > peak_frontier:
+                peak_frontier = queue.qsize()
+    record_stats(stats, expanded, generated, duplicates, peak_frontier,
+                 expanded - goals, max_branching)
+
+
+def sma_star(initial_state, is_goal, trans_op, f, max_nodes,
+             queue_type=HeapQueue, key=None, stats=None):
+    """
+    A Simplified Memory-Bounded A* (SMA*) implementation, with the same
+    interface as bounded_a_star, but bounding the memory used rather than
+    the number of successors kept. The search tree is kept in memory, up to
+    'max_nodes' states. When it is full, the worst leaves (the highest
+    f-value, the shallowest first) are forgotten, and their f-values are
+    backed up to their parents: a state with forgotten successors is put
+    back in the open list with the lowest of their f-values, and, if it
+    becomes the best state, the forgotten successors with that f-value are
+    generated again, with that f-value. The f-value of a leaf whose
+    successors were all forgotten is, in turn, the lowest of theirs. Unlike
+    the bound of bounded_a_star, nothing is thrown away for good: the search is
+    complete, and, if h(x) is admissible, optimal, as long as 'max_nodes' is
+    larger than the number of moves of the solution. Successors are told
+    apart by their position in the list returned by the transition
+    operator, which must therefore always return the successors of a state
+    in the same order.
+
+    :param initial_state: see a_star
+    :param is_goal: see a_star
+    :param trans_op: see a_star
+    :param f: see a_star
+    :param max_nodes: the largest number of states kept in memory; states
+        'max_nodes' - 1 moves deep are never expanded, since the path to
+        them fills the memory
+    :type max_nodes: int
+    :param queue_type: see a_star
+    :param key: if given, a function giving the canonical key of a state
+        (see a_star), used to detect duplicates among the states in memory:
+        a successor is pruned, and counted in 'duplicates_pruned', if the
+        same state is in memory, reached at least as cheaply and in at most
+        as many moves (so that it is not cut off sooner by 'max_nodes'). A
+        pruned successor is not generated again, since the same state can
+        always be reached again through the one in memory, even once it is
+        forgotten. Like in a_star, goal states are never pruned. Default:
+        None.
+    :param stats: see a_star; here, 'peak_frontier' is the largest number
+        of states in the open list, and 'forgotten' is the number of states
+        that were forgotten to free memory
+    :rtype: X (a goal state), integral
+    """
+    if stats is None:
+        stats = {}
+    best_queue = queue_type()  # Open states by f-value, deepest first.
+    worst_queue = queue_type()  # Leaves by f-value, highest and shallowest
+    # first.
+    counter = 0  # Identifies the latest entry of each state in the queues.
+    num_open = 0
+    num_nodes = 1
+    forgotten = 0
+    duplicates = 0
+    expanded = 0
+    goals = 0
+    generated = 0
+    max_branching = 0
+    peak_frontier = 1
+    in_memory = {}  # The cheapest state in memory for each key.
+
+    def update(node):
+        # Puts the given node back in the open list, if it has successors
+        # left to generate, and among the leaves, if it has no successors in
+        # memory; its previous entries become stale.
+        nonlocal counter, num_open, peak_frontier
+        if node.entry is not None:
+            num_open -= 1
+        node.entry = None
+        if node.f == inf:
+            return
+        counter += 1
+        node.entry = counter
+        best_queue.put((node.f, -node.depth, counter, node))
+        if not node.children:
+            worst_queue.put((-node.f, node.depth, -counter, node))
+        num_open += 1
+        if num_open > peak_frontier:
+            peak_frontier = num_open
+
+    def pop(queue):
+        nonlocal num_open
+        while True:
+            _, _, entry, node = queue.get()
+            if node.entry == abs(entry):  # Otherwise, the entry is stale.
+                node.entry = None
+                num_open -= 1
+                return node
+
+    def remove(node):
+        # Removes the given leaf, which is not in the open list, from the
+        # tree, and backs up its f-value to its parent; the parent is
+        # removed too if all of its successors have been fully searched
+        # (i.e. backed up an infinite f-value).
+        nonlocal num_nodes
+        while True:
+            num_nodes -= 1
+            if key is not None and in_memory.get(node.key) is node:
+                del in_memory[node.key]
+            parent = node.parent
+            if parent is None:
+                return
+            del parent.children[node.index]
+            parent.forgotten[node.index] = node.f
+            if node.f < parent.f:
+                parent.f = node.f
+            if parent.children or parent.f < inf:
+                update(parent)
+                return
+            node = parent
+
+    root = _SMANode(initial_state, f(initial_state), f(initial_state), 0,
+                    None, None, None if key is None else key(initial_state))
+    if key is not None:
+        in_memory[root.key] = root
+    update(root)
+    while num_open:
+        node = pop(best_queue)
+        expanded += 1
+        if not node.generated and is_goal(node.state):
+            goals += 1
+            record_stats(stats, expanded, generated, duplicates,
+                         peak_frontier, expanded - goals, max_branching)
+            stats['forgotten'] = forgotten
+            yield node.state, expanded
+            node.f = inf  # Never yield the same goal again.
+            remove(node)
+            continue
+        if node.depth < max_nodes - 1:
+            successors = trans_op(node.state)
+            generated += len(successors)
+            if len(successors) > max_branching:
+                max_branching = len(successors)
+            if node.generated:  # Generate the best forgotten successors.
+                indices = [i for i, f_value in node.forgotten.items()
+                           if f_value == node.f]
+            else:
+                indices = range(len(successors))
+            for i in indices:
+                successor = successors[i]
+                f_value = f(successor)
+                successor_key = None
+                if key is not None:
+                    successor_key = key(successor)
+                    other = in_memory.get(successor_key)
+                    if other is not None and not is_goal(successor) and \
+                            other.own_f <= f_value and \
+                            other.depth <= node.depth + 1:
+                        duplicates += 1  # Reached at least as cheaply.
+                        node.forgotten[i] = inf
+                        continue
+                child = _SMANode(successor, max(f_value, node.f), f_value,
+                                 node.depth + 1, i, node, successor_key)
+                if key is not None and (other is None or
+                                        f_value < other.own_f):
+                    in_memory[successor_key] = child
+                node.forgotten.pop(i, None)
+                node.children[i] = child
+                num_nodes += 1
+                update(child)
+        node.generated = True
+        node.f = min(node.forgotten.values(), default=inf)
+        if not node.children and node.f == inf:
+            remove(node)  # A dead end, or too deep to go further.
+            continue
+        update(node)
+        while num_nodes > max_nodes:
+            leaf = pop(worst_queue)
+            forgotten += 1
+            remove(leaf)
+        if best_queue.qsize() + worst_queue.qsize() > 4 * max_nodes:
+            best_queue = _compact(best_queue, queue_type)  # Drop the stale
+            worst_queue = _compact(worst_queue, queue_type)  # entries.
+    record_stats(stats, expanded, generated, duplicates, peak_frontier,
+                 expanded - goals, max_branching)
+    stats['forgotten'] = forgotten
+
+
+class _SMANode:
+    """
+    A state in the search tree kept in memory by sma_star.
+    """
+    __slots__ = ('state', 'f', 'own_f', 'depth', 'index', 'parent', 'key',
+                 'children', 'forgotten', 'generated', 'entry')
+
+    def __init__(self, state, f_value, own_f, depth, index, parent,
+                 state_key):
+        """
+        :param state: the state
+        :param f_value: the f-value of the state in the open list: at first,
+            its own f-value, or a higher one backed up from the forgotten
+            successors of its parent; once its successors are generated, the
+            lowest f-value of its forgotten successors
+        :type f_value: float
+        :param own_f: f(state), the state's own f-value; since h(x) depends
+            only on the state, comparing the own f-values of two states
+            sharing a key compares their g-values (see a_star)
+        :type own_f: float
+        :param depth: the number of moves from the initial state
+        :type depth: int
+        :param index: the position of the state among its parent's
+            successors, or None for the initial state
+        :type index: int
+        :param parent: the node of the parent state, or None for the initial
+            state
+        :type parent: _SMANode
+        :param state_key: the canonical key of the state, or None
+        """
+        self.state = state
+        self.f = f_value
+        self.own_f = own_f
+        self.depth = depth
+        self.index = index
+        self.parent = parent
+        self.key = state_key
+        self.children = {}  # The successors in memory, by index.
+        self.forgotten = {}  # The f-values of those forgotten, by index;
+        # infinite for those fully searched.
+        self.generated = False  # Whether the successors were ever generated.
+        self.entry = None  # The latest entry in the queues, if open.
+
+
+def _compact(queue, queue_type):
+    """
+    Returns a new queue holding only the entries of the given queue (of
+    sma_star's states) that are not stale.
+    """
+    compacted = queue_type()
+    while not queue.empty():
+        item = queue.get()
+        if item[3].entry == abs(item[2]):
+            compacted.put(item)
+    return compacted
+
+
+def record_stats(stats, expanded, generated, duplicates, peak_frontier,
+                 branched, max_branching):
+    """
+    Updates the given dictionary with the search statistics described in
+    a_star, given the counts collected by a search.
+
+    :param branched: the number of expanded states whose successors were
+        generated
+    :type branched: int
+    """
+    stats['expanded'] = expanded
+    stats['generated'] = generated
+    stats['duplicates_pruned'] = duplicates
+    stats['peak_frontier'] = peak_frontier
+    stats['branching_mean'] = round(generated / branched, 4) if branched \
+        else 0.0
+    stats['branching_max'] = max_branching
@@ -0,0 +1,332 @@
+import timing
+import utils
+
+# The file in which the baseline results are stored, by default.
+default_baseline = "benchmark_baseline.json"
+
+
+def get_sample_states(initial, trans_op, num_states):
+    """
+    Returns up to 'num_states' states reachable from the given initial state,
+    in breadth-first order, starting with the initial state itself. The
+    order is deterministic, so that every run benchmarks the same states.
+
+    :rtype: list(X), where X is the type of the initial state
+    """
+    states = [initial]
+    i = 0
+    while len(states) < num_states and i < len(states):
+        states.extend(trans_op(states[i])[:num_states - len(states)])
+        i += 1
+    return states
+
+
+def get_benchmarks(n, k, m, seed, num_states):
+    """
+    Returns the benchmarks, as a list of (name, operation) pairs, in the
+    order in which they are run. Each operation takes no arguments, runs the
+    benchmarked code over a fixed, seeded instance with n cars, k packages
+    and m locations, and returns the number of operations it performed
+    (e.g. the number of states it generated the successors of), so that the
+    throughput can be reported in operations per second.
+
+    :param n: the number of cars
+    :type n: int
+    :param k: the number of packages
+    :type k: int
+    :param m: the number of locations
+    :type m: int
+    :param seed: the seed of the random instance
+    :type seed: int
+    :param num_states: the number of states that the transition operators
+        and the heuristics are benchmarked on
+    :type num_states: int
+    :rtype: list((string, () => int))
+    """
+    from astar import a_star_count_nodes, bounded_a_star
+    from localbeam import local_beam_search
+    from graphs import get_random_graph
+    from Main import heuristics, defaults
+    from search import _create_problem_representation
+    from simulation import get_random_instance
+    from State import is_goal, decorating_f, state_key, state_transition, \
+        state_transition_vanilla
+    from World import World
+
+    full_map, pairs = get_random_instance(k, m, seed)
+    initial, trans_op, _ = _create_problem_representation(
+        n, k, m, full_map, pairs, 'State')
+    vanilla_initial, _, _ = _create_problem_representation(
+        n, k, m, full_map, pairs, 'VanillaState', world=initial.get_world())
+    states = get_sample_states(initial, state_transition, num_states)
+    vanilla_states = get_sample_states(vanilla_initial,
+                                       state_transition_vanilla, num_states)
+    sample_states = {'State': states, 'VanillaState': vanilla_states}
+    f = decorating_f(heuristics[defaults['h_name']]['State'])
+
+    def transitions(transition, states):
+        def operation():
+            for state in states:
+                transition(state)
+            return len(states)
+
+        return operation
+
+    def heuristic(h, states):
+        def operation():
+            for state in states:
+                h(state)
+            return len(states)
+
+        return operation
+
+    def process_map():
+        World(n, k, m, full_map, pairs).process_map()
+        return 1
+
+    def random_graph():
+        get_random_graph(k, m, seed)
+        return 1
+
+    def search(algorithm, *args, **kwargs):
+        def operation():
+            next(algorithm(initial, is_goal, state_transition, f, *args,
+                           **kwargs))
+            return 1
+
+        return operation
+
+    benchmarks = [
+        ('state_transition', transitions(state_transition, states)),
+        ('state_transition_vanilla',
+         transitions(state_transition_vanilla, vanilla_states))
+    ]
+    for h_name in sorted(heuristics):
+        for state_type in sorted(heuristics[h_name]):
+            benchmarks.append((
+                'heuristic.' + h_name + '.' + state_type,
+                heuristic(heuristics[h_name][state_type],
+                          sample_states[state_type])))
+    benchmarks += [
+        ('process_map', process_map),
+        ('get_random_graph', random_graph),
+        ('a_star', search(a_star_count_nodes, key=state_key)),
+        ('bounded_a_star', search(bounded_a_star, defaults['bound'],
+                                  key=state_key)),
+        ('local_beam', search(local_beam_search, defaults['k_limit']))
+    ]
+    return benchmarks
+
+
+def calibrate(operation, min_time):
+    """
+    Returns the number of consecutive calls to the given operation that
+    take at least 'min_time' seconds of process time, so that even very fast
+    operations are timed accurately.
+
+    :param operation: see get_benchmarks
+    :type operation: () => int
+    :param min_time: the minimum process time of each measurement, in
+        seconds
+    :type min_time: float
+    :rtype: int
+    """
+    number = 1
+    _, elapsed = _time_calls(operation, number)
+    while elapsed < min_time:
+        number *= 2 if elapsed <= 0 else \
+            max(2, int(min_time / elapsed * 1.2))
+        _, elapsed = _time_calls(operation, number)
+    return number
+
+
+def _time_calls(operation, number):
+    """
+    Calls the given operation 'number' times, and returns the total number
+    of operations it performed, and the process time taken, in seconds.
+
+    :rtype: int, float
+    """
+    ops = 0
+    timing.start_timer('benchmark')
+    for _ in range(number):
+        ops += operation()
+    return ops, timing.end_timer('benchmark')
+
+
+def run_benchmarks(instance, names=None, min_time=0.2, repeats=5):
+    """
+    Runs the benchmarks on the given instance, and returns the throughput of
+    each, in operations per second, keyed by benchmark name. Each benchmark
+    is measured 'repeats' times, and the best measurement is kept. The
+    measurements of the different benchmarks are interleaved, so that a
+    temporary slowdown of the machine affects at most one measurement of
+    each benchmark, rather than all the measurements of a few.
+
+    :param instance: the parameters of get_benchmarks, by name
+    :type instance: dict
+    :param names: if given, only the benchmarks whose names contain one of
+        these strings are run. Default: None.
+    :type names: list(string)
+    :param min_time: the minimum process time of each measurement, in
+        seconds; see calibrate. Default: 0.2.
+    :type min_time: float
+    :param repeats: the number of measurements of each benchmark. Default:
+        5.
+    :type repeats: int
+    :rtype: dict
+    """
+    benchmarks = [(name, operation) for name, operation
+                  in get_benchmarks(**instance)
+                  if not names or any(part in name for part in names)]
+    numbers = [calibrate(operation, min_time) for _, operation in benchmarks]
+    results = dict((name, 0.0) for name, _ in benchmarks)
+    for _ in range(repeats):
+        for (name, operation), number in zip(benchmarks, numbers):
+            ops, elapsed = _time_calls(operation, number)
+            results[name] = max(results[name], ops / elapsed)
+    return results
+
+
+def report(results, baseline=None, threshold=0.1):
+    """
+    Prints the throughput of each benchmark, compared to the baseline if one
+    is given, and returns the names of the benchmarks whose throughput fell
+    by more than 'threshold' (a fraction) from the baseline.
+
+    :param results: see run_benchmarks
+    :type results: dict
+    :param baseline: the results of an earlier run, or None
+    :type baseline: dict
+    :param threshold: the largest drop in throughput that is not reported as
+        a regression. Default: 0.1.
+    :type threshold: float
+    :rtype: list(string)
+    """
+    baseline = baseline or {}
+    regressions = []
+    print("{:<32} {:>14} {:>14} {:>8}".format('benchmark', 'ops/s',
+                                              'baseline', 'change'))
+    for name, ops in results.items():
+        if name not in baseline:
+            print("{:<32} {:>14.1f} {:>14} {:>8}".format(name, ops, '-', '-'))
+            continue
+        change = ops / baseline[name] - 1
+        regressed = change < -threshold
+        if regressed:
+            regressions.append(name)
+        print("{:<32} {:>14.1f} {:>14.1f} {:>+7.1f}%{}".format(
+            name, ops, baseline[name], change * 100,
+            "  REGRESSION" if regressed else ""))
+    return regressions
+
+
+def read_baseline(file_name, instance):
+    """
+    Returns the baseline results stored in the given file, or None if there
+    is none, or if they were measured on a different instance.
+
+    :param file_name: the name of the baseline file
+    :type file_name: string
+    :param instance: see run_benchmarks
+    :type instance: dict
+    :rtype: dict
+    """
+    import os
+
+    if not os.path.exists(file_name):
+        return None
+    baseline = utils.read_json_data(file_name)
+    if baseline['instance'] != instance:
+        utils.eprint("Warning: the baseline in", file_name, "was measured on "
+                     "a different instance,", baseline['instance'], "; not "
+                     "comparing.")
+        return None
+    return baseline['results']
+
+
+def write_baseline(file_name, instance, results):
+    """
+    Stores the given results as the baseline in the given file, along with
+    the instance they were measured on and the Python version and machine
+    they were measured with. Results of benchmarks that were not run are
+    kept from the previous baseline, if any.
+
+    :param file_name: the name of the baseline file; must end with ".json"
+    :type file_name: string
+    :param instance: see run_benchmarks
+    :type instance: dict
+    :param results: see run_benchmarks
+    :type results: dict
+    """
+    import platform
+
+    previous = read_baseline(file_name, instance) or {}
+    previous.update(results)
+    utils.dump_json_data(file_name[:-len(".json")], {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'instance': instance,
+        'results': previous
+    })
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(
+        description="Benchmark the hot paths (the transition operators, the "
+                    "heuristics, map processing, graph generation and the "
+                    "search engines) on a fixed seeded instance, and report "
+                    "any regression in throughput against the stored "
+                    "baseline. Exits with status 1 if there is one.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument("-n", "--vehicles", type=int, default=2,
+                        help="number of cars of the instance")
+    parser.add_argument("-k", "--packages", type=int, default=5,
+                        help="number of packages of the instance")
+    parser.add_argument("-m", "--locations", type=int, default=30,
+                        help="number of locations of the instance")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="seed of the instance")
+    parser.add_argument("--num-states", type=int, default=200,
+                        help="number of states to benchmark the transition "
+                             "operators and heuristics on")
+    parser.add_argument("--min-time", type=float, default=0.2,
+                        help="minimum process time of each measurement, in "
+                             "seconds")
+    parser.add_argument("--repeats", type=int, default=5,
+                        help="number of measurements of each benchmark; the "
+                             "best is kept")
+    parser.add_argument("--filter", nargs='+',
+                        help="only run the benchmarks whose names contain "
+                             "one of these strings")
+    parser.add_argument("--baseline", default=default_baseline,
+                        help="file in which the baseline is stored")
+    parser.add_argument("--save-baseline", action='store_true',
+                        help="store the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="largest drop in throughput, as a fraction of "
+                             "the baseline, that is not a regression")
+    args = parser.parse_args()
+
+    if not args.baseline.endswith(".json"):
+        parser.error("the baseline file name must end with .json")
+    bench_instance = {
+        'n': args.vehicles,
+        'k': args.packages,
+        'm': args.locations,
+        'seed': args.seed,
+        'num_states': args.num_states
+    }
+    bench_results = run_benchmarks(bench_instance, args.filter, args.min_time,
+                                   args.repeats)
+    found = report(bench_results, read_baseline(args.baseline, bench_instance),
+                   args.threshold)
+    if args.save_baseline:
+        write_baseline(args.baseline, bench_instance, bench_results)
+        print("Saved the baseline to", args.baseline)
+    if found:
+        print(len(found), "regression(s):", ", ".join(found))
+        sys.exit(1)
@@ -0,0 +1,90 @@
+from astar import a_star_count_nodes
+from localbeam import local_beam_search
+from heapqueue import open_lists
+from graphs import get_ogg_graph, get_random_graph
+from search import _create_problem_representation
+from State import is_goal, decorating_f, State
+import timing
+import utils
+
+
+def get_instances(num_random, k, m):
+    """
+    Returns a list of (name, full_map, pairs) tuples for the benchmark: the
+    OGG, followed by 'num_random' deterministically seeded random instances.
+
+    :rtype: list((string, NetworkX Graph, list((int, int))))
+    """
+    graph, pairs = get_ogg_graph()
+    instances = [('ogg', graph, pairs)]
+    for seed in range(num_random):
+        graph, pairs = get_random_graph(k, m, seed)
+        instances.append(('random' + str(seed), graph,
+                          utils.filter_pairs(pairs)))
+    return instances
+
+
+def measure_throughput(algorithm, queue_type, n, full_map, pairs, repeats,
+                       *args):
+    """
+    Runs 'algorithm' to its first solution 'repeats' times on the given
+    problem using the given open list, and returns the number of nodes counted
+    by the algorithm, and the number of those nodes per second of process
+    time.
+
+    :rtype: int, float
+    """
+    initial, trans_op, _ = _create_problem_representation(
+        n, len(pairs), full_map.number_of_nodes(), full_map, pairs, 'State')
+    f = decorating_f(State.sum_of_package_cost_h)
+    count = 0
+    timing.start_timer()
+    for _ in range(repeats):
+        _, count = next(algorithm(initial, is_goal, trans_op, f, *args,
+                                  queue_type=queue_type))
+    elapsed = timing.end_timer()
+    return count, count * repeats / max(elapsed, 1e-9)
+
+
+def compare_open_lists(n, num_random, k, m, repeats):
+    """
+    Prints, for each instance and each search algorithm, the throughput (in
+    nodes per second) achieved with each open list implementation, along with
+    the speedup of the heap over queue.PriorityQueue.
+    """
+    algorithms = [('a_star', a_star_count_nodes, ()),
+                  ('local_beam', local_beam_search, (20,))]
+    print("{:<10} {:<12} {:>8} {:>16} {:>16} {:>8}".format(
+        'instance', 'algorithm', 'nodes', 'heap nodes/s', 'pq nodes/s',
+        'speedup'))
+    for name, full_map, pairs in get_instances(num_random, k, m):
+        for alg_name, algorithm, args in algorithms:
+            count, heap = measure_throughput(algorithm, open_lists['heap'], n,
+                                             full_map, pairs, repeats, *args)
+            _, pq = measure_throughput(algorithm,
+                                       open_lists['priority_queue'], n,
+                                       full_map, pairs, repeats, *args)
+            print("{:<10} {:<12} {:>8} {:>16.1f} {:>16.1f} {:>7.2f}x".format(
+                name, alg_name, count, heap, pq, heap / pq))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Compare the throughput of the open list implementations "
+                    "on the OGG and on random instances.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument("-n", "--vehicles", type=int, default=2,
+                        help="number of cars for each instance")
+    parser.add_argument("-k", "--packages", type=int, default=5,
+                        help="number of packages for each random instance")
+    parser.add_argument("-m", "--locations", type=int, default=30,
+                        help="number of locations for each random instance")
+    parser.add_argument("--num-random", type=int, default=3,
+                        help="number of random instances")
+    parser.add_argument("--repeats", type=int, default=5,
+                        help="number of times each search is repeated")
+    args = parser.parse_args()
+    compare_open_lists(args.vehicles, args.num_random, args.packages,
+                       args.locations, args.repeats)
@@ -0,0 +1,355 @@
+import timing
+import utils
+
+# The values each parameter is swept over, by default; roughly geometric, so
+# that they are evenly spread on a log scale. The other parameters are kept
+# at their defaults (see Main.defaults).
+default_values = {
+    'n': [1, 2, 3, 4, 6, 8, 12, 16],
+    'k': [1, 2, 3, 4, 6, 8, 12, 16, 24, 32],
+    'm': [30, 60, 120, 240, 480, 960, 1920]
+}
+
+algorithms = ['a_star', 'bounded_a_star', 'local_beam', 'ida_star',
+              'sma_star']
+
+
+class _BudgetExceeded(Exception):
+    """
+    Raised from within a search that exceeded its time or node budget.
+    """
+    pass
+
+
+def budgeted(trans_op, time_budget, node_budget):
+    """
+    Returns a transition operator that behaves like the given one, but
+    raises _BudgetExceeded once it has been called more than 'node_budget'
+    times (i.e. more than 'node_budget' states have been expanded), or once
+    more than 'time_budget' seconds of process time have passed since the
+    timer 'budget' was started.
+
+    :param trans_op: the transition operator
+    :type trans_op: X => list(X), where X is a state type
+    :param time_budget: the process time budget of the search, in seconds
+    :type time_budget: float
+    :param node_budget: the maximum number of states to expand
+    :type node_budget: int
+    :rtype: X => list(X), where X is a state type
+    """
+    expanded = [0]
+
+    def budgeted_trans_op(state):
+        expanded[0] += 1
+        if expanded[0] > node_budget or \
+                timing.end_timer('budget') > time_budget:
+            raise _BudgetExceeded()
+        return trans_op(state)
+
+    return budgeted_trans_op
+
+
+def run_point(algorithm, h_name, state_type, n, k, m, num_sims, time_budget,
+              node_budget):
+    """
+    Runs the given search algorithm, with the given heuristic, on the first
+    'num_sims' random problems with n cars, k packages and m locations (the
+    same problems as the simulations of Main.py), and returns the mean
+    process time and node count of the searches, as a dictionary. The time
+    of processing each map is not included. If any
+    search exceeds its budget (see budgeted), or finds no solution (e.g.
+    local beam search), the remaining searches are not run, and the point is
+    marked as not 'completed'; in the latter case, it is also marked as
+    'no_solution'.
+
+    :param algorithm: one of algorithms
+    :type algorithm: string
+    :param h_name: the name of the heuristic; one of the keys of
+        Main.heuristics
+    :type h_name: string
+    :param state_type: one of 'State' or 'VanillaState'
+    :type state_type: string
+    :param num_sims: the number of problems to search
+    :type num_sims: int
+    :param time_budget: see budgeted
+    :type time_budget: float
+    :param node_budget: see budgeted
+    :type node_budget: int
+    :rtype: dict
+    """
+    from astar import a_star_count_nodes, bounded_a_star, sma_star
+    from idastar import ida_star
+    from localbeam import local_beam_search
+    from Main import heuristics, defaults
+    from search import _create_problem_representation, _get_key
+    from simulation import get_processed_world, get_random_instance
+    from State import is_goal, decorating_f
+
+    if algorithm == 'a_star':
+        search, args, kwargs = a_star_count_nodes, (), \
+            {'key': _get_key(True, False)}
+    elif algorithm == 'bounded_a_star':
+        search, args, kwargs = bounded_a_star, (defaults['bound'],), \
+            {'key': _get_key(True, False)}
+    elif algorithm == 'local_beam':
+        search, args, kwargs = local_beam_search, (defaults['k_limit'],), {}
+    elif algorithm == 'ida_star':
+        search, args, kwargs = ida_star, (), {'key': _get_key(True, False)}
+    else:
+        search, args, kwargs = sma_star, (defaults['max_nodes'],), \
+            {'key': _get_key(True, False)}
+    f = decorating_f(heuristics[h_name][state_type])
+    times = []
+    node_counts = []
+    no_solution = False
+    for i in range(num_sims):
+        full_map, pairs = get_random_instance(k, m, i)
+        world, _ = get_processed_world(n, k, m, i)
+        initial, trans_op, _ = _create_problem_representation(
+            n, k, m, full_map, pairs, state_type, world=world)
+        timing.start_timer('budget')
+        try:
+            _, count = next(search(
+                initial, is_goal, budgeted(trans_op, time_budget,
+                                           node_budget), f, *args, **kwargs))
+        except _BudgetExceeded:
+            break
+        except StopIteration:
+            no_solution = True
+            break
+        times.append(timing.end_timer('budget'))
+        node_counts.append(count)
+    return {
+        'n': n,
+        'k': k,
+        'm': m,
+        'completed': len(times) == num_sims,
+        'no_solution': no_solution,
+        'time': sum(times) / len(times) if times else None,
+        'node_count': sum(node_counts) / len(node_counts) if times else None
+    }
+
+
+def sweep(algorithm, h_name, state_type, parameter, values, num_sims,
+          time_budget, node_budget, verbose=False):
+    """
+    Runs run_point for each of the given values of the given parameter, in
+    increasing order, with the other parameters at their defaults, and
+    returns the list of results. The sweep stops at the first point that
+    does not complete within its budget (which is included in the results),
+    since the larger values would not either; points where a search finds no
+    solution do not stop it.
+
+    :param parameter: one of 'n', 'k' or 'm'
+    :type parameter: string
+    :param values: the values of the parameter
+    :type values: list(int)
+    :param verbose: if true, print each point as it is run
+    :type verbose: bool
+    :rtype: list(dict)
+    """
+    from Main import defaults
+
+    points = []
+    for value in sorted(values):
+        config = {'n': defaults['n'], 'k': defaults['k'], 'm': defaults['m']}
+        config[parameter] = value
+        if verbose:
+            print(algorithm, h_name, parameter + "=" + str(value), flush=True)
+        point = run_point(algorithm, h_name, state_type, config['n'],
+                          config['k'], config['m'], num_sims, time_budget,
+                          node_budget)
+        points.append(point)
+        if not point['completed'] and not point['no_solution']:
+            break
+    return points
+
+
+def fit_growth(xs, ys):
+    """
+    Fits the growth of ys with xs, by least squares, on both a log-log scale
+    (y ~ x^a, i.e. polynomial growth of degree a) and a semi-log scale
+    (y ~ b^x, i.e. exponential growth by a factor of b per unit of x), and
+    returns a dictionary of 'exponent' (a), 'factor' (b), and the
+    coefficient of determination of each fit, 'exponent_r2' and
+    'factor_r2'; the fit with the higher one describes the growth better.
+    Points where y is not positive are ignored. Returns None if fewer than
+    two distinct points remain.
+
+    :param xs: the values of the parameter
+    :type xs: list(float)
+    :param ys: the measured values
+    :type ys: list(float)
+    :rtype: dict
+    """
+    import numpy as np
+
+    points = [(x, y) for x, y in zip(xs, ys) if x > 0 and y and y > 0]
+    if len(set(x for x, _ in points)) < 2:
+        return None
+    xs = np.array([x for x, _ in points], dtype=float)
+    log_ys = np.log([y for _, y in points])
+
+    def fit(us):
+        slope, intercept = np.polyfit(us, log_ys, 1)
+        residual = log_ys - (slope * us + intercept)
+        total = ((log_ys - log_ys.mean()) ** 2).sum()
+        r2 = 1 - (residual ** 2).sum() / total if total > 0 else 1.0
+        return slope, r2
+
+    exponent, exponent_r2 = fit(np.log(xs))
+    log_factor, factor_r2 = fit(xs)
+    return {
+        'exponent': round(float(exponent), 4),
+        'exponent_r2': round(float(exponent_r2), 4),
+        'factor': round(float(np.exp(log_factor)), 4),
+        'factor_r2': round(float(factor_r2), 4)
+    }
+
+
+def run_scaling(algorithm_names, h_names, state_type, values, num_sims,
+                time_budget, node_budget, verbose=False):
+    """
+    Sweeps each parameter separately (see sweep) for each of the given
+    algorithms and heuristics, and fits the growth of the mean time and node
+    count with each parameter (see fit_growth). Returns a list of
+    dictionaries, one per sweep, with its 'algorithm', 'h_name',
+    'parameter', 'points', and the 'time_fit' and 'node_count_fit' (which
+    are None if there were too few completed points to fit).
+
+    :param algorithm_names: the names of the algorithms; see algorithms
+    :type algorithm_names: list(string)
+    :param h_names: the names of the heuristics
+    :type h_names: list(string)
+    :param state_type: one of 'State' or 'VanillaState'
+    :type state_type: string
+    :param values: the values to sweep each parameter over, keyed by
+        parameter name
+    :type values: dict
+    :rtype: list(dict)
+    """
+    results = []
+    for algorithm in algorithm_names:
+        for h_name in h_names:
+            for parameter in sorted(values):
+                points = sweep(algorithm, h_name, state_type, parameter,
+                               values[parameter], num_sims, time_budget,
+                               node_budget, verbose)
+                completed = [p for p in points if p['completed']]
+                xs = [p[parameter] for p in completed]
+                results.append({
+                    'algorithm': algorithm,
+                    'h_name': h_name,
+                    'parameter': parameter,
+                    'points': points,
+                    'time_fit': fit_growth(
+                        xs, [p['time'] for p in completed]),
+                    'node_count_fit': fit_growth(
+                        xs, [p['node_count'] for p in completed])
+                })
+    return results
+
+
+def format_report(results, state_type, num_sims, time_budget, node_budget):
+    """
+    Returns a compact text report of the given scaling results: one line per
+    sweep, giving the range of values completed within the budget, the
+    fitted polynomial exponent and exponential factor of the time and of the
+    node count (each with the R^2 of its fit), and, for each algorithm and
+    heuristic, the parameter that the time grows with the steepest; i.e.
+    with the largest polynomial exponent.
+
+    :param results: see run_scaling
+    :type results: list(dict)
+    :rtype: string
+    """
+    def format_fit(fit):
+        if fit is None:
+            return "{:>22}".format("-")
+        return "x^{:<5.2f}({:.2f}) {:>5.2f}^x({:.2f})".format(
+            fit['exponent'], fit['exponent_r2'], fit['factor'],
+            fit['factor_r2'])
+
+    lines = ["Scaling report: {}, {} simulation(s) per point, budget {}s "
+             "and {} nodes per search.".format(state_type, num_sims,
+                                               time_budget, node_budget),
+             "",
+             "{:<15} {:<12} {:<5} {:<14} {:<26} {:<26}".format(
+                 'algorithm', 'heuristic', 'param', 'completed',
+                 'time', 'node_count').rstrip()]
+    steepest = {}
+    for result in results:
+        parameter = result['parameter']
+        completed = [p[parameter] for p in result['points']
+                     if p['completed']]
+        values = "{}-{} ({})".format(completed[0], completed[-1],
+                                     len(completed)) if completed else "none"
+        if len(completed) < len(result['points']):
+            values += "+"
+        lines.append("{:<15} {:<12} {:<5} {:<14} {:<26} {:<26}".format(
+            result['algorithm'], result['h_name'], parameter, values,
+            format_fit(result['time_fit']),
+            format_fit(result['node_count_fit'])).rstrip())
+        fit = result['time_fit']
+        key = (result['algorithm'], result['h_name'])
+        if fit is not None and (key not in steepest or
+                                fit['exponent'] > steepest[key][1]):
+            steepest[key] = (parameter, fit['exponent'])
+    lines += ["",
+              "'+' marks a sweep stopped at the budget. Each fit is given "
+              "as x^a (R^2) and b^x (R^2).", ""]
+    for (algorithm, h_name), (parameter, _) in sorted(steepest.items()):
+        lines.append("Steepest for {} with {}: {}".format(algorithm, h_name,
+                                                          parameter))
+    return "\n".join(lines) + "\n"
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Sweep n, k and m separately for each search algorithm "
+                    "and heuristic, within a time and node budget per "
+                    "search, fit the growth of the time and node count with "
+                    "each parameter, and write a compact report.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument("-v", "--verbose", action='store_true',
+                        help="print each point as it is run")
+    parser.add_argument("--algorithms", nargs='+', default=algorithms,
+                        choices=algorithms, help="algorithms to sweep")
+    parser.add_argument("--heuristics", nargs='+',
+                        default=['zero', 'undelivered', 'scaled', 'sum'],
+                        choices=['zero', 'undelivered', 'scaled', 'sum'],
+                        help="heuristics to sweep")
+    parser.add_argument("--vanilla", action='store_true',
+                        help="use vanilla state transitions")
+    for name in sorted(default_values):
+        parser.add_argument("--" + name + "-values", type=int, nargs='+',
+                            default=default_values[name],
+                            help="values to sweep " + name + " over")
+    parser.add_argument("--num-sims", type=int, default=3,
+                        help="number of simulations per point")
+    parser.add_argument("--time-budget", type=float, default=10.0,
+                        help="process time budget of each search, in "
+                             "seconds")
+    parser.add_argument("--node-budget", type=int, default=100000,
+                        help="maximum number of states each search may "
+                             "expand")
+    parser.add_argument("--report", default="scaling_report.txt",
+                        help="file to write the report to")
+    parser.add_argument("--output", default="scaling_results",
+                        help="name of the JSON file (without extension) to "
+                             "write all the results to")
+    args = parser.parse_args()
+
+    scaling_state_type = 'VanillaState' if args.vanilla else 'State'
+    scaling_results = run_scaling(
+        args.algorithms, args.heuristics, scaling_state_type,
+        {'n': args.n_values, 'k': args.k_values, 'm': args.m_values},
+        args.num_sims, args.time_budget, args.node_budget, args.verbose)
+    report = format_report(scaling_results, scaling_state_type, args.num_sims,
+                           args.time_budget, args.node_budget)
+    with open(args.report, 'w') as out:
+        out.write(report)
+    utils.dump_json_data(args.output, scaling_results)
+    print(report, end='')
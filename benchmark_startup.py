@@ -0,0 +1,105 @@
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+# Modules that are slow to import, and should only be loaded when needed.
+heavy_modules = ['networkx', 'numpy', 'matplotlib', 'plotly']
+
+# Commands whose startup time is measured, by name. Each is run in a fresh
+# Python interpreter, from the directory of this file.
+commands = {
+    'Main.py --help': ['Main.py', '--help'],
+    'run_simulations.py --help': ['run_simulations.py', '--help'],
+    'make_plots.py --help': ['make_plots.py', '--help'],
+    'tiny simulation': ['Main.py', '-a', '--num-sims', '1', '-n', '1', '-k',
+                        '2', '-m', '10']
+}
+
+# Modules whose import time is measured.
+modules = ['Main', 'run_simulations', 'search', 'simulation', 'State',
+           'World', 'graphs', 'utils']
+
+
+def time_command(args, repeats):
+    """
+    Runs the given Python command line 'repeats' times, each time in a fresh
+    interpreter, and returns the wall time taken by each run, in seconds.
+    Output files are written to a temporary directory.
+
+    :param args: the arguments to the Python interpreter
+    :type args: list(string)
+    :param repeats: the number of runs
+    :type repeats: int
+    :rtype: list(float)
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        [here] + [p for p in [env.get('PYTHONPATH')] if p])
+    args = [arg if not arg.endswith('.py') else os.path.join(here, arg)
+            for arg in args]
+    times = []
+    with tempfile.TemporaryDirectory() as out_dir:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            subprocess.run([sys.executable] + args, cwd=out_dir, env=env,
+                           stdout=subprocess.DEVNULL).check_returncode()
+            times.append(time.perf_counter() - start)
+    return times
+
+
+def get_heavy_imports(module):
+    """
+    Returns the heavy modules (see heavy_modules) that are loaded as a
+    side effect of importing the given module, in a fresh interpreter.
+
+    :param module: the name of the module
+    :type module: string
+    :rtype: list(string)
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    code = "import sys, {}; print(' '.join(m for m in {!r} " \
+           "if m in sys.modules))".format(module, heavy_modules)
+    output = subprocess.run([sys.executable, "-c", code], cwd=here,
+                            stdout=subprocess.PIPE, universal_newlines=True,
+                            check=True).stdout
+    return output.split()
+
+
+def benchmark_startup(repeats):
+    """
+    Prints the best and median wall time of each command and of importing
+    each module, along with the heavy modules that each import loads.
+
+    :param repeats: the number of runs of each command
+    :type repeats: int
+    """
+    print("{:<28} {:>10} {:>10}".format('command', 'best (s)', 'median (s)'))
+    for name, args in commands.items():
+        times = sorted(time_command(args, repeats))
+        print("{:<28} {:>10.3f} {:>10.3f}".format(name, times[0],
+                                                  times[len(times) // 2]))
+    print()
+    print("{:<28} {:>10} {:>10}  {}".format('import', 'best (s)',
+                                            'median (s)', 'heavy imports'))
+    for module in modules:
+        times = sorted(time_command(["-c", "import " + module], repeats))
+        print("{:<28} {:>10.3f} {:>10.3f}  {}".format(
+            module, times[0], times[len(times) // 2],
+            ' '.join(get_heavy_imports(module)) or '-'))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Measure the startup time of the command line tools, and "
+                    "the import time of the main modules, each in a fresh "
+                    "Python interpreter.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument("--repeats", type=int, default=5,
+                        help="number of runs of each command")
+    args = parser.parse_args()
+    benchmark_startup(args.repeats)
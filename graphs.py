@@ -1,6 +1,3 @@
-import networkx as nx
-from networkx.drawing.layout import circular_layout
-import matplotlib.pyplot as plt
 import random
 import math
 
@@ -18,6 +15,10 @@ def draw_graph(graph, source_dest_pairs=None, garage=0):
     :param garage: the garage node. Default: 0.
     :type garage: int
     """
+    from networkx.drawing.layout import circular_layout
+    import matplotlib.pyplot as plt
+    import networkx as nx
+
     # Always choose a circular layout for easy labeling. Draw the graph.
     layout = circular_layout(graph)
     nx.draw_networkx(graph, pos=layout, node_color='w')
@@ -54,6 +55,8 @@ def get_triangle_graph():
 
     :rtype: Graph, list((int,int))
     """
+    import networkx as nx
+
     triangle_size = 3
     triangle = nx.Graph()
     triangle.add_nodes_from([i for i in range(triangle_size)])
@@ -78,6 +81,8 @@ def get_ogg_graph():
 
     :rtype: Graph, list((int,int))
     """
+    import networkx as nx
+
     ogg_size = 9
     ogg = nx.Graph()
     ogg.add_nodes_from([i for i in range(ogg_size)])
@@ -111,6 +116,8 @@ def get_circle_graph():
 
     :rtype: Graph, list((int,int))
     """
+    import networkx as nx
+
     circle_size = 10
     circle = nx.Graph()
     circle.add_nodes_from([i for i in range(circle_size)])
@@ -164,6 +171,8 @@ def get_random_graph(k, m, seed=None):
     :type seed: int
     :rtype: Graph, list((int, int))
     """
+    import networkx as nx
+
     if seed is not None:
         random.seed(seed)
 
@@ -0,0 +1,53 @@
+from heapq import heappush, heappop
+from queue import PriorityQueue
+
+
+class HeapQueue:
+    """
+    A HeapQueue is a minimal, single-threaded replacement for
+    queue.PriorityQueue, backed by a plain binary heap. It exposes the subset
+    of the PriorityQueue interface used by the search algorithms (put, get,
+    empty, qsize, and the underlying 'queue' list), but avoids taking a
+    thread lock on every operation.
+    """
+
+    def __init__(self):
+        self.queue = []
+
+    def put(self, item):
+        """
+        Adds the given item to the queue.
+
+        :param item: the item to add; items must be mutually comparable, so
+            search algorithms use (f, counter, state) tuples
+        """
+        heappush(self.queue, item)
+
+    def get(self):
+        """
+        Removes and returns the smallest item in the queue.
+        """
+        return heappop(self.queue)
+
+    def empty(self):
+        """
+        Returns whether the queue is empty or not.
+
+        :rtype: bool
+        """
+        return not self.queue
+
+    def qsize(self):
+        """
+        Returns the number of items in the queue.
+
+        :rtype: int
+        """
+        return len(self.queue)
+
+
+# All available open list implementations, by name.
+open_lists = {
+    'heap': HeapQueue,
+    'priority_queue': PriorityQueue
+}
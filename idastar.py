@@ -0,0 +1,121 @@
+from astar import record_stats
+from math import inf
+
+
+def ida_star(initial_state, is_goal, trans_op, f, key=None, stats=None,
+             queue_type=None):
+    """
+    A generic Iterative Deepening A* (IDA*) implementation, with the same
+    interface as astar.a_star_count_nodes. It runs a series of depth-first
+    searches from the initial state, each one bounded by an f-threshold:
+    states whose f-value exceeds the threshold are not expanded, and the
+    next threshold is the lowest f-value that exceeded the current one. Only
+    the current path, and the successors of the states on it, are kept in
+    memory, so memory grows with the depth of the search rather than with
+    the number of states reached, at the cost of re-expanding states in
+    every iteration. If h(x) is admissible, the first solution yielded is
+    optimal. Like a_star, this is a generator: each solution is yielded
+    once, in the iteration whose threshold first admits it, and the search
+    continues from there when the next solution is requested.
+
+    :param initial_state: see astar.a_star
+    :param is_goal: see astar.a_star
+    :param trans_op: see astar.a_star
+    :param f: see astar.a_star
+    :param key: if given, a function giving the canonical key of a state
+        (see astar.a_star), used to detect cycles: a successor that is the
+        same state as a state on the current path is skipped, and counted
+        in 'duplicates_pruned'. If None, cycles are not detected (which, with
+        zero-cost moves, can make an iteration never end). Default: None.
+    :param stats: see astar.a_star; here, the states expanded are counted
+        again in every iteration, the frontier is the current path (so
+        'peak_frontier' is the greatest depth reached), and 'iterations' is
+        the number of depth-first searches started. Default: None.
+    :param queue_type: unused, since IDA* has no open list; accepted so that
+        it can be run like the other search algorithms. Default: None.
+    :rtype: X (a goal state), integral
+    """
+    if stats is None:
+        stats = {}
+    expanded = 0
+    generated = 0
+    duplicates = 0
+    branched = 0
+    max_branching = 0
+    max_depth = 1
+    iterations = 0
+    if is_goal(initial_state):  # A goal state has no successors to search.
+        stats['iterations'] = 1
+        record_stats(stats, 1, 0, 0, 1, 0, 0)
+        yield initial_state, 1
+        return
+    previous_threshold = -inf
+    initial_f = f(initial_state)
+    threshold = initial_f
+    while threshold < inf:
+        iterations += 1
+        stats['iterations'] = iterations
+        next_threshold = inf
+        expanded += 1
+        on_path = set() if key is None else {key(initial_state)}
+        path_keys = [None if key is None else key(initial_state)]
+        stack = [_successors(initial_state, trans_op, f, initial_f)]
+        generated += len(stack[-1])
+        branched += 1
+        max_branching = max(max_branching, len(stack[-1]))
+        while stack:
+            successors = stack[-1]
+            if not successors:  # Backtrack.
+                stack.pop()
+                on_path.discard(path_keys.pop())
+                continue
+            f_value, _, state = successors.pop()
+            if f_value > threshold:
+                next_threshold = min(next_threshold, f_value)
+                continue
+            state_key = None
+            if key is not None:
+                state_key = key(state)
+                if state_key in on_path:
+                    duplicates += 1  # A cycle back to the current path.
+                    continue
+            expanded += 1
+            if is_goal(state):
+                if f_value > previous_threshold:  # Not yielded before.
+                    record_stats(stats, expanded, generated, duplicates,
+                                 max_depth, branched, max_branching)
+                    yield state, expanded
+                continue
+            stack.append(_successors(state, trans_op, f, f_value))
+            generated += len(stack[-1])
+            branched += 1
+            max_branching = max(max_branching, len(stack[-1]))
+            if key is not None:
+                on_path.add(state_key)
+            path_keys.append(state_key)
+            max_depth = max(max_depth, len(stack))
+        previous_threshold = threshold
+        threshold = next_threshold
+    record_stats(stats, expanded, generated, duplicates, max_depth, branched,
+                 max_branching)
+
+
+def _successors(state, trans_op, f, f_value):
+    """
+    Returns the successors of the given state as a list of (f-value, index,
+    successor) tuples, sorted so that popping from the end of the list gives
+    the successor with the lowest f-value first (ties broken by the order of
+    the transition operator). The f-value of each successor is at least the
+    given f-value of the state (the path-max), so that f-values never
+    decrease along a path, even if h(x) is inconsistent; otherwise, a goal
+    with an f-value at most the previous threshold could be beyond a state
+    that exceeded it, and never be yielded.
+
+    :param f_value: the (path-max) f-value of the given state
+    :type f_value: float
+    :rtype: list((float, int, X)), where X is the type of the state
+    """
+    successors = [(max(f(successor), f_value), i, successor)
+                  for i, successor in enumerate(trans_op(state))]
+    successors.sort(key=lambda item: (-item[0], -item[1]))
+    return successors
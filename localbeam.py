@@ -1,7 +1,9 @@
-from queue import PriorityQueue
+from astar import record_stats
+from heapqueue import HeapQueue
 
 
-def greedy_search(state, is_goal, trans_op, f, k_limit=20):
+def greedy_search(state, is_goal, trans_op, f, k_limit=20,
+                  queue_type=HeapQueue):
     """
     if is_goal(state) then
         return state as a goal state
@@ -26,12 +28,18 @@ def greedy_search(state, is_goal, trans_op, f, k_limit=20):
     :param k_limit: the number of successor states that will being considered
         minus 1. Default: 20.
     :type k_limit: int
+    :param queue_type: the class of the priority queues used to rank
+        candidate states; e.g. HeapQueue or queue.PriorityQueue. Default:
+        HeapQueue.
+    :type queue_type: class
     :rtype: X (a goal state), integral
     """
-    return _greedy_search_helper(0, state, is_goal, trans_op, f, k_limit)
+    return _greedy_search_helper(0, state, is_goal, trans_op, f, k_limit,
+                                 queue_type)
 
 
-def _greedy_search_helper(counter, state, is_goal, trans_op, f, k_limit):
+def _greedy_search_helper(counter, state, is_goal, trans_op, f, k_limit,
+                          queue_type):
     """
     A helper method that counts the number of nodes expanded, where 'counter'
     records the number of nodes expanded so far.
@@ -41,7 +49,7 @@ def _greedy_search_helper(counter, state, is_goal, trans_op, f, k_limit):
         goal_state = state
         yield goal_state, counter
     else:
-        potential_temp = PriorityQueue()
+        potential_temp = queue_type()
         potential = []
         candidate = trans_op(state)
         for mem in candidate:
@@ -63,12 +71,14 @@ def _greedy_search_helper(counter, state, is_goal, trans_op, f, k_limit):
                 potential = potential_temp.queue[0:k_limit]
         for mem in potential:
             for sol, exp in _greedy_search_helper(counter, mem[1], is_goal,
-                                                  trans_op, f, k_limit):
+                                                  trans_op, f, k_limit,
+                                                  queue_type):
                 counter = exp
                 yield sol, counter
 
 
-def local_beam_search(state, is_goal, trans_op, f, k_limit=20):
+def local_beam_search(state, is_goal, trans_op, f, k_limit=20,
+                      queue_type=HeapQueue, stats=None):
     """
     explore all the nodes of state, using trans_op
     while there is an unvisited node
@@ -93,24 +103,51 @@ def local_beam_search(state, is_goal, trans_op, f, k_limit=20):
     :param k_limit: the number of successor states that will being considered
         minus 1. Default: 20.
     :type k_limit: int
+    :param queue_type: the class of the priority queues used to rank
+        candidate states; e.g. HeapQueue or queue.PriorityQueue. Default:
+        HeapQueue.
+    :type queue_type: class
+    :param stats: if given, a dictionary that is updated with search
+        statistics, as for astar.a_star; here, the states expanded are those
+        whose successors were generated, the frontier is the set of
+        candidates of the next level, and no duplicates are pruned. Default:
+        None.
+    :type stats: dict
     :rtype: X (a goal state), integral
     """
+    if stats is None:
+        stats = {}
+    expanded = 0
+    max_branching = 0
+    peak_frontier = 1
     counter = 0
-    candidates = PriorityQueue()
+    candidates = queue_type()
     candidates.put((f(state), counter, state))
     while not candidates.empty():
         if len(candidates.queue) > k_limit:
-            temp_candidate = PriorityQueue()
+            temp_candidate = queue_type()
             for i in range(0, k_limit):
                 temp_candidate.put(candidates.get())
             candidates = temp_candidate
-        temp_candidate = PriorityQueue()
+        temp_candidate = queue_type()
         while not candidates.empty():
             s = candidates.get()
             new_candidates = trans_op(s[2])
+            expanded += 1
+            previous_counter = counter
             for candidate in new_candidates:
                 counter += 1
                 if is_goal(candidate):
+                    record_stats(stats, expanded, counter, 0,
+                                 max(peak_frontier, temp_candidate.qsize()),
+                                 expanded, max(max_branching,
+                                               counter - previous_counter))
                     yield candidate, counter
                 temp_candidate.put((f(candidate), counter, candidate))
+            if counter - previous_counter > max_branching:
+                max_branching = counter - previous_counter
+            if temp_candidate.qsize() > peak_frontier:
+                peak_frontier = temp_candidate.qsize()
         candidates = temp_candidate
+    record_stats(stats, expanded, counter, 0, peak_frontier, expanded,
+                 max_branching)
@@ -1,23 +1,115 @@
 from utils import *
 
+# The simulation results that are plotted.
+plotted_keys = ['cost_sum', 'pre_processing_time', 'simulation_time',
+                'node_count']
 
-def make_plots(bar_plots_name, plots_name, file_names):
+
+def make_plots(bar_plots_name, plots_name, file_names,
+               mean_plots_name="mean_bar_plots.html"):
     """
-    Uses the JSON data in the given 'file_names' to write aggregate bar plots
-    to 'bar_plots_name' and aggregate plots to 'plots_name'.
+    Uses the JSON data in the given 'file_names' (JSON or JSON Lines files)
+    to write aggregate bar plots to 'bar_plots_name' and aggregate plots to
+    'plots_name', with one bar or point per simulation, and bar plots of the
+    mean of each result, with one bar per file, to 'mean_plots_name'. JSON
+    Lines files are aggregated while they are read, one simulation at a
+    time, so that their results are never all in memory; they are thus only
+    included in the plots of the means.
     """
-    data = [read_json_data(file) for file in file_names]
-    output_bar_multiple(bar_plots_name, data)
-    output_plot_multiple(plots_name, data)
+    data = []
+    aggregates = []
+    for file in file_names:
+        if file.endswith(".jsonl"):
+            aggregates.append(read_streamed_json_data(file, plotted_keys))
+            continue
+        data_dict = read_json_data(file)
+        data_dict['data'] = [result for result in data_dict['data']
+                             if result is not None]
+        data.append(data_dict)
+        aggregates.append(aggregate_json_data(data_dict, plotted_keys))
+    if data:
+        output_bar_multiple(bar_plots_name, data)
+        output_plot_multiple(plots_name, data)
+    output_mean_multiple(mean_plots_name, aggregates)
+
+
+def make_summary_plots(plots_name, store_name, x='n', metric='cost_sum',
+                       where=None):
+    """
+    Writes a plot of the mean of the given metric against the given
+    parameter to 'plots_name', with one line per algorithm, reading the
+    aggregated results from the result store in 'store_name' (see
+    resultstore.py). Error bars show the 95% confidence interval of the mean,
+    and the 5th and 95th percentiles are drawn as dotted lines.
+
+    :param plots_name: the name of the HTML file to write
+    :type plots_name: string
+    :param store_name: the name of the SQLite result store
+    :type store_name: string
+    :param x: the parameter to plot against; one of resultstore's
+        config_columns. Default: 'n'.
+    :type x: string
+    :param metric: the metric to plot; one of resultstore's metric_columns.
+        Default: 'cost_sum'.
+    :type metric: string
+    :param where: the value that each of the given columns must have, to
+        restrict the plot to some of the results. Default: None.
+    :type where: dict
+    """
+    from plotly import offline as py
+    from plotly import graph_objs as go
+    import resultstore
+
+    store = resultstore.connect(store_name)
+    summary = resultstore.aggregate(store, metric, ['algorithm', x], where)
+    store.close()
+    traces = []
+    for algorithm in sorted(set(summary['algorithm'])):
+        rows = summary['algorithm'] == algorithm
+        xs = summary[x][rows]
+        means = summary['mean'][rows]
+        traces.append(go.Scatter(
+            x=xs, y=means, mode='lines+markers', name=algorithm,
+            error_y=dict(type='data', symmetric=False,
+                         array=summary['ci_high'][rows] - means,
+                         arrayminus=means - summary['ci_low'][rows])))
+        for q in ['p5', 'p95']:
+            traces.append(go.Scatter(x=xs, y=summary[q][rows], mode='lines',
+                                     line=dict(dash='dot'),
+                                     name=algorithm + " " + q))
+    layout = dict(title="Mean " + metric + " by " + x,
+                  xaxis=dict(title=x), yaxis=dict(title=metric))
+    py.plot(dict(data=traces, layout=layout), filename=plots_name,
+            auto_open=False)
 
 
 if __name__ == "__main__":
-    import sys
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Makes aggregate plots from all the data in the given "
+                    "JSON (.json) or JSON Lines (.jsonl) files, or, if a "
+                    "result store is given, plots aggregate statistics from "
+                    "the store (after adding the given files to it).")
+    parser.add_argument("files", nargs='*', help="the results files")
+    parser.add_argument("--store",
+                        help="the SQLite result store (see resultstore.py)")
+    parser.add_argument("--x", default='n',
+                        help="the parameter to plot against, with --store")
+    parser.add_argument("--metric", default='cost_sum',
+                        help="the metric to plot, with --store")
+    args = parser.parse_args()
+
+    if args.store is not None:
+        import resultstore
 
-    if len(sys.argv) < 2:
-        eprint("usage:", sys.argv[0], "<json-file-name> ...")
-        eprint("  Makes aggregate plots from all the data in the given JSON "
-               "files.")
-        sys.exit(1)
+        if args.files:
+            store = resultstore.connect(args.store)
+            resultstore.ingest(store, args.files)
+            store.close()
+        make_summary_plots("summary_plots.html", args.store, args.x,
+                           args.metric)
+    elif not args.files:
+        parser.error("at least one file, or a result store, must be given")
     else:
-        make_plots("bar_plots.html", "plots.html", sys.argv[1:])
+        make_plots("bar_plots.html", "plots.html", args.files)
@@ -0,0 +1,408 @@
+import sqlite3
+import numpy as np
+
+# The columns identifying the configuration of a set of simulations.
+config_columns = ['algorithm', 'n', 'k', 'm', 'h_name', 'state_type',
+                  'symmetry', 'bound', 'k_limit', 'max_nodes']
+
+# The numeric results stored for each simulation.
+metric_columns = ['cost_sum', 'node_count', 'simulation_time',
+                  'pre_processing_time', 'shortest_paths_time',
+                  'duplicates_pruned', 'expanded', 'generated',
+                  'peak_frontier', 'branching_mean', 'branching_max',
+                  'nodes_per_second', 'peak_memory', 'max_rss', 'forgotten']
+
+# The SQL type of each metric column.
+_METRIC_TYPES = {
+    'cost_sum': 'REAL',
+    'node_count': 'INTEGER',
+    'simulation_time': 'REAL',
+    'pre_processing_time': 'REAL',
+    'shortest_paths_time': 'REAL',
+    'duplicates_pruned': 'INTEGER',
+    'expanded': 'INTEGER',
+    'generated': 'INTEGER',
+    'peak_frontier': 'INTEGER',
+    'branching_mean': 'REAL',
+    'branching_max': 'INTEGER',
+    'nodes_per_second': 'REAL',
+    'peak_memory': 'INTEGER',
+    'max_rss': 'INTEGER',
+    'forgotten': 'INTEGER'
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    algorithm TEXT NOT NULL,
+    n INTEGER NOT NULL,
+    k INTEGER NOT NULL,
+    m INTEGER NOT NULL,
+    h_name TEXT NOT NULL,
+    state_type TEXT NOT NULL,
+    symmetry INTEGER NOT NULL,
+    bound REAL NOT NULL,
+    k_limit INTEGER NOT NULL,
+    max_nodes INTEGER NOT NULL,
+    sim INTEGER NOT NULL,
+    {},
+    PRIMARY KEY (algorithm, n, k, m, h_name, state_type, symmetry, bound,
+                 k_limit, max_nodes, sim)
+)
+""".format(",\n    ".join(c + " " + _METRIC_TYPES[c] for c in metric_columns))
+
+
+def connect(path):
+    """
+    Opens the result store in the given SQLite database file, creating it if
+    needed. The store holds a single table, 'results', with one row per
+    simulation, keyed by the configuration columns and the simulation
+    number. The bound is 0 for algorithms other than Bounded A* (which, with
+    a bound of 0, is A*), k_limit is 0 for algorithms other than Local Beam
+    Search, and max_nodes is 0 for algorithms other than SMA*. Stores
+    created before a metric column was added gain it, with no values for the
+    results already in them, and stores created before max_nodes was added
+    gain it, taking the values of SMA*'s results from the bound, where they
+    used to be stored.
+
+    :param path: the path of the database file, or ":memory:"
+    :type path: string
+    :rtype: sqlite3.Connection
+    """
+    connection = sqlite3.connect(path)
+    connection.execute(_SCHEMA)
+    existing = set(row[1] for row in
+                   connection.execute("PRAGMA table_info(results)"))
+    for column in metric_columns:
+        if column not in existing:
+            connection.execute("ALTER TABLE results ADD COLUMN {} {}".format(
+                column, _METRIC_TYPES[column]))
+    if 'max_nodes' not in existing:
+        _add_max_nodes_column(connection)
+    return connection
+
+
+def _add_max_nodes_column(connection):
+    """
+    Rebuilds the results table of a store created before max_nodes was a
+    configuration column (since it is part of the primary key, it cannot
+    simply be added). SMA*'s max_nodes, which was stored as the bound, is
+    moved to it; the other results get a max_nodes of 0.
+
+    :param connection: see connect
+    :type connection: sqlite3.Connection
+    """
+    columns = [c for c in config_columns + ['sim'] + metric_columns
+               if c not in ('bound', 'max_nodes')]
+    with connection:
+        connection.execute("ALTER TABLE results RENAME TO old_results")
+        connection.execute(_SCHEMA)
+        connection.execute(
+            "INSERT INTO results ({0}, bound, max_nodes) SELECT {0}, "
+            "CASE WHEN algorithm = 'sma_star' THEN 0 ELSE bound END, "
+            "CASE WHEN algorithm = 'sma_star' THEN bound ELSE 0 END "
+            "FROM old_results".format(", ".join(columns)))
+        connection.execute("DROP TABLE old_results")
+
+
+def ingest(connection, file_names):
+    """
+    Adds the simulation results in the given files (JSON files, or JSON
+    Lines files written by Main.py in streaming mode) to the store. Results
+    for a configuration and simulation number that are already in the store
+    are replaced. Returns the number of rows written.
+
+    :param connection: see connect
+    :type connection: sqlite3.Connection
+    :param file_names: the names of the files to ingest
+    :type file_names: list(string)
+    :rtype: int
+    """
+    from utils import eprint, read_json_data
+
+    columns = config_columns + ['sim'] + metric_columns
+    insert = "INSERT OR REPLACE INTO results ({}) VALUES ({})".format(
+        ", ".join(columns), ", ".join("?" * len(columns)))
+    count = 0
+    with connection:
+        for file_name in file_names:
+            if file_name.endswith(".jsonl"):
+                data = _read_streamed_summary(file_name)
+            else:
+                data = read_json_data(file_name)
+            if data is None or 'n' not in data:
+                eprint("Skipping", file_name + ":", "its simulations are not "
+                       "finished.")
+                continue
+            config = _get_config(data)
+            if file_name.endswith(".jsonl"):
+                results = _read_streamed_results(file_name)
+            else:
+                results = enumerate(data['data'])
+            rows = _get_rows(config, results)
+            count += connection.executemany(insert, rows).rowcount
+    return count
+
+
+def _read_streamed_summary(file_name):
+    """
+    Returns the summary of the simulations in the given JSON Lines file,
+    written by Main.py in streaming mode, or None if the simulations are not
+    finished.
+
+    :rtype: dict
+    """
+    from utils import read_json_lines
+
+    summary = None
+    for record in read_json_lines(file_name):
+        if 'summary' in record:
+            summary = record['summary']
+    return summary
+
+
+def _read_streamed_results(file_name):
+    """
+    Returns a generator of the simulation numbers and results in the given
+    JSON Lines file, written by Main.py in streaming mode, read one
+    simulation at a time.
+
+    :rtype: generator((int, dict))
+    """
+    from utils import read_json_lines
+
+    for record in read_json_lines(file_name):
+        if 'result' in record:
+            yield record['sim'], record['result']
+
+
+def _get_rows(config, results):
+    """
+    Returns a generator of the rows of the store for the given simulation
+    numbers and results, with the given configuration. Simulations without
+    results (e.g. for invalid parameters) are skipped.
+
+    :rtype: generator(list)
+    """
+    for sim, result in results:
+        if result is None:
+            continue
+        config['symmetry'] = int(bool(result.get('symmetry', False)))
+        yield ([config[c] for c in config_columns] + [sim] +
+               [_to_number(result.get(c)) for c in metric_columns])
+
+
+def _get_config(data):
+    """
+    Returns the configuration columns of the given set of simulation results,
+    as read from a results file.
+
+    :rtype: dict
+    """
+    algorithm = data['algorithm']
+    return {
+        'algorithm': algorithm,
+        'n': data['n'],
+        'k': data['k'],
+        'm': data['m'],
+        'h_name': data.get('h_name', ''),
+        'state_type': data['state_type'],
+        'symmetry': 0,
+        'bound': data.get('bound', 0) if algorithm == 'bounded_a_star' else 0,
+        'k_limit': data.get('k_limit', 0) if algorithm == 'local_beam' else 0,
+        'max_nodes': data.get('max_nodes', 0) if algorithm == 'sma_star' else 0
+    }
+
+
+def _to_number(value):
+    """
+    Returns the given result as a number (results files store times as
+    formatted strings), or None if it is missing.
+
+    :rtype: float
+    """
+    return None if value is None else float(value)
+
+
+def load_columns(connection, columns, where=None):
+    """
+    Returns the given columns of the rows of the store that match 'where', as
+    a dict of NumPy arrays, sorted by configuration and simulation number.
+
+    :param connection: see connect
+    :type connection: sqlite3.Connection
+    :param columns: the names of the columns to load
+    :type columns: list(string)
+    :param where: the value that each of the given columns must have, or None
+        to load all rows. Default: None.
+    :type where: dict
+    :rtype: dict
+    """
+    clause, params = _where_clause(where)
+    rows = connection.execute(
+        "SELECT {} FROM results{} ORDER BY {}, sim".format(
+            ", ".join(columns), clause, ", ".join(config_columns)),
+        params).fetchall()
+    if not rows:
+        return dict((column, np.array([])) for column in columns)
+    return dict((column, np.array(values))
+                for column, values in zip(columns, zip(*rows)))
+
+
+def _where_clause(where):
+    """
+    Returns an SQL WHERE clause (with a leading space, or empty) and its
+    parameters, requiring each of the given columns to have the given value.
+
+    :rtype: string, list
+    """
+    if not where:
+        return "", []
+    for column in where:
+        if column not in config_columns + ['sim'] + metric_columns:
+            raise ValueError("unknown column: " + str(column))
+    return " WHERE " + " AND ".join(c + " = ?" for c in where), \
+        list(where.values())
+
+
+def aggregate(connection, metric, group_by=None, where=None,
+              percentiles=(5, 50, 95), confidence=0.95):
+    """
+    Aggregates the given metric over the simulations of each group of rows
+    that have the same values for the 'group_by' columns. Returns a dict of
+    NumPy arrays, with one entry per group: the 'group_by' columns, and
+    'count', 'mean', 'std' (the sample standard deviation), 'ci_low' and
+    'ci_high' (the bounds of the normal-approximation confidence interval of
+    the mean), and 'p<q>' for each percentile q (linearly interpolated, as
+    numpy.percentile). Groups are sorted by the 'group_by' columns. The
+    statistics of all groups are computed together, with array operations.
+
+    :param connection: see connect
+    :type connection: sqlite3.Connection
+    :param metric: the name of the metric column to aggregate
+    :type metric: string
+    :param group_by: the columns to group by, or None to group by all the
+        configuration columns (i.e. aggregate over simulations). Default:
+        None.
+    :type group_by: list(string)
+    :param where: see load_columns
+    :type where: dict
+    :param percentiles: the percentiles to compute. Default: (5, 50, 95).
+    :type percentiles: iterable(float)
+    :param confidence: the level of the confidence interval. Default: 0.95.
+    :type confidence: float
+    :rtype: dict
+    """
+    from statistics import NormalDist
+
+    if group_by is None:
+        group_by = config_columns
+    if metric not in metric_columns:
+        raise ValueError("unknown metric: " + str(metric))
+    for column in group_by:
+        if column not in config_columns + ['sim']:
+            raise ValueError("unknown column: " + str(column))
+    where = dict(where or {})
+    clause, params = _where_clause(where)
+    clause += (" AND " if clause else " WHERE ") + metric + " IS NOT NULL"
+    rows = connection.execute(
+        "SELECT {}, {} FROM results{} ORDER BY {}, {}".format(
+            ", ".join(group_by), metric, clause, ", ".join(group_by), metric),
+        params).fetchall()
+    result = dict((column, np.array([])) for column in group_by)
+    if not rows:
+        for name in ['count', 'mean', 'std', 'ci_low', 'ci_high']:
+            result[name] = np.array([])
+        for q in percentiles:
+            result['p' + format(q, 'g')] = np.array([])
+        return result
+    columns = list(zip(*rows))
+    values = np.array(columns[-1], dtype=float)
+
+    # Rows are sorted by group, then by value, so each group is a contiguous,
+    # sorted run of values, starting wherever any group column changes.
+    changed = np.zeros(len(rows), dtype=bool)
+    changed[0] = True
+    for column in columns[:-1]:
+        column = np.array(column)
+        changed[1:] |= column[1:] != column[:-1]
+    starts = np.flatnonzero(changed)
+    counts = np.diff(np.append(starts, len(rows)))
+    for name, column in zip(group_by, columns[:-1]):
+        result[name] = np.array(column)[starts]
+
+    sums = np.add.reduceat(values, starts)
+    means = sums / counts
+    deviations = values - np.repeat(means, counts)
+    squares = np.add.reduceat(deviations * deviations, starts)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        stds = np.where(counts > 1, np.sqrt(squares / (counts - 1)), 0.0)
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    half_width = z * stds / np.sqrt(counts)
+    result['count'] = counts
+    result['mean'] = means
+    result['std'] = stds
+    result['ci_low'] = means - half_width
+    result['ci_high'] = means + half_width
+    for q in percentiles:
+        position = starts + (counts - 1) * (q / 100.0)
+        low = np.floor(position).astype(int)
+        high = np.ceil(position).astype(int)
+        result['p' + format(q, 'g')] = values[low] + \
+            (values[high] - values[low]) * (position - low)
+    return result
+
+
+def print_summary(connection, metric, group_by=None, where=None):
+    """
+    Prints a table of the aggregate statistics of the given metric; see
+    aggregate.
+    """
+    summary = aggregate(connection, metric, group_by, where)
+    names = list(summary.keys())
+    print("\t".join(names))
+    for i in range(len(summary['count'])):
+        print("\t".join(_format_cell(summary[name][i]) for name in names))
+
+
+def _format_cell(value):
+    """
+    Formats a value of an aggregate table for printing.
+
+    :rtype: string
+    """
+    if isinstance(value, (float, np.floating)):
+        return "{:.4f}".format(value)
+    return str(value)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Ingest simulation results into a result store, or print "
+                    "aggregate statistics from one.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    ingest_parser = subparsers.add_parser(
+        "ingest", help="add the results in JSON or JSON Lines files to the "
+                       "store")
+    ingest_parser.add_argument("store", help="the SQLite database file")
+    ingest_parser.add_argument("files", nargs='+',
+                               help="the results files to ingest")
+    summary_parser = subparsers.add_parser(
+        "summary", help="print aggregate statistics of a metric")
+    summary_parser.add_argument("store", help="the SQLite database file")
+    summary_parser.add_argument("--metric", default='cost_sum',
+                                choices=metric_columns,
+                                help="the metric to aggregate")
+    summary_parser.add_argument("--group-by", nargs='+',
+                                choices=config_columns,
+                                help="the columns to group by (default: all "
+                                     "configuration columns)")
+    args = parser.parse_args()
+
+    store = connect(args.store)
+    if args.command == 'ingest':
+        print("Ingested", ingest(store, args.files), "results.")
+    else:
+        print_summary(store, args.metric, args.group_by)
+    store.close()
@@ -1,15 +1,16 @@
 from Main import *
-import subprocess
+import utils
 
 
-def run_sims(verbose, a_star, h_name, vanilla, push):
+def run_sims(verbose, a_star, h_name, vanilla, push, symmetry=False,
+             cache_dir=None, jobs=1, checkpoint=None, memory=False,
+             ida_star=False, sma_star=False):
     """
     Runs a suite of simulations based on the level of 'push'. The other
-    parameters simply cause their command line equivalent to be passed to each
-    invocation of Main.py as a subprocess. Returns a list of tuples, where the
-    first item is an algorithm name, and the second is the name of the JSON
-    file generated by the underlying calls to Main.py (the list contains one
-    tuple for each file that is generated).
+    parameters are the same as the command line options of Main.py. Returns a
+    list of tuples, where the first item is an algorithm name, and the second
+    is the name of the JSON file generated for it, named as by Main.py (the
+    list contains one tuple for each file that is generated).
 
     :param verbose: more verbose output
     :param a_star: run simulations using (the slower) A* as well as the other
@@ -18,8 +19,42 @@ def run_sims(verbose, a_star, h_name, vanilla, push):
     :param vanilla: if True, use the vanilla state transition operator;
         otherwise use the regular state transition operator
     :param push: how much to push each parameter; choice of [0, 1, 2, 3, 4]
+    :param symmetry: if True, treat cars as interchangeable during search
+    :param cache_dir: the directory in which processed maps are cached, so
+        that each instance is only processed once across the whole suite; or
+        None to process every map in every run
+    :param jobs: the number of worker processes to run the suite in
+    :param checkpoint: the path of the file recording the progress of the
+        suite, so that it can be resumed if interrupted; or None to not
+        record progress (see run_points)
+    :param memory: if True, record the peak memory used by the search of
+        every simulation
+    :param ida_star: run simulations using IDA* as well as the other
+        algorithms, wherever A* would be run
+    :param sma_star: run simulations using SMA* as well as the other
+        algorithms, including with different limits on the number of states
+        it keeps in memory
     :rtype: list((string, string))
     """
+    points = build_points(a_star, h_name, vanilla, push, symmetry, cache_dir,
+                          memory, ida_star, sma_star)
+    return run_points(points, verbose, jobs, checkpoint)
+
+
+def build_points(a_star, h_name, vanilla, push, symmetry=False,
+                 cache_dir=None, memory=False, ida_star=False,
+                 sma_star=False):
+    """
+    Returns the list of points in the suite of simulations for the given
+    level of 'push'. Each point is a dictionary describing one set of
+    simulations of a single search algorithm; i.e. what a single output file
+    of Main.py describes. Points that the different parts of the suite have
+    in common (e.g. the default parameters, or A* and IDA* in every bound,
+    k_limit and max_nodes variation) are only included once. See run_sims
+    for the parameters.
+
+    :rtype: list(dict)
+    """
     # Set parameter ranges.
     if push == 0:
         num_sims = 1
@@ -29,8 +64,9 @@ def run_sims(verbose, a_star, h_name, vanilla, push):
         bound_percentage_set = [defaults['bound']]
         bound_cap_set = [1]
         k_limit_set = [defaults['k_limit']]
+        max_nodes_set = [defaults['max_nodes']]
     elif push == 1:
-        num_sims = str(defaults['num_sims'])
+        num_sims = defaults['num_sims']
         n_set = range(1, 4)
         k_set = range(1, 11)
         m_set = range(30, 301, 30)
@@ -38,8 +74,9 @@ def run_sims(verbose, a_star, h_name, vanilla, push):
                                 0.15, 0.25, 0.50]
         bound_cap_set = range(1, 20, 3)
         k_limit_set = range(1, 20, 3)
+        max_nodes_set = [1000, 3000, 10000, 30000]
     elif push == 2:
-        num_sims = str(5)
+        num_sims = 5
         n_set = range(4, 11)
         k_set = range(10, 31, 2)
         m_set = range(300, 1001, 100)
@@ -47,134 +84,379 @@ def run_sims(verbose, a_star, h_name, vanilla, push):
                                 0.15]
         bound_cap_set = range(1, 14, 3)
         k_limit_set = range(1, 14, 3)
+        max_nodes_set = [10000, 30000, 100000]
     elif push == 3:
-        num_sims = str(2)
+        num_sims = 2
         n_set = range(11, 32, 4)
         k_set = range(30, 61, 5)
         m_set = range(1000, 5001, 1000)
         bound_percentage_set = [0.01, 0.02, 0.03, 0.04, 0.05, 0.07]
         bound_cap_set = range(1, 8, 3)
         k_limit_set = range(1, 8, 3)
+        max_nodes_set = [100000, 300000]
     else:
-        num_sims = str(1)
+        num_sims = 1
         n_set = [32, 64]
         k_set = [70, 100]
         m_set = [10000]
         bound_percentage_set = [0.0001]
         bound_cap_set = [1]
         k_limit_set = [2]
+        max_nodes_set = [1000000]
 
-    # Run the simulations.
-    file_names = []
+    state_type = 'VanillaState' if vanilla else 'State'
+    common = {
+        'num_sims': num_sims,
+        'h_name': h_name,
+        'state_type': state_type,
+        'symmetry': symmetry,
+        'cache_dir': cache_dir,
+        'memory': memory
+    }
+    a_star_algorithms = (['a_star'] if a_star else []) + \
+        (['ida_star'] if ida_star else [])
+    algorithms = a_star_algorithms + ['bounded_a_star', 'local_beam'] + \
+        (['sma_star'] if sma_star else [])
+    points = []
 
     # Vary the number of cars.
     for n in n_set:
-        arg_list = build_arg_list(verbose, a_star, num_sims, h_name, vanilla)
-        arg_list.extend(["-n", str(n)])
-        if n > defaults['k']:
-            arg_list.extend(["-k", str(n + 1)])
-        do_run(arg_list, get_file_names(num_sims=num_sims, n=n, h_name=h_name),
-               file_names, a_star=a_star)
+        k = n + 1 if n > defaults['k'] else defaults['k']
+        for algorithm in algorithms:
+            points.append(make_point(algorithm, n=n, k=k, **common))
 
     # Vary the number of packages.
     for k in k_set:
-        arg_list = build_arg_list(verbose, a_star, num_sims, h_name, vanilla)
-        arg_list.extend(["-k", str(k)])
-        do_run(arg_list, get_file_names(num_sims=num_sims, k=k, h_name=h_name),
-               file_names, a_star=a_star)
+        for algorithm in algorithms:
+            points.append(make_point(algorithm, k=k, **common))
 
     # Vary the number of locations.
     for m in m_set:
-        arg_list = build_arg_list(verbose, a_star, num_sims, h_name, vanilla)
-        arg_list.extend(["-m", str(m)])
-        do_run(arg_list, get_file_names(num_sims=num_sims, m=m, h_name=h_name),
-               file_names, a_star=a_star)
-
-    max_n = str(max(n_set))
-    max_k = str(max(k_set))
-    max_m = str(max(m_set))
-
-    # Vary the bound for bounded A* as a percentage.
-    for bound in bound_percentage_set:
-        arg_list = build_arg_list(verbose, a_star, num_sims, h_name, vanilla,
-                                  local_beam=False)
-        arg_list.extend(["-n", max_n, "-k", max_k, "-m", max_m, "--bound",
-                         str(bound)])
-        do_run(arg_list, get_file_names(num_sims=num_sims, n=max_n, k=max_k,
-                                        m=max_m, h_name=h_name, bound=bound),
-               file_names, a_star=a_star, local_beam=False)
-
-    # Vary the bound for bounded A* as a cap.
-    for bound in bound_cap_set:
-        arg_list = build_arg_list(verbose, a_star, num_sims, h_name, vanilla,
-                                  local_beam=False)
-        arg_list.extend(["-n", max_n, "-k", max_k, "-m", max_m, "--bound",
-                         str(bound)])
-        do_run(arg_list, get_file_names(num_sims=num_sims, n=max_n, k=max_k,
-                                        m=max_m, h_name=h_name, bound=bound),
-               file_names, a_star=a_star, local_beam=False)
+        for algorithm in algorithms:
+            points.append(make_point(algorithm, m=m, **common))
+
+    max_n = max(n_set)
+    max_k = max(k_set)
+    max_m = max(m_set)
+
+    # Vary the bound for bounded A*, first as a percentage, then as a cap.
+    for bound in list(bound_percentage_set) + list(bound_cap_set):
+        for algorithm in a_star_algorithms + ['bounded_a_star']:
+            points.append(make_point(algorithm, n=max_n, k=max_k, m=max_m,
+                                     bound=bound, **common))
 
     # Vary k_limit for Local Beam Search.
     for k_limit in k_limit_set:
-        arg_list = build_arg_list(verbose, a_star, num_sims, h_name, vanilla,
-                                  bounded_a_star=False)
-        arg_list.extend(["-n", max_n, "-k", max_k, "-m", max_m, "--k-limit",
-                         str(k_limit)])
-        do_run(arg_list, get_file_names(num_sims=num_sims, n=max_n, k=max_k,
-                                        m=max_m, h_name=h_name,
-                                        k_limit=k_limit),
-               file_names, a_star=a_star, bounded_a_star=False)
+        for algorithm in a_star_algorithms + ['local_beam']:
+            points.append(make_point(algorithm, n=max_n, k=max_k, m=max_m,
+                                     k_limit=k_limit, **common))
 
-    return file_names
+    # Vary max_nodes for SMA*.
+    for max_nodes in max_nodes_set if sma_star else []:
+        for algorithm in a_star_algorithms + ['sma_star']:
+            points.append(make_point(algorithm, n=max_n, k=max_k, m=max_m,
+                                     max_nodes=max_nodes, **common))
+
+    unique_points = {}
+    for point in points:
+        unique_points.setdefault(get_point_file_name(point), point)
+    return list(unique_points.values())
+
+
+def make_point(algorithm, num_sims=defaults['num_sims'], n=defaults['n'],
+               k=defaults['k'], m=defaults['m'], h_name=defaults['h_name'],
+               state_type=defaults['state_type'], bound=defaults['bound'],
+               k_limit=defaults['k_limit'], symmetry=defaults['symmetry'],
+               cache_dir=defaults['cache_dir'], memory=defaults['memory'],
+               max_nodes=defaults['max_nodes']):
+    """
+    Returns a point of a suite of simulations: a dictionary describing one
+    set of simulations of the given search algorithm, with the given
+    parameters (see Main.py). Parameters that the algorithm does not use
+    (the bound, for any algorithm other than Bounded A*, k_limit, for any
+    algorithm other than Local Beam Search, and max_nodes, for any algorithm
+    other than SMA*) are left at their defaults. The
+    cache directory, and whether memory is measured, only affect how the
+    simulations are run, not their names.
+
+    :param algorithm: one of 'a_star', 'bounded_a_star', 'local_beam',
+        'ida_star', or 'sma_star'
+    :type algorithm: string
+    :rtype: dict
+    """
+    if algorithm != 'bounded_a_star':
+        bound = defaults['bound']
+    if algorithm != 'local_beam':
+        k_limit = defaults['k_limit']
+    if algorithm != 'sma_star':
+        max_nodes = defaults['max_nodes']
+    return {
+        'algorithm': algorithm,
+        'num_sims': num_sims,
+        'n': n,
+        'k': k,
+        'm': m,
+        'h_name': h_name,
+        'state_type': state_type,
+        'bound': bound,
+        'k_limit': k_limit,
+        'max_nodes': max_nodes,
+        'symmetry': symmetry,
+        'cache_dir': cache_dir,
+        'memory': memory
+    }
 
 
-def build_arg_list(verbose, a_star, num_sims, h_name, vanilla,
-                   bounded_a_star=True, local_beam=True):
+def get_point_file_name(point):
     """
-    Builds a list of arguments to give to subprocess.run() to run Main.py. The
-    given parameters simply cause their command line equivalent to be added to
-    the argument list.
+    Returns the name of the JSON file that the results of the given point are
+    written to; the same name that Main.py would use.
 
-    :rtype: list(string)
+    :param point: see make_point
+    :type point: dict
+    :rtype: string
     """
-    arg_list = ["python3", "Main.py", "--num-sims", str(num_sims),
-                "--heuristic", h_name]
-    if verbose:
-        arg_list.append("-v")
-    if a_star:
-        arg_list.append("-a")
-    if vanilla:
-        arg_list.append("--vanilla")
-    if bounded_a_star:
-        arg_list.append("-b")
-    if local_beam:
-        arg_list.append("-l")
-    return arg_list
+    names = get_file_names(point['num_sims'], point['n'], point['k'],
+                           point['m'], point['h_name'], point['state_type'],
+                           point['bound'], point['k_limit'],
+                           point['symmetry'], point['max_nodes'])
+    return names[point['algorithm']] + ".json"
 
 
-def do_run(arg_list, names, file_names, a_star=False, bounded_a_star=True,
-           local_beam=True):
+def run_point_sim(point, i, verbose=False):
     """
-    Runs arg_list as a subprocess, and checks the return code. Raises an error
-    if it is non-zero. Otherwise, adds the correct file names to the given
-    'file_names' list, based on the values of 'a_star', 'bounded_a_star', and
-    'local_beam'.
+    Runs the i'th simulation of the given point in this process, and returns
+    its results.
+
+    :param point: see make_point
+    :type point: dict
+    :param i: the simulation number, which seeds the random problem
+    :type i: int
+    :param verbose: if true, print simulation number before the simulation
+    :type verbose: bool
+    :rtype: dict
+    """
+    from search import a_star_any_graph, bounded_a_star_any_graph, \
+        local_beam_any_graph, ida_star_any_graph, sma_star_any_graph
+    from simulation import _run_simulation
+
+    h = heuristics[point['h_name']][point['state_type']]
+    if point['algorithm'] == 'a_star':
+        search_alg, args = a_star_any_graph, ()
+    elif point['algorithm'] == 'bounded_a_star':
+        search_alg, args = bounded_a_star_any_graph, (point['bound'],)
+    elif point['algorithm'] == 'local_beam':
+        search_alg, args = local_beam_any_graph, (point['k_limit'],)
+    elif point['algorithm'] == 'ida_star':
+        search_alg, args = ida_star_any_graph, ()
+    else:
+        search_alg, args = sma_star_any_graph, (point['max_nodes'],)
+    kwargs = {'symmetry': point['symmetry'], 'cache_dir': point['cache_dir'],
+              'memory': point.get('memory', False)}
+    return _run_simulation(point['n'], point['k'], point['m'], h, search_alg,
+                           point['state_type'], verbose, args, kwargs, i)
+
+
+def get_point_results(point, data, jobs=1):
+    """
+    Returns the results of the given point, given the results of each of its
+    simulations, in the same form as Main.py writes them.
+
+    :param point: see make_point
+    :type point: dict
+    :param data: the results of each simulation, in order
+    :type data: list(dict)
+    :param jobs: the number of worker processes used. Default: 1.
+    :type jobs: int
+    :rtype: dict
+    """
+    results = {
+        'num_sims': point['num_sims'],
+        'n': point['n'],
+        'k': point['k'],
+        'm': point['m'],
+        'state_type': point['state_type'],
+        'jobs': jobs,
+        'data': data,
+        'algorithm': point['algorithm'],
+        'h_name': point['h_name']
+    }
+    if point['algorithm'] == 'bounded_a_star':
+        results['bound'] = point['bound']
+    elif point['algorithm'] == 'local_beam':
+        results['k_limit'] = point['k_limit']
+    elif point['algorithm'] == 'sma_star':
+        results['max_nodes'] = point['max_nodes']
+    return results
+
+
+class CheckpointMismatchError(ValueError):
+    """
+    Raised when a checkpoint file records simulations that were run with
+    different options from the current run.
+    """
+
+
+def get_point_run_config(point):
     """
-    subprocess.run(arg_list).check_returncode()
-    a_star_tuple = ('a_star', names['a_star'] + ".json")
-    if a_star and a_star_tuple not in file_names:
-        file_names.append(a_star_tuple)
-    bounded_a_star_tuple = ('bounded_a_star',
-                            names['bounded_a_star'] + ".json")
-    if bounded_a_star and bounded_a_star_tuple not in file_names:
-        file_names.append(bounded_a_star_tuple)
-    local_beam_tuple = ('local_beam', names['local_beam'] + ".json")
-    if local_beam and local_beam_tuple not in file_names:
-        file_names.append(local_beam_tuple)
+    Returns the options of the given point that do not affect its name, but
+    do affect the results of its simulations (whether memory is measured
+    adds 'peak_memory', and the cache directory changes the pre-processing
+    times), as recorded with each of its results in a checkpoint file.
+
+    :param point: see make_point
+    :type point: dict
+    :rtype: dict
+    """
+    return {'memory': point.get('memory', False),
+            'cache_dir': point['cache_dir']}
+
+
+def read_checkpoint(path):
+    """
+    Returns the entries recorded in the given checkpoint file, as a dict
+    from (point file name, simulation number) pairs to entries; each entry
+    is a dict with the simulation's 'result' and, unless the file was
+    written before it was recorded, the 'config' it was run with (see
+    get_point_run_config). Returns an empty dict if the file does not exist.
+
+    :param path: the path of the checkpoint file
+    :type path: string
+    :rtype: dict
+    """
+    import os
+
+    if not os.path.exists(path):
+        return {}
+    return dict(((entry['point'], entry['sim']), entry)
+                for entry in utils.read_json_lines(path))
+
+
+def _truncate_partial_line(path):
+    """
+    Removes a final line that was cut short (e.g. by an interrupted write)
+    from the given file, if any, so that more lines can be appended to it.
+
+    :param path: the path of the file
+    :type path: string
+    """
+    import os
+
+    if not os.path.exists(path):
+        return
+    with open(path, 'rb+') as checkpoint_file:
+        contents = checkpoint_file.read()
+        if contents and not contents.endswith(b"\n"):
+            checkpoint_file.truncate(contents.rfind(b"\n") + 1)
+
+
+def run_points(points, verbose=False, jobs=1, checkpoint=None):
+    """
+    Runs the simulations for each of the given points, and writes the results
+    of each point to its JSON file (see get_point_file_name) as soon as all
+    of its simulations are done. All simulations are run within this Python
+    process, or, if more than one job is requested, in a pool of worker
+    processes, so that imports, and the random instances that are generated,
+    are shared between points. Returns a list of tuples, where the first item
+    is an algorithm name, and the second is the name of the JSON file of a
+    point, without repetitions, in order of the points.
+
+    If a checkpoint file is given, the result of each simulation is appended
+    to it (as a line of JSON) as soon as the simulation is done, and the
+    simulations already recorded in it are not run again. An interrupted
+    sweep can thus be resumed by running it again with the same checkpoint.
+    A CheckpointMismatchError is raised if any of those simulations were run
+    with different options (see get_point_run_config), since their results
+    would not match the others.
+
+    :param points: the points to run; see make_point
+    :type points: list(dict)
+    :param verbose: more verbose output
+    :type verbose: bool
+    :param jobs: the number of worker processes to run the simulations in; if
+        1, they are run one after another in this process. Default: 1.
+    :type jobs: int
+    :param checkpoint: the path of the checkpoint file, or None to not
+        record nor resume progress. Default: None.
+    :type checkpoint: string
+    :rtype: list((string, string))
+    """
+    import json
+
+    names = [get_point_file_name(point) for point in points]
+    done = {} if checkpoint is None else read_checkpoint(checkpoint)
+    results = dict((name, {}) for name in names)
+    configs = dict((name, get_point_run_config(point))
+                   for point, name in zip(points, names))
+    for (name, i), entry in done.items():
+        if name not in results:
+            continue
+        if entry.get('config') != configs[name]:
+            raise CheckpointMismatchError(
+                "simulation {} of {} in checkpoint {} was run with options "
+                "{}, not {}; use --fresh to start from scratch".format(
+                    i, name, checkpoint, entry.get('config'), configs[name]))
+        results[name][i] = entry['result']
+    tasks = [(point, i) for point, name in zip(points, names)
+             for i in range(point['num_sims']) if i not in results[name]]
+    if verbose and len(tasks) < sum(p['num_sims'] for p in points):
+        print("Resuming:", len(tasks), "simulations left", flush=True)
+
+    def write_if_done(point, name):
+        point_results = results[name]
+        if len(point_results) == point['num_sims']:
+            data = [point_results[i] for i in range(point['num_sims'])]
+            utils.dump_json_data(name[:-len(".json")],
+                                 get_point_results(point, data, jobs))
+
+    def record(point, i, result):
+        name = get_point_file_name(point)
+        results[name][i] = result
+        if out is not None:
+            out.write(json.dumps({'point': name, 'sim': i,
+                                  'config': get_point_run_config(point),
+                                  'result': result}) + "\n")
+            out.flush()
+        write_if_done(point, name)
+
+    pending = set(id(task[0]) for task in tasks)
+    for point, name in zip(points, names):
+        if id(point) not in pending:
+            write_if_done(point, name)  # Already done in a previous run.
+    out = None
+    if checkpoint is not None:
+        _truncate_partial_line(checkpoint)
+        out = open(checkpoint, 'a')
+    try:
+        if jobs > 1 and len(tasks) > 1:
+            from concurrent.futures import ProcessPoolExecutor, as_completed
+
+            pool = ProcessPoolExecutor(max_workers=jobs)
+            try:
+                futures = dict((pool.submit(run_point_sim, point, i, verbose),
+                                (point, i)) for point, i in tasks)
+                for future in as_completed(futures):
+                    point, i = futures[future]
+                    record(point, i, future.result())
+            finally:
+                pool.shutdown(wait=False, cancel_futures=True)
+        else:
+            for point, i in tasks:
+                record(point, i, run_point_sim(point, i, verbose))
+    finally:
+        if out is not None:
+            out.close()
+
+    file_names = []
+    for point, name in zip(points, names):
+        if (point['algorithm'], name) not in file_names:
+            file_names.append((point['algorithm'], name))
+    return file_names
 
 
 if __name__ == "__main__":
     import argparse
+    import os
 
     # Define command line arguments.
     parser = argparse.ArgumentParser(
@@ -187,21 +469,58 @@ if __name__ == "__main__":
                         help="run simulations using A* Search in addition to "
                              "the default Bounded A* Search and Local Beam "
                              "Search")
+    parser.add_argument("-i", "--ida-star", action='store_true',
+                        help="run simulations using IDA* Search wherever A* "
+                             "Search would be run")
+    parser.add_argument("-s", "--sma-star", action='store_true',
+                        help="run simulations using SMA* Search as well, "
+                             "including with different limits on the "
+                             "number of states it keeps in memory")
     parser.add_argument("--heuristic", default=defaults['h_name'],
                         choices=['zero', 'undelivered', 'scaled', 'sum'],
                         help="heuristic function to use")
     parser.add_argument("--vanilla", action='store_true',
                         help="run simulations with vanilla state transitions")
+    parser.add_argument("--symmetry", action='store_true',
+                        help="treat cars as interchangeable during search")
+    parser.add_argument("--cache-dir", default=".world_cache",
+                        help="directory in which processed maps are cached "
+                             "and reused across all runs")
+    parser.add_argument("--no-cache", action='store_true',
+                        help="process every map in every run instead of "
+                             "using the cache")
     parser.add_argument("--make-plots", action='store_true',
                         help="make aggregate plots of resulting data")
     parser.add_argument("-p", "--push", type=int, default=0,
                         choices=[0, 1, 2, 3, 4],
                         help="how far to push each parameter")
+    parser.add_argument("-j", "--jobs", type=parse_positive_int, default=1,
+                        help="number of worker processes to run the "
+                             "simulations in")
+    parser.add_argument("--checkpoint", default="sweep_checkpoint.jsonl",
+                        help="file in which the result of each simulation is "
+                             "recorded as soon as it is done; simulations "
+                             "already recorded there are not run again")
+    parser.add_argument("--fresh", action='store_true',
+                        help="discard the checkpoint file and start the "
+                             "suite from scratch")
+    parser.add_argument("--memory", action='store_true',
+                        help="record the peak memory used by the search of "
+                             "every simulation (this slows the searches "
+                             "down)")
 
     # Parse command line arguments and run the simulations.
     args = parser.parse_args()
-    files = run_sims(args.verbose, args.a_star, args.heuristic, args.vanilla,
-                     args.push)
+    if args.fresh and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+    try:
+        files = run_sims(args.verbose, args.a_star, args.heuristic,
+                         args.vanilla, args.push, args.symmetry,
+                         None if args.no_cache else args.cache_dir,
+                         args.jobs, args.checkpoint, args.memory,
+                         args.ida_star, args.sma_star)
+    except CheckpointMismatchError as e:
+        parser.error(str(e))
     if args.make_plots:
         from make_plots import make_plots
 
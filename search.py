@@ -1,17 +1,20 @@
 import timing
 from State import *
+from heapqueue import open_lists
 
 
-def a_star_any_graph(n, k, m, full_map, pairs, state_type, h, num_sols=1):
+def a_star_any_graph(n, k, m, full_map, pairs, state_type, h, num_sols=1,
+                     open_list='heap', prune_duplicates=True, symmetry=False,
+                     cache_dir=None, world=None, spans=False,
+                     memory=False):
     """
     Runs A* with the specified heuristic on the given problem. The problem
     definition involves n, k, m, a map, and source-destination pairs. The
     number of solutions to generate can be specified, but if the heuristic 'h'
     is admissible, the first solution generated will always be the optimal
-    solution. Returns a dictionary of search results. Although, the number of
-    solutions to generate can be specified, and some search results will be
-    returned regardless, most search results are only given if the number of
-    solutions to generate is 1.
+    solution. Returns a dictionary of search results. If more than one
+    solution is requested, they are all collected from a single, continued
+    search, and listed as 'solutions'; see _do_run_search.
 
     :param n: the number of cars in this problem
     :type n: int
@@ -34,24 +37,55 @@ def a_star_any_graph(n, k, m, full_map, pairs, state_type, h, num_sols=1):
     :param num_sols: the number of solutions that should be generated, or -1 if
         all possible solutions should be generated. Default: 1.
     :type num_sols: int
+    :param open_list: the name of the open list implementation to use; one of
+        the keys of heapqueue.open_lists. Default: 'heap'.
+    :type open_list: string
+    :param prune_duplicates: if True, states that were already reached at
+        least as cheaply are pruned, and the number of pruned states is
+        reported as 'duplicates_pruned'. Default: True.
+    :type prune_duplicates: bool
+    :param symmetry: if True, cars are treated as interchangeable: states
+        that differ only by a permutation of the cars are considered
+        duplicates, and, for 'State', only one representative successor is
+        generated for each group of co-located cars. Default: False.
+    :type symmetry: bool
+    :param cache_dir: the directory of the on-disk cache of processed maps,
+        or None to always process the map; see World.process_map. Default:
+        None.
+    :type cache_dir: string
+    :param world: the World of this problem, already processed (e.g. shared
+        with other searches on the same problem), or None to build and
+        process one. The reported pre-processing time is the time it took to
+        process the given World. Default: None.
+    :type world: World
+    :param spans: if True, the time spent in each part of the search is
+        recorded, and reported as 'spans'; see _run_search. Default: False.
+    :type spans: bool
+    :param memory: if True, the peak memory used is reported; see
+        _run_search. Default: False.
+    :type memory: bool
     :rtype: dict
     """
     from astar import a_star_count_nodes
     data = _run_search(n, k, m, full_map, pairs, num_sols, state_type, h,
-                       a_star_count_nodes)
+                       open_list, symmetry, cache_dir, world, spans,
+                       memory, a_star_count_nodes,
+                       key=_get_key(prune_duplicates, symmetry), stats={})
     data['algorithm'] = 'a_star'
     return data
 
 
 def bounded_a_star_any_graph(n, k, m, full_map, pairs, state_type, h, bound,
-                             num_sols=1):
+                             num_sols=1, open_list='heap',
+                             prune_duplicates=True, symmetry=False,
+                             cache_dir=None, world=None, spans=False,
+                             memory=False):
     """
     Runs Bounded A* with the specified heuristic on the given problem. The
     problem definition involves n, k, m, a map, and source-destination pairs.
-    Returns a dictionary of search results. Although, the number of solutions
-    to generate can be specified, and some search results will be returned
-    regardless, most search results are only given if the number of solutions
-    to generate is 1.
+    Returns a dictionary of search results. If more than one solution is
+    requested, they are all collected from a single, continued search, and
+    listed as 'solutions'; see _do_run_search.
 
     :param n: the number of cars in this problem
     :type n: int
@@ -80,25 +114,55 @@ def bounded_a_star_any_graph(n, k, m, full_map, pairs, state_type, h, bound,
     :param num_sols: the number of solutions that should be generated, or -1 if
         all possible solutions should be generated. Default: 1.
     :type num_sols: int
+    :param open_list: the name of the open list implementation to use; one of
+        the keys of heapqueue.open_lists. Default: 'heap'.
+    :type open_list: string
+    :param prune_duplicates: if True, states that were already reached at
+        least as cheaply are pruned, and the number of pruned states is
+        reported as 'duplicates_pruned'. Default: True.
+    :type prune_duplicates: bool
+    :param symmetry: if True, cars are treated as interchangeable: states
+        that differ only by a permutation of the cars are considered
+        duplicates, and, for 'State', only one representative successor is
+        generated for each group of co-located cars. Default: False.
+    :type symmetry: bool
+    :param cache_dir: the directory of the on-disk cache of processed maps,
+        or None to always process the map; see World.process_map. Default:
+        None.
+    :type cache_dir: string
+    :param world: the World of this problem, already processed (e.g. shared
+        with other searches on the same problem), or None to build and
+        process one. The reported pre-processing time is the time it took to
+        process the given World. Default: None.
+    :type world: World
+    :param spans: if True, the time spent in each part of the search is
+        recorded, and reported as 'spans'; see _run_search. Default: False.
+    :type spans: bool
+    :param memory: if True, the peak memory used is reported; see
+        _run_search. Default: False.
+    :type memory: bool
     :rtype: dict
     """
     from astar import bounded_a_star
     data = _run_search(n, k, m, full_map, pairs, num_sols, state_type, h,
-                       bounded_a_star, bound)
+                       open_list, symmetry, cache_dir, world, spans,
+                       memory, bounded_a_star, bound,
+                       key=_get_key(prune_duplicates, symmetry), stats={})
     data['algorithm'] = 'bounded_a_star'
     data['bound'] = bound
     return data
 
 
 def local_beam_any_graph(n, k, m, full_map, pairs, state_type, h, k_limit,
-                         num_sols=1):
+                         num_sols=1, open_list='heap', symmetry=False,
+                         cache_dir=None, world=None, spans=False,
+                         memory=False):
     """
     Runs Local Beam Search with the specified heuristic on the given problem.
     The problem definition involves n, k, m, a map, and source-destination
-    pairs. Returns a dictionary of search results. Although, the number of
-    solutions to generate can be specified, and some search results will be
-    returned regardless, most search results are only given if the number of
-    solutions to generate is 1.
+    pairs. Returns a dictionary of search results. If more than one solution
+    is requested, they are all collected from a single, continued search,
+    and listed as 'solutions'; see _do_run_search.
 
     :param n: the number of cars in this problem
     :type n: int
@@ -124,25 +188,213 @@ def local_beam_any_graph(n, k, m, full_map, pairs, state_type, h, k_limit,
     :param num_sols: the number of solutions that should be generated, or -1 if
         all possible solutions should be generated. Default: 1.
     :type num_sols: int
+    :param open_list: the name of the open list implementation to use; one of
+        the keys of heapqueue.open_lists. Default: 'heap'.
+    :type open_list: string
+    :param symmetry: if True, and for 'State' only, cars are treated as
+        interchangeable, and only one representative successor is generated
+        for each group of co-located cars. Default: False.
+    :type symmetry: bool
+    :param cache_dir: the directory of the on-disk cache of processed maps,
+        or None to always process the map; see World.process_map. Default:
+        None.
+    :type cache_dir: string
+    :param world: the World of this problem, already processed (e.g. shared
+        with other searches on the same problem), or None to build and
+        process one. The reported pre-processing time is the time it took to
+        process the given World. Default: None.
+    :type world: World
+    :param spans: if True, the time spent in each part of the search is
+        recorded, and reported as 'spans'; see _run_search. Default: False.
+    :type spans: bool
+    :param memory: if True, the peak memory used is reported; see
+        _run_search. Default: False.
+    :type memory: bool
     :rtype: dict
     """
     from localbeam import local_beam_search
     data = _run_search(n, k, m, full_map, pairs, num_sols, state_type, h,
-                       local_beam_search, k_limit)
+                       open_list, symmetry, cache_dir, world, spans,
+                       memory, local_beam_search, k_limit, stats={})
     data['algorithm'] = 'local_beam'
     data['k_limit'] = k_limit
     return data
 
 
-def _run_search(n, k, m, full_map, pairs, num_sols, state_type, h, algorithm,
-                *args, **kwargs):
+def ida_star_any_graph(n, k, m, full_map, pairs, state_type, h, num_sols=1,
+                       open_list='heap', prune_duplicates=True, symmetry=False,
+                       cache_dir=None, world=None, spans=False,
+                       memory=False):
+    """
+    Runs IDA* with the specified heuristic on the given problem; see
+    idastar.ida_star. The problem definition involves n, k, m, a map, and
+    source-destination pairs. If the heuristic 'h' is admissible, the first
+    solution generated will always be the optimal solution. Returns a
+    dictionary of search results, which also include the number of
+    iterations of the search, as 'iterations'. If more than one solution is
+    requested, they are all collected from a single, continued search, and
+    listed as 'solutions'; see _do_run_search.
+
+    :param n: the number of cars in this problem
+    :type n: int
+    :param k: the number of packages in this problem
+    :type k: int
+    :param m: the number of vertices in the full map for this problem
+    :type m: int
+    :param full_map: the full map of all locations for the problem. It could be
+        generated randomly or predefined.
+    :type full_map: NetworkX Graph
+    :param pairs: a list of source-destination pairs of all the packages in the
+        problem. Each source and each destination must correspond to a location
+        in the full map.
+    :type pairs: list((int, int))
+    :param state_type: a string describing what type of state should be used;
+        currently, one of 'State' or 'VanillaState'
+    :type state_type: string
+    :param h: the heuristic function that IDA* will use
+    :type h: X => float, where X is the type corresponding to 'state_type'
+    :param num_sols: the number of solutions that should be generated, or -1 if
+        all possible solutions should be generated. Default: 1.
+    :type num_sols: int
+    :param open_list: unused, since IDA* has no open list; accepted so that
+        IDA* can be run like the other search algorithms. Default: 'heap'.
+    :type open_list: string
+    :param prune_duplicates: if True, states that are already on the current
+        path are pruned, and the number of pruned states is reported as
+        'duplicates_pruned'. Default: True.
+    :type prune_duplicates: bool
+    :param symmetry: if True, cars are treated as interchangeable: states
+        that differ only by a permutation of the cars are considered
+        duplicates, and, for 'State', only one representative successor is
+        generated for each group of co-located cars. Default: False.
+    :type symmetry: bool
+    :param cache_dir: the directory of the on-disk cache of processed maps,
+        or None to always process the map; see World.process_map. Default:
+        None.
+    :type cache_dir: string
+    :param world: the World of this problem, already processed (e.g. shared
+        with other searches on the same problem), or None to build and
+        process one. The reported pre-processing time is the time it took to
+        process the given World. Default: None.
+    :type world: World
+    :param spans: if True, the time spent in each part of the search is
+        recorded, and reported as 'spans'; see _run_search. Default: False.
+    :type spans: bool
+    :param memory: if True, the peak memory used is reported; see
+        _run_search. Default: False.
+    :type memory: bool
+    :rtype: dict
+    """
+    from idastar import ida_star
+    data = _run_search(n, k, m, full_map, pairs, num_sols, state_type, h,
+                       open_list, symmetry, cache_dir, world, spans,
+                       memory, ida_star,
+                       key=_get_key(prune_duplicates, symmetry), stats={})
+    data['algorithm'] = 'ida_star'
+    return data
+
+
+def sma_star_any_graph(n, k, m, full_map, pairs, state_type, h, max_nodes,
+                       num_sols=1, open_list='heap', prune_duplicates=True,
+                       symmetry=False, cache_dir=None, world=None,
+                       spans=False, memory=False):
+    """
+    Runs SMA* with the specified heuristic on the given problem; see
+    astar.sma_star. The problem definition involves n, k, m, a map, and
+    source-destination pairs. If the heuristic 'h' is admissible, and
+    'max_nodes' is larger than the number of moves of the optimal solution,
+    the first solution generated will always be the optimal solution.
+    Returns a dictionary of search results, which also include the number
+    of states forgotten, as 'forgotten'. If more than one solution is
+    requested, they are all collected from a single, continued search, and
+    listed as 'solutions'; see _do_run_search.
+
+    :param n: the number of cars in this problem
+    :type n: int
+    :param k: the number of packages in this problem
+    :type k: int
+    :param m: the number of vertices in the full map for this problem
+    :type m: int
+    :param full_map: the full map of all locations for the problem. It could be
+        generated randomly or predefined.
+    :type full_map: NetworkX Graph
+    :param pairs: a list of source-destination pairs of all the packages in the
+        problem. Each source and each destination must correspond to a location
+        in the full map.
+    :type pairs: list((int, int))
+    :param state_type: a string describing what type of state should be used;
+        currently, one of 'State' or 'VanillaState'
+    :type state_type: string
+    :param h: the heuristic function that SMA* will use
+    :type h: X => float, where X is the type corresponding to 'state_type'
+    :param max_nodes: the largest number of states that SMA* keeps in memory
+    :type max_nodes: int
+    :param num_sols: the number of solutions that should be generated, or -1 if
+        all possible solutions should be generated. Default: 1.
+    :type num_sols: int
+    :param open_list: the name of the open list implementation to use; one of
+        the keys of heapqueue.open_lists. Default: 'heap'.
+    :type open_list: string
+    :param prune_duplicates: if True, states that are the same as a state
+        in memory reached at least as cheaply are pruned, and the number of
+        pruned states is reported as 'duplicates_pruned'. Default: True.
+    :type prune_duplicates: bool
+    :param symmetry: if True, cars are treated as interchangeable: states
+        that differ only by a permutation of the cars are considered
+        duplicates, and, for 'State', only one representative successor is
+        generated for each group of co-located cars. Default: False.
+    :type symmetry: bool
+    :param cache_dir: the directory of the on-disk cache of processed maps,
+        or None to always process the map; see World.process_map. Default:
+        None.
+    :type cache_dir: string
+    :param world: the World of this problem, already processed (e.g. shared
+        with other searches on the same problem), or None to build and
+        process one. The reported pre-processing time is the time it took to
+        process the given World. Default: None.
+    :type world: World
+    :param spans: if True, the time spent in each part of the search is
+        recorded, and reported as 'spans'; see _run_search. Default: False.
+    :type spans: bool
+    :param memory: if True, the peak memory used is reported; see
+        _run_search. Default: False.
+    :type memory: bool
+    :rtype: dict
+    """
+    from astar import sma_star
+    data = _run_search(n, k, m, full_map, pairs, num_sols, state_type, h,
+                       open_list, symmetry, cache_dir, world, spans,
+                       memory, sma_star, max_nodes,
+                       key=_get_key(prune_duplicates, symmetry), stats={})
+    data['algorithm'] = 'sma_star'
+    data['max_nodes'] = max_nodes
+    return data
+
+
+def _get_key(prune_duplicates, symmetry):
+    """
+    Returns the function giving the canonical key of a state for duplicate
+    detection, or None if duplicates should not be pruned.
+
+    :param prune_duplicates: whether duplicate states should be pruned
+    :type prune_duplicates: bool
+    :param symmetry: whether cars should be treated as interchangeable
+    :type symmetry: bool
+    :rtype: X => hashable, where X is a state type
+    """
+    if not prune_duplicates:
+        return None
+    return symmetric_state_key if symmetry else state_key
+
+
+def _run_search(n, k, m, full_map, pairs, num_sols, state_type, h, open_list,
+                symmetry, cache_dir, world, spans, memory, algorithm, *args,
+                **kwargs):
     """
     Runs the given search algorithm with the specified heuristic on the given
     problem. The problem definition involves n, k, m, a map, and source-
-    destination pairs. Returns a dictionary of search results. The number of
-    solutions to generate can be specified, and some search results will be
-    returned regardless, however, most search results are only given if the
-    number of solutions to generate is 1.
+    destination pairs. Returns a dictionary of search results; see
+    _do_run_search.
 
     :param n: the number of cars in this problem
     :type n: int
@@ -165,6 +417,36 @@ def _run_search(n, k, m, full_map, pairs, num_sols, state_type, h, algorithm,
     :type state_type: string
     :param h: the heuristic function that 'algorithm' will use
     :type h: X => float, where X is the type corresponding to 'state_type'
+    :param open_list: the name of the open list implementation that
+        'algorithm' will use; one of the keys of heapqueue.open_lists
+    :type open_list: string
+    :param symmetry: whether cars should be treated as interchangeable when
+        generating successor states
+    :type symmetry: bool
+    :param cache_dir: the directory of the on-disk cache of processed maps,
+        or None to always process the map
+    :type cache_dir: string
+    :param world: the processed World of this problem, or None to build and
+        process one
+    :type world: World
+    :param spans: if True, the wall time spent in each part of the search is
+        recorded (see timing.start_spans), and reported as 'spans', keyed by
+        span path: 'world' (building the World and the initial state, and
+        its nested 'pre_processing' and 'pre_processing/shortest_paths',
+        unless the World was given), and 'search' (and its nested
+        'successors', 'heuristic', 'queue' and 'path_reconstruction'). If
+        spans are already being recorded by the caller, they are added to
+        the caller's recording instead, and not reported. If False, the
+        search runs exactly as without any timing.
+    :type spans: bool
+    :param memory: if True, memory allocations are traced during the search
+        (with tracemalloc, which slows it down, so 'simulation_time' is
+        inflated), and the results report 'peak_memory', the peak size in
+        bytes of the memory allocated by Python while building the World
+        (unless it was given) and searching, and 'max_rss', the peak
+        resident set size in bytes of this process so far (see
+        _get_max_rss).
+    :type memory: bool
     :param algorithm: the search algorithm to use; e.g. a_star_count_nodes or
         local_beam_search. It should return both a solution state and a count
         of the number of nodes expanded during the search.
@@ -173,17 +455,76 @@ def _run_search(n, k, m, full_map, pairs, num_sols, state_type, h, algorithm,
     :param kwargs: arguments to 'algorithm'
     :rtype: dict
     """
-    if not _parameters_valid(n, k, m, full_map, pairs, num_sols, state_type):
+    if not _parameters_valid(n, k, m, full_map, pairs, num_sols, state_type,
+                             open_list):
         return None
-    initial, trans_op, time = _create_problem_representation(n, k, m, full_map,
-                                                             pairs, state_type)
-    data = _do_run_search(num_sols, algorithm, initial, is_goal, trans_op,
-                          decorating_f(h), *args, **kwargs)
+    record = spans and not timing.spans_enabled()
+    if record:
+        timing.start_spans()
+    if memory:
+        import tracemalloc
+
+        tracing = not tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.start()
+        else:
+            tracemalloc.reset_peak()
+    try:
+        with timing.span('world'):
+            initial, trans_op, time = _create_problem_representation(
+                n, k, m, full_map, pairs, state_type, symmetry, cache_dir,
+                world)
+        with timing.span('search'):
+            data = _do_run_search(
+                num_sols, algorithm, initial, is_goal,
+                timing.timed('successors', trans_op),
+                timing.timed('heuristic', decorating_f(h)), *args,
+                queue_type=timing.timed_queue('queue',
+                                              open_lists[open_list]),
+                **kwargs)
+    finally:
+        totals = timing.end_spans() if record else None
+        if memory:
+            peak_memory = tracemalloc.get_traced_memory()[1]
+            if tracing:
+                tracemalloc.stop()
+    if record:
+        data['spans'] = dict((path, '{:.4f}'.format(total))
+                             for path, total in sorted(totals.items()))
+    if memory:
+        data['peak_memory'] = peak_memory
+        data['max_rss'] = _get_max_rss()
     data['pre_processing_time'] = time
+    data['shortest_paths_time'] = '{:.4f}'.format(
+        initial.get_world().get_shortest_paths_time())
+    data['pre_processing_cached'] = \
+        initial.get_world().was_loaded_from_cache()
+    data['open_list'] = open_list
+    data['symmetry'] = symmetry
     return data
 
 
-def _parameters_valid(n, k, m, full_map, pairs, num_sols, state_type):
+def _get_max_rss():
+    """
+    Returns the peak resident set size of this process so far, in bytes, or
+    None if it is not available on this platform. Since it is the peak over
+    the whole life of the process, it is an upper bound on the memory used
+    by any one search run in it.
+
+    :rtype: int
+    """
+    try:
+        import resource
+    except ImportError:  # Not available on Windows.
+        return None
+    import sys
+
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss if sys.platform == 'darwin' else max_rss * 1024
+
+
+def _parameters_valid(n, k, m, full_map, pairs, num_sols, state_type,
+                      open_list):
     """
     Returns True if all parameters are valid, and prints an error message to
     standard error and returns False otherwise.
@@ -207,6 +548,8 @@ def _parameters_valid(n, k, m, full_map, pairs, num_sols, state_type):
     :param state_type: a string describing what type of state should be used;
         currently, one of 'State' or 'VanillaState'
     :type state_type: string
+    :param open_list: the name of the open list implementation to use
+    :type open_list: string
     :rtype: bool
     """
     from networkx import number_of_nodes
@@ -229,15 +572,21 @@ def _parameters_valid(n, k, m, full_map, pairs, num_sols, state_type):
     if state_type not in states:
         eprint("Error: The state type must be one of", states)
         return False
+    if open_list not in open_lists:
+        eprint("Error: The open list must be one of", sorted(open_lists))
+        return False
     return True
 
 
-def _create_problem_representation(n, k, m, full_map, pairs, state_type):
+def _create_problem_representation(n, k, m, full_map, pairs, state_type,
+                                   symmetry=False, cache_dir=None,
+                                   world=None):
     """
     Represents the problem with a World and and initial state of search.
     Returns the initial state, the appropriate transition operator for the type
     of state, and a formatted string representing the process execution time
-    taken to pre-process the given map.
+    taken to pre-process the given map (when the World was processed, if it
+    is given).
 
     :param n: the number of cars in this problem
     :type n: int
@@ -255,20 +604,30 @@ def _create_problem_representation(n, k, m, full_map, pairs, state_type):
     :param state_type: a string describing what type of state should be used;
         currently, one of 'State' or 'VanillaState'
     :type state_type: string
+    :param symmetry: if True, and 'state_type' is 'State', use the transition
+        operator that treats co-located cars as interchangeable. Default:
+        False.
+    :type symmetry: bool
+    :param cache_dir: the directory of the on-disk cache of processed maps,
+        or None to always process the map. Default: None.
+    :type cache_dir: string
+    :param world: the processed World of this problem, or None to build and
+        process one. Default: None.
+    :type world: World
     :rtype: (X, X => list(X), string), where X is the type corresponding to
         'state_type'
     """
-    world = World(n, k, m, full_map, pairs)
-    timing.start_timer()
-    world.process_map()
-    pre_processing_time = '{:.4f}'.format(timing.end_timer())
-    cars = [[world.get_garage()]] * n
-    packages = [False] * k
+    if world is None:
+        world = World(n, k, m, full_map, pairs)
+        timing.timed('pre_processing', world.process_map)(cache_dir=cache_dir)
+    pre_processing_time = '{:.4f}'.format(world.get_pre_processing_time())
+    cars = (world.get_garage(),) * n
     if state_type == 'State':
-        initial = State(world, cars, packages, 0)
-        trans_op = state_transition
+        initial = State(world, cars, 0, 0)
+        trans_op = state_transition_symmetric if symmetry else \
+            state_transition
     else:  # Precondition checking means we are safe to use just else here.
-        initial = VanillaState(world, cars, packages, 0, [-1] * n)
+        initial = VanillaState(world, cars, 0, 0, (-1,) * n)
         trans_op = state_transition_vanilla
     return initial, trans_op, pre_processing_time
 
@@ -276,8 +635,17 @@ def _create_problem_representation(n, k, m, full_map, pairs, state_type):
 def _do_run_search(num_sols, algorithm, *args, **kwargs):
     """
     Runs the given algorithm with the given arguments, and collects the given
-    number of solutions. Returns a dictionary of search results, which will be
-    non-empty if, and only if, the number of solutions to be generated is 1.
+    number of solutions from a single run: each solution after the first
+    continues the search where the previous one was found, so asking for N
+    solutions costs one search, not N. Returns a dictionary of search
+    results: 'node_count', the number of nodes counted by the algorithm up
+    to the last solution collected, and 'cost_sum', the lowest cost of the
+    solutions (both None if there are none); 'simulation_time', the process
+    time taken to collect them all; and 'nodes_per_second'. Unless only one
+    solution is requested, the results also include 'solutions', a list
+    with, for each solution in the order found, its 'node_count',
+    'cost_sum', 'simulation_time' (since the start of the search) and
+    'paths' (see State.recreate_paths).
 
     :param num_sols: the number of solutions that should be generated, or -1 if
         all possible solutions should be generated.
@@ -287,24 +655,37 @@ def _do_run_search(num_sols, algorithm, *args, **kwargs):
         of the number of nodes expanded during the search.
     :type algorithm: (*args, **kwargs) => (State, int)
     :param args: arguments to 'algorithm'
-    :param kwargs: arguments to 'algorithm'
+    :param kwargs: arguments to 'algorithm'; if 'stats' is given, the search
+        statistics collected in it (see astar.a_star) are added to the search
+        results
     :rtype: dict
     """
-    if num_sols == 1:
-        timing.start_timer()
-        sol, count = next(algorithm(*args, **kwargs))
-        data = {
+    from itertools import islice
+
+    solutions = algorithm(*args, **kwargs)
+    if num_sols != -1:
+        solutions = islice(solutions, num_sols)
+    found = []
+    timing.start_timer()
+    for sol, count in solutions:
+        found.append((sol, count, timing.end_timer()))
+    elapsed = timing.end_timer()
+    count = found[-1][1] if found else None
+    data = {
+        'node_count': count,
+        'cost_sum': min(sol.get_g() for sol, _, _ in found) if found
+        else None,
+        'simulation_time': '{:.4f}'.format(elapsed),
+        'nodes_per_second': round(count / max(elapsed, 1e-9), 1) if found
+        else None
+    }
+    data.update(kwargs.get('stats') or {})
+    if num_sols != 1:
+        reconstruct = timing.timed('path_reconstruction', recreate_paths)
+        data['solutions'] = [{
             'node_count': count,
             'cost_sum': sol.get_g(),
-            'simulation_time': '{:.4f}'.format(timing.end_timer())
-        }
-        return data
-    elif num_sols == -1:
-        for sol, count in algorithm(*args, **kwargs):
-            print("count=", count, "cost=", sol.get_g(), recreate_paths(sol))
-        return {}
-    else:
-        for _ in range(num_sols):
-            sol, count = next(algorithm(*args, **kwargs))
-            print("count=", count, "cost=", sol.get_g(), recreate_paths(sol))
-        return {}
+            'simulation_time': '{:.4f}'.format(time),
+            'paths': reconstruct(sol)
+        } for sol, count, time in found]
+    return data
@@ -1,4 +1,21 @@
-def a_star_simulations(n, k, m, h, num_sims, state_type, verbose):
+from collections import OrderedDict
+from functools import lru_cache
+import timing
+
+# The processed World of each recently simulated problem, most recently used
+# last; see get_processed_world.
+_worlds = OrderedDict()
+_MAX_WORLDS = 32
+
+# The worker processes that simulations are spread across, when more than
+# one job is requested; see _get_workers.
+_workers = []
+
+
+def a_star_simulations(n, k, m, h, num_sims, state_type, verbose,
+                       open_list='heap', symmetry=False, cache_dir=None,
+                       jobs=1, on_result=None, spans=False,
+                       memory=False):
     """
     Runs A* with the specified heuristic on 'num_sims' different problems, by
     generating, for each one, a random (but deterministically seeded) problems
@@ -21,17 +38,47 @@ def a_star_simulations(n, k, m, h, num_sims, state_type, verbose):
     :type state_type: string
     :param verbose: if true, print simulation number before each simulation
     :type verbose: bool
+    :param open_list: the name of the open list implementation to use; one of
+        the keys of heapqueue.open_lists. Default: 'heap'.
+    :type open_list: string
+    :param symmetry: if True, treat cars as interchangeable during search.
+        Default: False.
+    :type symmetry: bool
+    :param cache_dir: the directory of the on-disk cache of processed maps,
+        or None to always process the map. Default: None.
+    :type cache_dir: string
+    :param jobs: the number of worker processes to run the simulations in.
+        Default: 1.
+    :type jobs: int
+    :param on_result: if given, a function that is called with the number
+        and the results of each simulation, in order, as soon as they are
+        available, instead of collecting them into the returned data.
+        Default: None.
+    :type on_result: (int, dict) => None
+    :param spans: if True, each simulation's results include the wall time
+        spent in each part of it, as 'spans'; see _run_simulation. Default:
+        False.
+    :type spans: bool
+    :param memory: if True, each simulation's results include the peak
+        memory used by its search; see search._run_search. Default: False.
+    :type memory: bool
     :rtype: list(dict)
     """
     from search import a_star_any_graph
     data = _run_simulations(n, k, m, h, num_sims, a_star_any_graph, state_type,
-                            verbose)
+                            verbose, open_list=open_list, symmetry=symmetry,
+                            cache_dir=cache_dir, jobs=jobs,
+                            on_result=on_result, spans=spans,
+                            memory=memory)
     data['algorithm'] = 'a_star'
     return data
 
 
 def bounded_a_star_simulations(n, k, m, h, num_sims, state_type, bound,
-                               verbose):
+                               verbose, open_list='heap', symmetry=False,
+                               cache_dir=None, jobs=1, on_result=None,
+                               spans=False,
+                               memory=False):
     """
     Runs Bounded A* with the specified heuristic on 'num_sims' different
     problems, by generating, for each one, a random (but deterministically
@@ -60,17 +107,47 @@ def bounded_a_star_simulations(n, k, m, h, num_sims, state_type, bound,
     :type bound: int or float
     :param verbose: if true, print simulation number before each simulation
     :type verbose: bool
+    :param open_list: the name of the open list implementation to use; one of
+        the keys of heapqueue.open_lists. Default: 'heap'.
+    :type open_list: string
+    :param symmetry: if True, treat cars as interchangeable during search.
+        Default: False.
+    :type symmetry: bool
+    :param cache_dir: the directory of the on-disk cache of processed maps,
+        or None to always process the map. Default: None.
+    :type cache_dir: string
+    :param jobs: the number of worker processes to run the simulations in.
+        Default: 1.
+    :type jobs: int
+    :param on_result: if given, a function that is called with the number
+        and the results of each simulation, in order, as soon as they are
+        available, instead of collecting them into the returned data.
+        Default: None.
+    :type on_result: (int, dict) => None
+    :param spans: if True, each simulation's results include the wall time
+        spent in each part of it, as 'spans'; see _run_simulation. Default:
+        False.
+    :type spans: bool
+    :param memory: if True, each simulation's results include the peak
+        memory used by its search; see search._run_search. Default: False.
+    :type memory: bool
     :rtype: list(dict)
     """
     from search import bounded_a_star_any_graph
     data = _run_simulations(n, k, m, h, num_sims, bounded_a_star_any_graph,
-                            state_type, verbose, bound)
+                            state_type, verbose, bound, open_list=open_list,
+                            symmetry=symmetry, cache_dir=cache_dir, jobs=jobs,
+                            on_result=on_result, spans=spans,
+                            memory=memory)
     data['algorithm'] = 'bounded_a_star'
     data['bound'] = bound
     return data
 
 
-def local_beam_simulations(n, k, m, h, num_sims, state_type, k_limit, verbose):
+def local_beam_simulations(n, k, m, h, num_sims, state_type, k_limit, verbose,
+                           open_list='heap', symmetry=False, cache_dir=None,
+                           jobs=1, on_result=None, spans=False,
+                           memory=False):
     """
     Runs Local Beam Search with the specified heuristic on 'num_sims' different
     problems, by generating, for each one, a random (but deterministically
@@ -96,18 +173,171 @@ def local_beam_simulations(n, k, m, h, num_sims, state_type, k_limit, verbose):
     :type k_limit: int
     :param verbose: if true, print simulation number before each simulation
     :type verbose: bool
+    :param open_list: the name of the open list implementation to use; one of
+        the keys of heapqueue.open_lists. Default: 'heap'.
+    :type open_list: string
+    :param symmetry: if True, treat cars as interchangeable during search.
+        Default: False.
+    :type symmetry: bool
+    :param cache_dir: the directory of the on-disk cache of processed maps,
+        or None to always process the map. Default: None.
+    :type cache_dir: string
+    :param jobs: the number of worker processes to run the simulations in.
+        Default: 1.
+    :type jobs: int
+    :param on_result: if given, a function that is called with the number
+        and the results of each simulation, in order, as soon as they are
+        available, instead of collecting them into the returned data.
+        Default: None.
+    :type on_result: (int, dict) => None
+    :param spans: if True, each simulation's results include the wall time
+        spent in each part of it, as 'spans'; see _run_simulation. Default:
+        False.
+    :type spans: bool
+    :param memory: if True, each simulation's results include the peak
+        memory used by its search; see search._run_search. Default: False.
+    :type memory: bool
     :rtype: list(dict)
     """
     from search import local_beam_any_graph
     data = _run_simulations(n, k, m, h, num_sims, local_beam_any_graph,
-                            state_type, verbose, k_limit)
+                            state_type, verbose, k_limit,
+                            open_list=open_list, symmetry=symmetry,
+                            cache_dir=cache_dir, jobs=jobs,
+                            on_result=on_result, spans=spans,
+                            memory=memory)
     data['algorithm'] = 'local_beam'
     data['k_limit'] = k_limit
     return data
 
 
+def ida_star_simulations(n, k, m, h, num_sims, state_type, verbose,
+                         open_list='heap', symmetry=False, cache_dir=None,
+                         jobs=1, on_result=None, spans=False,
+                         memory=False):
+    """
+    Runs IDA* with the specified heuristic on 'num_sims' different problems,
+    by generating, for each one, a random (but deterministically seeded)
+    problems according to the parameters n, k, and m. Returns a list of
+    dictionaries, one dictionary per simulation, where each dictionary
+    contains simulation results.
+
+    :param n: the number of cars in this problem
+    :type n: int
+    :param k: the number of packages in this problem
+    :type k: int
+    :param m: the number of vertices in the full map for this problem
+    :type m: int
+    :param h: the heuristic function that IDA* will use
+    :type h: X => float, where X is the type corresponding to 'state_type'
+    :param num_sims: the number of IDA* simulations to run
+    :type num_sims: int
+    :param state_type: a string describing what type of state should be used;
+        currently, one of 'State' or 'VanillaState'
+    :type state_type: string
+    :param verbose: if true, print simulation number before each simulation
+    :type verbose: bool
+    :param open_list: unused, since IDA* has no open list. Default: 'heap'.
+    :type open_list: string
+    :param symmetry: if True, treat cars as interchangeable during search.
+        Default: False.
+    :type symmetry: bool
+    :param cache_dir: the directory of the on-disk cache of processed maps,
+        or None to always process the map. Default: None.
+    :type cache_dir: string
+    :param jobs: the number of worker processes to run the simulations in.
+        Default: 1.
+    :type jobs: int
+    :param on_result: if given, a function that is called with the number
+        and the results of each simulation, in order, as soon as they are
+        available, instead of collecting them into the returned data.
+        Default: None.
+    :type on_result: (int, dict) => None
+    :param spans: if True, each simulation's results include the wall time
+        spent in each part of it, as 'spans'; see _run_simulation. Default:
+        False.
+    :type spans: bool
+    :param memory: if True, each simulation's results include the peak
+        memory used by its search; see search._run_search. Default: False.
+    :type memory: bool
+    :rtype: list(dict)
+    """
+    from search import ida_star_any_graph
+    data = _run_simulations(n, k, m, h, num_sims, ida_star_any_graph,
+                            state_type, verbose, open_list=open_list,
+                            symmetry=symmetry, cache_dir=cache_dir, jobs=jobs,
+                            on_result=on_result, spans=spans, memory=memory)
+    data['algorithm'] = 'ida_star'
+    return data
+
+
+def sma_star_simulations(n, k, m, h, num_sims, state_type, max_nodes,
+                         verbose, open_list='heap', symmetry=False,
+                         cache_dir=None, jobs=1, on_result=None, spans=False,
+                         memory=False):
+    """
+    Runs SMA* with the specified heuristic on 'num_sims' different problems,
+    by generating, for each one, a random (but deterministically seeded)
+    problems according to the parameters n, k, and m. Returns a list of
+    dictionaries, one dictionary per simulation, where each dictionary
+    contains simulation results.
+
+    :param n: the number of cars in this problem
+    :type n: int
+    :param k: the number of packages in this problem
+    :type k: int
+    :param m: the number of vertices in the full map for this problem
+    :type m: int
+    :param h: the heuristic function that SMA* will use
+    :type h: X => float, where X is the type corresponding to 'state_type'
+    :param num_sims: the number of SMA* simulations to run
+    :type num_sims: int
+    :param state_type: a string describing what type of state should be used;
+        currently, one of 'State' or 'VanillaState'
+    :type state_type: string
+    :param max_nodes: the largest number of states that SMA* keeps in memory
+    :type max_nodes: int
+    :param verbose: if true, print simulation number before each simulation
+    :type verbose: bool
+    :param open_list: the name of the open list implementation to use; one of
+        the keys of heapqueue.open_lists. Default: 'heap'.
+    :type open_list: string
+    :param symmetry: if True, treat cars as interchangeable during search.
+        Default: False.
+    :type symmetry: bool
+    :param cache_dir: the directory of the on-disk cache of processed maps,
+        or None to always process the map. Default: None.
+    :type cache_dir: string
+    :param jobs: the number of worker processes to run the simulations in.
+        Default: 1.
+    :type jobs: int
+    :param on_result: if given, a function that is called with the number
+        and the results of each simulation, in order, as soon as they are
+        available, instead of collecting them into the returned data.
+        Default: None.
+    :type on_result: (int, dict) => None
+    :param spans: if True, each simulation's results include the wall time
+        spent in each part of it, as 'spans'; see _run_simulation. Default:
+        False.
+    :type spans: bool
+    :param memory: if True, each simulation's results include the peak
+        memory used by its search; see search._run_search. Default: False.
+    :type memory: bool
+    :rtype: list(dict)
+    """
+    from search import sma_star_any_graph
+    data = _run_simulations(n, k, m, h, num_sims, sma_star_any_graph,
+                            state_type, verbose, max_nodes,
+                            open_list=open_list, symmetry=symmetry,
+                            cache_dir=cache_dir, jobs=jobs,
+                            on_result=on_result, spans=spans, memory=memory)
+    data['algorithm'] = 'sma_star'
+    data['max_nodes'] = max_nodes
+    return data
+
+
 def _run_simulations(n, k, m, h, num_sims, search_alg, state_type, verbose,
-                     *args, **kwargs):
+                     *args, jobs=1, on_result=None, **kwargs):
     """
     Runs the given search algorithm with the specified heuristic on 'num_sims'
     different problems, by generating, for each one, a random (but
@@ -115,6 +345,23 @@ def _run_simulations(n, k, m, h, num_sims, search_alg, state_type, verbose,
     Returns a list of dictionaries, one dictionary per simulation, where each
     dictionary contains simulation results.
 
+    If more than one job is requested, the simulations are spread across
+    worker processes (see _get_workers). Since every problem is seeded by its
+    simulation number, the results are the same as when running them one
+    after another, and they are returned in the same order. Each
+    simulation's timings are measured within the worker process that ran it.
+
+    Each problem's processed World is shared with every other search run on
+    the same problem in the same process (see get_processed_world); e.g. when
+    Main.py runs several algorithms, each map is only processed once. The
+    workers are kept for later calls, and each problem is always run by the
+    same worker, so this holds with more than one job too. The results
+    report whether the World was shared as 'pre_processing_shared'.
+
+    If 'on_result' is given, each simulation's results are handed to it as
+    soon as they are available, and not kept; the returned dictionary then
+    has no 'data' entry.
+
     :param n: the number of cars in this problem
     :type n: int
     :param k: the number of packages in this problem
@@ -134,25 +381,162 @@ def _run_simulations(n, k, m, h, num_sims, search_alg, state_type, verbose,
     :param verbose: if true, print simulation number before each simulation
     :type verbose: bool
     :param args: additional arguments to 'search_alg'
+    :param jobs: the number of worker processes to run the simulations in; if
+        1, the simulations are run in this process. Default: 1.
+    :type jobs: int
+    :param on_result: if given, a function that is called with the number
+        and the results of each simulation, in order, as soon as they are
+        available. Default: None.
+    :type on_result: (int, dict) => None
     :param kwargs: additional arguments to 'search_alg'
     :rtype: list(dict)
     """
-    from graphs import get_random_graph
-    import utils
+    from functools import partial
 
+    run = partial(_run_simulation, n, k, m, h, search_alg, state_type, verbose,
+                  args, kwargs)
+    futures = []
+    if jobs > 1 and num_sims > 1:
+        workers = _get_workers(min(jobs, num_sims))
+        futures = [workers[i % len(workers)].submit(run, i)
+                   for i in range(num_sims)]
+        results = (future.result() for future in futures)
+    else:
+        results = map(run, range(num_sims))
     data = []  # List of dictionaries (eventually) for data collection.
-    for i in range(num_sims):  # Run the simulations.
-        random_graph, pairs = get_random_graph(k, m, i)
-        pairs = utils.filter_pairs(pairs)
-        if verbose:
-            print("Starting problem", i, flush=True)
-        data.append(search_alg(n, k, m, random_graph, pairs, state_type, h,
-                               *args, **kwargs))
-    return {
+    try:
+        for i, result in enumerate(results):  # Run the simulations.
+            if on_result is None:
+                data.append(result)
+            else:
+                on_result(i, result)
+    finally:
+        for future in futures:
+            future.cancel()
+    summary = {
         'num_sims': num_sims,
         'n': n,
         'k': k,
         'm': m,
         'state_type': state_type,
-        'data': data
+        'jobs': jobs
     }
+    if on_result is None:
+        summary['data'] = data
+    return summary
+
+
+def _get_workers(jobs):
+    """
+    Returns the given number of worker processes to run simulations in, as
+    single-process pools. The workers are started when first needed, and
+    reused by every later call in this process (e.g. for each algorithm run
+    by Main.py), so that the Worlds each of them processed (see
+    get_processed_world) are shared with the later searches it runs; they
+    are shut down when this process exits.
+
+    :param jobs: the number of workers
+    :type jobs: int
+    :rtype: list(concurrent.futures.ProcessPoolExecutor)
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    while len(_workers) < jobs:
+        _workers.append(ProcessPoolExecutor(max_workers=1))
+    return _workers[:jobs]
+
+
+def _run_simulation(n, k, m, h, search_alg, state_type, verbose, args, kwargs,
+                    i):
+    """
+    Runs the given search algorithm on the i'th random problem; see
+    _run_simulations. Returns the dictionary of search results. If 'kwargs'
+    requests spans, they cover getting the processed World too, so the
+    'world' span includes processing the map unless it was shared.
+
+    :param i: the simulation number, which seeds the random problem
+    :type i: int
+    :rtype: dict
+    """
+    random_graph, pairs = get_random_instance(k, m, i)
+    if verbose:
+        print("Starting problem", i, flush=True)
+    spans = kwargs.get('spans', False)
+    if spans:
+        timing.start_spans()
+    try:
+        with timing.span('world'):
+            world, shared = get_processed_world(n, k, m, i,
+                                                kwargs.get('cache_dir'))
+        data = search_alg(n, k, m, random_graph, pairs, state_type, h, *args,
+                          world=world, **kwargs)
+    finally:
+        totals = timing.end_spans() if spans else None
+    if data is not None:
+        data['pre_processing_shared'] = shared
+        if spans:
+            data['spans'] = dict((path, '{:.4f}'.format(total))
+                                 for path, total in sorted(totals.items()))
+    return data
+
+
+@lru_cache(maxsize=64)
+def get_random_instance(k, m, i):
+    """
+    Returns the random map and the (filtered) source-destination pairs of the
+    i'th simulated problem with k packages and m locations. Instances are
+    remembered, so that runs that differ only in the number of cars or in the
+    search algorithm and its parameters share them instead of generating them
+    again. The returned map must not be modified.
+
+    :param k: the number of packages in this problem
+    :type k: int
+    :param m: the number of vertices in the full map for this problem
+    :type m: int
+    :param i: the simulation number, which seeds the random problem
+    :type i: int
+    :rtype: NetworkX Graph, list((int, int))
+    """
+    from graphs import get_random_graph
+    import utils
+
+    random_graph, pairs = get_random_graph(k, m, i)
+    return random_graph, utils.filter_pairs(pairs)
+
+
+def get_processed_world(n, k, m, i, cache_dir=None):
+    """
+    Returns the World of the i'th simulated problem with n cars, k packages
+    and m locations, with its map processed, and whether it was already
+    returned before. Worlds are remembered, so that every search algorithm
+    run on the same problem within this process shares the one World, and
+    the map is only processed once. The time taken to process it is kept by
+    the World itself (see World.get_pre_processing_time), so each search
+    still reports it.
+
+    :param n: the number of cars in this problem
+    :type n: int
+    :param k: the number of packages in this problem
+    :type k: int
+    :param m: the number of vertices in the full map for this problem
+    :type m: int
+    :param i: the simulation number, which seeds the random problem
+    :type i: int
+    :param cache_dir: the directory of the on-disk cache of processed maps,
+        or None to always process the map. Default: None.
+    :type cache_dir: string
+    :rtype: World, bool
+    """
+    from World import World
+
+    key = (n, k, m, i, cache_dir)
+    if key in _worlds:
+        _worlds.move_to_end(key)
+        return _worlds[key], True
+    random_graph, pairs = get_random_instance(k, m, i)
+    world = World(n, k, m, random_graph, pairs)
+    timing.timed('pre_processing', world.process_map)(cache_dir=cache_dir)
+    _worlds[key] = world
+    if len(_worlds) > _MAX_WORLDS:
+        _worlds.popitem(last=False)
+    return world, False
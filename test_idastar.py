@@ -0,0 +1,59 @@
+def compare_small_graph(n, graph_function):
+    """
+    Runs A* and IDA* on one of the small graphs defined in graphs.py, and
+    prints the cost and the number of expanded states of the solution each
+    one finds; if the heuristic is admissible, the costs must be the same.
+
+    :param n: the number of cars in this problem
+    :type n: int
+    :param graph_function: the function of graphs.py returning the graph
+    :type graph_function: () => (NetworkX Graph, list((int, int)))
+    """
+    from search import a_star_any_graph, ida_star_any_graph
+    from State import State
+    full_map, pairs = graph_function()
+    k = len(pairs)
+    m = full_map.number_of_nodes()
+    for search in a_star_any_graph, ida_star_any_graph:
+        data = search(n, k, m, full_map, pairs, 'State',
+                      State.sum_of_package_cost_h)
+        print(data['algorithm'], data['cost_sum'], data['node_count'])
+
+
+def inconsistent_heuristic():
+    """
+    Runs A* and IDA* on a small graph, S -> X -> G and S -> Y, with an
+    inconsistent heuristic, under which X exceeds the threshold of the
+    iteration that G's own f-value first fits in, and prints the solution
+    each one finds; both must find G.
+    """
+    from astar import a_star_count_nodes
+    from idastar import ida_star
+    edges = {'S': ['X', 'Y'], 'X': ['G'], 'Y': [], 'G': []}
+    g = {'S': 0, 'X': 1, 'Y': 1, 'G': 10}
+    h = {'S': 0, 'X': 11, 'Y': 9, 'G': 0}
+
+    def is_goal(state):
+        return state == 'G'
+
+    def trans_op(state):
+        return edges[state]
+
+    def f(state):
+        return g[state] + h[state]
+
+    for search in a_star_count_nodes, ida_star:
+        print(search.__name__, next(search('S', is_goal, trans_op, f), None))
+
+
+if __name__ == "__main__":
+    import graphs
+
+    print("========== Inconsistent heuristic results ==========")
+    inconsistent_heuristic()
+
+    for name, function in [('Triangle', graphs.get_triangle_graph),
+                           ('OGG', graphs.get_ogg_graph),
+                           ('Circle', graphs.get_circle_graph)]:
+        print("==========", name, "graph results ==========")
+        compare_small_graph(2, function)
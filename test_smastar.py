@@ -0,0 +1,38 @@
+def compare_memory_limits(n, k, m, seed, limits):
+    """
+    Runs A*, and then SMA* with each of the given limits on the number of
+    states kept in memory, on a random problem, and prints the cost and the
+    number of expanded states of the solution each one finds, as well as the
+    number of states SMA* forgot; if the heuristic is admissible, the costs
+    must be the same as long as the limit is larger than the number of moves
+    of the solution.
+
+    :param n: the number of cars in this problem
+    :type n: int
+    :param k: the number of packages in this problem
+    :type k: int
+    :param m: the number of vertices in the full map for this problem
+    :type m: int
+    :param seed: the seed of the random problem
+    :type seed: int
+    :param limits: the limits on the number of states kept in memory
+    :type limits: list(int)
+    """
+    from search import a_star_any_graph, sma_star_any_graph
+    from simulation import get_random_instance
+    from State import State
+    full_map, pairs = get_random_instance(k, m, seed)
+    h = State.sum_of_package_cost_h
+    data = a_star_any_graph(n, k, m, full_map, pairs, 'State', h)
+    print(data['algorithm'], data['cost_sum'], data['node_count'])
+    for max_nodes in limits:
+        data = sma_star_any_graph(n, k, m, full_map, pairs, 'State', h,
+                                  max_nodes)
+        print(data['algorithm'], max_nodes, data['cost_sum'],
+              data['node_count'], data['forgotten'])
+
+
+if __name__ == "__main__":
+    for problem in range(3):
+        print("========== Random problem", problem, "results ==========")
+        compare_memory_limits(2, 5, 30, problem, [100, 1000, 10000])
@@ -0,0 +1,102 @@
+def check_incremental_heuristics(n, name, symmetry=False):
+    """
+    Runs A* on the given problem, and checks every generated state's
+    incrementally maintained heuristic values against the same values
+    computed from scratch. Prints the number of states checked, and an error
+    message for every state that fails the check.
+
+    :param n: the number of cars in this problem
+    :type n: int
+    :param name: the name of the problem. One of 'OGG', 'Circle', or
+        'Random'.
+    :type name: string
+    :param symmetry: whether to use the symmetric transition operator.
+        Default: False.
+    :type symmetry: bool
+    """
+    from search import _create_problem_representation
+    from astar import a_star_count_nodes
+    from State import State, is_goal, decorating_f, state_key
+    import graphs
+    import utils
+
+    if name == 'OGG':
+        full_map, pairs = graphs.get_ogg_graph()
+    elif name == 'Circle':
+        full_map, pairs = graphs.get_circle_graph()
+    else:
+        full_map, pairs = graphs.get_random_graph(6, 30, seed=3)
+        pairs = utils.filter_pairs(pairs)
+    initial, trans_op, _ = _create_problem_representation(
+        n, len(pairs), full_map.number_of_nodes(), full_map, pairs, 'State',
+        symmetry)
+
+    checked = [0]
+
+    def checking_trans_op(state):
+        successors = trans_op(state)
+        for successor in successors:
+            checked[0] += 1
+            if not successor.check_heuristics():
+                print("error", successor.get_key())
+        return successors
+
+    f = decorating_f(State.sum_of_package_cost_h)
+    sol, count = next(a_star_count_nodes(initial, is_goal, checking_trans_op,
+                                         f, key=state_key))
+    print(name, "n=%d" % n, "symmetry=%s" % symmetry, "checked", checked[0],
+          "states; cost", sol.get_g())
+
+
+def check_duplicate_detection(n, k, m, num_sims, bound):
+    """
+    Runs A* and Bounded A* on the first 'num_sims' random problems with n
+    cars, k packages and m locations, both with and without duplicate
+    detection, and checks that duplicate detection finds solutions of the
+    same cost, without expanding more states. Prints the cost and the number
+    of expanded states of each search.
+
+    :param n: the number of cars in this problem
+    :type n: int
+    :param k: the number of packages in this problem
+    :type k: int
+    :param m: the number of vertices in the full map for this problem
+    :type m: int
+    :param num_sims: the number of random problems to check
+    :type num_sims: int
+    :param bound: the bound of Bounded A*; see astar.bounded_a_star
+    :type bound: int or float
+    """
+    from search import _create_problem_representation, _get_key
+    from astar import bounded_a_star
+    from simulation import get_random_instance
+    from State import State, is_goal, decorating_f
+
+    f = decorating_f(State.sum_of_package_cost_h)
+    for i in range(num_sims):
+        full_map, pairs = get_random_instance(k, m, i)
+        for name, search_bound in [('a_star', 0), ('bounded_a_star', bound)]:
+            solutions = []
+            for key in _get_key(True, False), _get_key(False, False):
+                initial, trans_op, _ = _create_problem_representation(
+                    n, k, m, full_map, pairs, 'State')
+                sol, count = next(bounded_a_star(initial, is_goal, trans_op,
+                                                 f, search_bound, key=key))
+                solutions.append((sol.get_g(), count))
+            (cost, count), (plain_cost, plain_count) = solutions
+            print(name, "problem", i, "cost", cost, plain_cost, "expanded",
+                  count, plain_count)
+            assert cost == plain_cost, "duplicate detection changed the cost"
+            assert count <= plain_count, \
+                "duplicate detection expanded more states"
+
+
+if __name__ == "__main__":
+    from Main import defaults
+
+    check_incremental_heuristics(2, 'OGG')
+    check_incremental_heuristics(2, 'Circle')
+    check_incremental_heuristics(3, 'Random')
+    check_incremental_heuristics(3, 'Random', symmetry=True)
+    check_duplicate_detection(2, 3, 10, 4, defaults['bound'])
+    check_duplicate_detection(2, 4, 20, 3, defaults['bound'])
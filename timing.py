@@ -1,8 +1,17 @@
+from contextlib import contextmanager
 from functools import reduce
-from time import clock
+from time import perf_counter, process_time
 
 start_t = {}
 
+# The total wall time spent in each span, keyed by the span's path (the names
+# of its enclosing spans and its own name, joined by '/'), while spans are
+# being recorded (see start_spans); None otherwise.
+_span_totals = None
+
+# The paths of the spans currently open, innermost last.
+_span_stack = []
+
 
 def seconds_to_str(t):
     """
@@ -23,7 +32,7 @@ def start_timer(i=0):
     :param i: a timer number
     :type i: int
     """
-    start_t[i] = clock()
+    start_t[i] = process_time()
 
 
 def end_timer(i=0):
@@ -35,11 +44,143 @@ def end_timer(i=0):
     :type i: int
     :rtype: float
     """
-    return clock() - start_t[i]
+    return process_time() - start_t[i]
 
 
 def now():
     """
-    Returns the current time formatted as a string.
+    Returns the current process execution time formatted as a string.
+    """
+    return seconds_to_str(process_time())
+
+
+def start_spans():
+    """
+    Starts recording spans: named, possibly nested, intervals of wall time
+    (see span, timed and timed_queue). Any spans recorded so far are
+    discarded. While spans are not being recorded, span, timed and
+    timed_queue add no measurable overhead.
+    """
+    global _span_totals
+    _span_totals = {}
+    del _span_stack[:]
+
+
+def end_spans():
+    """
+    Stops recording spans, and returns the total wall time spent in each
+    span since start_spans, in seconds, keyed by the span's path; e.g.
+    'search/successors' for the 'successors' span opened within the 'search'
+    span. The time of a span includes the time of the spans nested in it.
+    Returns an empty dict if spans were not being recorded.
+
+    :rtype: dict
+    """
+    global _span_totals
+    totals = _span_totals or {}
+    _span_totals = None
+    del _span_stack[:]
+    return totals
+
+
+def spans_enabled():
+    """
+    Returns whether spans are being recorded.
+
+    :rtype: bool
+    """
+    return _span_totals is not None
+
+
+@contextmanager
+def span(name):
+    """
+    Returns a context manager that records the time spent in its body as the
+    span with the given name, nested in the currently open span. Does
+    nothing if spans are not being recorded. It is meant for coarse spans
+    (e.g. a whole search); wrap functions called in inner loops with timed
+    instead.
+
+    :param name: the name of the span
+    :type name: string
+    """
+    if _span_totals is None:
+        yield
+        return
+    path = _open_span(name)
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        _close_span(path, start)
+
+
+def timed(name, function):
+    """
+    Returns a function that calls the given function, and records the time
+    spent in each call as the span with the given name, nested in whichever
+    span is open at the time of the call. If spans are not being recorded,
+    the given function itself is returned, so the returned function adds no
+    overhead at all.
+
+    :param name: the name of the span
+    :type name: string
+    :param function: the function to time
+    :type function: callable
+    :rtype: callable
+    """
+    if _span_totals is None:
+        return function
+
+    def timed_function(*args, **kwargs):
+        path = _open_span(name)
+        start = perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            _close_span(path, start)
+
+    return timed_function
+
+
+def timed_queue(name, queue_type):
+    """
+    Returns a subclass of the given queue class whose put and get methods
+    are timed as the span with the given name (see timed). If spans are not
+    being recorded, the given class itself is returned.
+
+    :param name: the name of the span
+    :type name: string
+    :param queue_type: the queue class; e.g. heapqueue.HeapQueue
+    :type queue_type: class
+    :rtype: class
+    """
+    if _span_totals is None:
+        return queue_type
+    return type('Timed' + queue_type.__name__, (queue_type,), {
+        'put': timed(name, queue_type.put),
+        'get': timed(name, queue_type.get)
+    })
+
+
+def _open_span(name):
+    """
+    Opens the span with the given name, nested in the currently open span,
+    and returns its path.
+
+    :rtype: string
+    """
+    path = _span_stack[-1] + '/' + name if _span_stack else name
+    _span_stack.append(path)
+    return path
+
+
+def _close_span(path, start):
+    """
+    Closes the innermost open span, whose path is given, adding the time
+    since 'start' to its total.
     """
-    return seconds_to_str(clock())
+    _span_stack.pop()
+    if _span_totals is not None:
+        _span_totals[path] = _span_totals.get(path, 0.0) + \
+            perf_counter() - start
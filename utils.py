@@ -214,6 +214,38 @@ def output_plot_multiple(path, data_list):
     # py.plot(to_plot, filename=path, auto_open=False)
 
 
+def output_mean_multiple(path, aggregates_list):
+    """
+    Writes bar plots of the mean of each result in the given aggregated data
+    to the files corresponding to the given path, with one bar per set of
+    simulations, in the given order.
+
+    :param path: the file path
+    :param aggregates_list: the data to plot; aggregates_list should be a
+        list of aggregated data dictionaries, as returned by
+        aggregate_json_data or read_streamed_json_data; each should have the
+        key 'algorithm', the name of the algorithm used (string), and
+        aggregate the results pre_processing_time, cost_sum, simulation_time,
+        and node_count
+    """
+    from plotly import offline as py
+    from plotly import graph_objs as go
+    plots = [('cost_sum', 'Cost path', 'Cost', "cost."),
+             ('pre_processing_time', 'Pre Processing time', 'time',
+              "processing.time."),
+             ('simulation_time', 'Simulation time', 'time',
+              "simulation.time."),
+             ('node_count', 'Node count', 'number', "node.count.")]
+    for key, title, y_title, prefix in plots:
+        traces = [go.Bar(x=[i], y=[aggregate_mean(aggregates, key)],
+                         name=aggregates.get('algorithm'))
+                  for i, aggregates in enumerate(aggregates_list)]
+        layout = dict(title='Mean ' + title,
+                      xaxis=dict(title='Results file'),
+                      yaxis=dict(title=y_title))
+        py.plot(dict(data=traces, layout=layout), filename=prefix + path)
+
+
 def output_plot(path, data):
     """
     Writes plots of the given data in the file corresponding to the given path.
@@ -291,6 +323,155 @@ def read_json_data(name):
         return data
 
 
+def write_json_line(out, record):
+    """
+    Appends the given record to the given open JSON Lines file, as a single
+    line of JSON, and flushes the file, so that the record is visible to
+    readers straight away.
+
+    :param out: the file to write to
+    :type out: file
+    :param record: the data to write
+    """
+    import json
+    out.write(json.dumps(record) + "\n")
+    out.flush()
+
+
+def read_streamed_json_data(name, keys=None):
+    """
+    Reads the results of a set of simulations from the given JSON Lines file,
+    as written by Main.py in streaming mode, and returns their aggregates
+    (see aggregate_json_data), without keeping the results of each
+    simulation in memory: the file is read one simulation at a time, adding
+    each result to running sums and counts. Simulations without results
+    (e.g. for invalid parameters) are skipped. If the file is incomplete
+    (e.g. the simulations are still running), the aggregates of the results
+    read so far are returned.
+
+    The file has one line, {"sim": i, "result": {...}}, for each simulation,
+    followed by a final line, {"summary": {...}}, holding everything but the
+    simulation results.
+
+    :param name: the name of the JSON Lines file
+    :param keys: the names of the results to aggregate, or None to aggregate
+        all the numerical results. Default: None.
+    :type keys: list(string)
+    :rtype: dict
+    """
+    sums = {}
+    counts = {}
+    summary = None
+    algorithm = None
+    for record in read_json_lines(name):
+        if 'summary' in record:
+            summary = record['summary']
+            continue
+        result = record['result']
+        if result is None:
+            continue
+        if algorithm is None:
+            algorithm = result.get('algorithm')
+        _add_to_aggregate(sums, counts, result, keys)
+    if summary is None:  # Still running; describe the results from them.
+        summary = {}
+        if algorithm is not None:
+            summary['algorithm'] = algorithm
+    summary['sums'] = sums
+    summary['counts'] = counts
+    return summary
+
+
+def aggregate_json_data(data, keys=None):
+    """
+    Returns the aggregates of the given set of simulation results, as read
+    by read_json_data: a copy of 'data' where the results of each simulation
+    ('data') are replaced by the sum ('sums') and the number ('counts') of
+    the values of each result, by name. Simulations without results are
+    skipped.
+
+    :param data: the simulation results
+    :type data: dict
+    :param keys: the names of the results to aggregate, or None to aggregate
+        all the numerical results. Default: None.
+    :type keys: list(string)
+    :rtype: dict
+    """
+    sums = {}
+    counts = {}
+    for result in data['data']:
+        if result is not None:
+            _add_to_aggregate(sums, counts, result, keys)
+    aggregates = dict((k, v) for k, v in data.items() if k != 'data')
+    aggregates['sums'] = sums
+    aggregates['counts'] = counts
+    return aggregates
+
+
+def _add_to_aggregate(sums, counts, result, keys):
+    """
+    Adds the values in the given simulation result to the running sums and
+    counts, by name. Values that are not numbers (results files store times
+    as formatted strings) are converted, and missing or non-numerical ones
+    are skipped.
+
+    :param sums: the sum of the values of each result so far
+    :type sums: dict
+    :param counts: the number of values of each result so far
+    :type counts: dict
+    :param result: the results of one simulation
+    :type result: dict
+    :param keys: the names of the results to add, or None to add all the
+        numerical results
+    :type keys: list(string)
+    """
+    for key in result if keys is None else keys:
+        try:
+            value = float(result[key])
+        except (KeyError, TypeError, ValueError):
+            continue
+        sums[key] = sums.get(key, 0) + value
+        counts[key] = counts.get(key, 0) + 1
+
+
+def aggregate_mean(aggregates, key):
+    """
+    Returns the mean of the values of the given result in the given
+    aggregates (see aggregate_json_data), or None if there are none.
+
+    :param aggregates: the aggregated simulation results
+    :type aggregates: dict
+    :param key: the name of the result
+    :type key: string
+    :rtype: float
+    """
+    count = aggregates['counts'].get(key, 0)
+    if count == 0:
+        return None
+    return aggregates['sums'][key] / count
+
+
+def read_json_lines(name):
+    """
+    Returns a generator of the records in the given JSON Lines file (one JSON
+    document per line), read one line at a time. Blank lines, and a final
+    line that was cut short (e.g. by an interrupted write), are skipped.
+
+    :param name: the name of the JSON Lines file
+    :rtype: generator(data)
+    """
+    import json
+    with open(name) as data_file:
+        for line in data_file:
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                if line.endswith("\n"):
+                    raise  # Only the last line may be incomplete.
+
+
 def plot_results(name, data):
     """
     Writes plots of the given data to the given file in HTML.
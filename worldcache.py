@@ -0,0 +1,93 @@
+import os
+import numpy as np
+
+# Increment whenever the cached arrays change in meaning or layout, so that
+# stale cache entries are never loaded.
+CACHE_VERSION = 1
+
+# The names of the arrays making up each cache entry; each is stored in its
+# own .npy file, so that it can be memory-mapped on load.
+_ARRAY_NAMES = ['important_vertices', 'distances', 'predecessors']
+
+
+def get_instance_hash(full_map, pairs, garage):
+    """
+    Returns a hash identifying a problem instance by its content: the
+    vertices and weighted edges of the full map, the source-destination pairs
+    and the garage. Instances with the same hash have the same preprocessed
+    World arrays, however they were generated.
+
+    :param full_map: the full map of all locations for the problem
+    :type full_map: NetworkX Graph
+    :param pairs: a list of source-destination pairs of all the packages
+    :type pairs: list((int, int))
+    :param garage: the garage vertex
+    :type garage: int
+    :rtype: string
+    """
+    import hashlib
+
+    digest = hashlib.sha256()
+    digest.update(repr(('v', CACHE_VERSION, garage)).encode())
+    digest.update(repr(sorted(full_map.nodes())).encode())
+    edges = sorted((min(u, v), max(u, v), w)
+                   for u, v, w in full_map.edges(data='weight', default=1))
+    digest.update(repr(edges).encode())
+    digest.update(repr([tuple(pair) for pair in pairs]).encode())
+    return digest.hexdigest()
+
+
+def load_arrays(cache_dir, instance_hash):
+    """
+    Returns the cached arrays for the given instance, memory-mapped
+    read-only, as a dict keyed by array name, or None if the instance is not
+    in the cache.
+
+    :param cache_dir: the cache directory
+    :type cache_dir: string
+    :param instance_hash: see get_instance_hash
+    :type instance_hash: string
+    :rtype: dict
+    """
+    entry = os.path.join(cache_dir, instance_hash)
+    if not os.path.isdir(entry):
+        return None
+    try:
+        return dict((name, np.load(os.path.join(entry, name + '.npy'),
+                                   mmap_mode='r'))
+                    for name in _ARRAY_NAMES)
+    except (OSError, ValueError):
+        return None  # An incomplete or corrupted entry is just a miss.
+
+
+def save_arrays(cache_dir, instance_hash, arrays):
+    """
+    Writes the given arrays to the cache for the given instance. The entry is
+    written to a temporary directory first, and then renamed into place, so
+    that concurrent writers and readers never see a partial entry. If the
+    entry already exists, it is left untouched.
+
+    :param cache_dir: the cache directory; created if needed
+    :type cache_dir: string
+    :param instance_hash: see get_instance_hash
+    :type instance_hash: string
+    :param arrays: the arrays to cache, keyed by array name
+    :type arrays: dict
+    """
+    import shutil
+    import tempfile
+
+    entry = os.path.join(cache_dir, instance_hash)
+    if os.path.isdir(entry):
+        return
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix='.' + instance_hash, dir=cache_dir)
+    try:
+        for name in _ARRAY_NAMES:
+            np.save(os.path.join(tmp_dir, name + '.npy'), arrays[name])
+        os.rename(tmp_dir, entry)
+    except OSError:
+        pass  # Another process has written the same entry in the meantime.
+    finally:
+        if os.path.isdir(tmp_dir):
+            shutil.rmtree(tmp_dir, ignore_errors=True)